@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# async_match.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Match a Dfa against bytes arriving on an asyncio stream.
+#
+# The matcher keeps the Dfa state between reads and hands control back to
+# the event loop every yield_every bytes.  Buffers of offload_size bytes or
+# more can be run on an executor instead.  With a thread pool the Dfa is
+# shared directly.  With a process pool each worker gets its copy of the
+# Dfa once, from the pool initializer (see process_executor), and only the
+# current state and the text cross the process boundary afterwards.
+
+import asyncio
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+
+_worker_dfa = None
+
+def init_worker(dfa):
+    global _worker_dfa
+    _worker_dfa = dfa
+
+def advance_in_worker(curs, text):
+    return _worker_dfa.advance(curs, text)
+
+# A process pool whose workers all hold dfa
+def process_executor(dfa, max_workers=None):
+    return ProcessPoolExecutor(max_workers=max_workers,
+                               initializer=init_worker, initargs=(dfa,))
+
+class AsyncMatcher(object):
+    def __init__(self, dfa, yield_every=65536, executor=None,
+                 offload_size=1<<20, process=False, encoding='utf-8',
+                 read_size=65536):
+        if yield_every <= 0:
+            raise Exception('yield_every must be positive')
+        self.dfa = dfa
+        self.yield_every = yield_every
+        self.executor = executor
+        self.offload_size = offload_size
+        self.process = process
+        self.encoding = encoding
+        self.read_size = read_size
+        self.dead = dfa.dead_states()
+        self.reset()
+
+    def reset(self):
+        self.state = self.dfa.start
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        self.consumed = 0
+
+    # True once no further input can lead to a match
+    def failed(self):
+        return self.state is None or self.state in self.dead
+
+    async def run_offloaded(self, text):
+        loop = asyncio.get_running_loop()
+        if self.process:
+            return await loop.run_in_executor(self.executor, advance_in_worker,
+                                              self.state, text)
+        return await loop.run_in_executor(self.executor, self.dfa.advance,
+                                          self.state, text)
+
+    async def feed(self, data):
+        if self.failed():
+            return
+        self.consumed += len(data)
+
+        if self.executor is not None and len(data) >= self.offload_size:
+            self.state = await self.run_offloaded(self.decoder.decode(data))
+            return
+
+        step = self.yield_every
+        for i in range(0, len(data), step):
+            text = self.decoder.decode(data[i:i+step])
+            self.state = self.dfa.advance(self.state, text)
+            if self.failed():
+                return
+            if i + step < len(data):
+                await asyncio.sleep(0)
+
+    # Whether everything fed so far is matched by the Dfa
+    def matched(self):
+        if self.state is None:
+            return False
+        curs = self.dfa.advance(self.state, self.decoder.decode(b'', True))
+        return curs is not None and curs in self.dfa.accepting
+
+    # Feed the matcher from an asyncio.StreamReader or an async iterator
+    # of bytes until the input ends or can no longer match.
+    async def consume(self, source):
+        if hasattr(source, 'read'):
+            while not self.failed():
+                data = await source.read(self.read_size)
+                if not data:
+                    break
+                await self.feed(data)
+        else:
+            async for data in source:
+                await self.feed(data)
+                if self.failed():
+                    break
+        return self.matched()
+
+async def async_matches(dfa, source, **kwargs):
+    return await AsyncMatcher(dfa, **kwargs).consume(source)
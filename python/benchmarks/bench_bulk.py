@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+# bench_bulk.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Compile a large rule set one pattern at a time and with compile_many,
+# and compare the size of the results as bytes and as pickled Dfas.
+#
+#     python -m benchmarks.bench_bulk [rules] [workers]
+
+import os
+import pickle
+import sys
+import time
+
+from regex import *
+from bulk import compile_many
+from benchmarks.corpus import patterns
+
+# n distinct rules made by prefixing the corpus patterns with a rule number
+def rule_set(n):
+    base = patterns()
+    return ['r{}_{}'.format(i, base[i % len(base)]) for i in range(n)]
+
+def main(n=2000, workers=os.cpu_count()):
+    rules = rule_set(n)
+
+    t0 = time.perf_counter()
+    dfas = [Nfa(rx).to_dfa() for rx in rules]
+    serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = compile_many(rules, workers=workers, chunksize=16)
+    pooled = time.perf_counter() - t0
+
+    assert all(r.ok() for r in results)
+    assert all(r.dfa().transitions == df.transitions for r, df in zip(results, dfas))
+
+    packed = sum(len(r.data) for r in results)
+    pickled = sum(len(pickle.dumps(df)) for df in dfas)
+    print('{} rules'.format(n))
+    print('{:>24}: {:8.2f}s'.format('Nfa(rx).to_dfa()', serial))
+    print('{:>24}: {:8.2f}s  ({:.1f}x)'.format('compile_many, {} workers'.format(workers),
+                                              pooled, serial / pooled))
+    print('{:>24}: {:8.0f}KB'.format('Dfa.to_bytes', packed / 1024))
+    print('{:>24}: {:8.0f}KB'.format('pickled Dfa', pickled / 1024))
+    print('slowest rules:')
+    for r in sorted(results, key=lambda r: r.seconds)[-5:]:
+        print('{:>24}: {:8.2f}ms'.format(r.pattern[:24], r.seconds * 1000))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
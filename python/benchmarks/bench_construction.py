@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+# bench_construction.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Compare the Dfa construction methods on the benchmark corpus.
+
+import sys
+
+from regex import *
+from benchmarks.corpus import corpus, best_time
+
+def main(methods=dfa_methods):
+    print('{:45} {:>10} {:>8} {:>12}'.format('pattern', 'method', 'states', 'build'))
+    totals = dict((m, 0.0) for m in methods)
+    for rx, inputs in corpus:
+        pt = parser.parse(rx)
+        for m in methods:
+            df = Dfa(pt, method=m)
+            for ins in inputs:
+                assert df.matches(ins) == re_match(rx, ins), (rx, m, ins)
+            t = best_time(lambda: Dfa(pt, method=m))
+            totals[m] += t
+            print('{:45} {:>10} {:>8} {:>10.2f}ms'.format(rx[:45], m, len(df.transitions), t*1000))
+    for m in methods:
+        print('{:>56} total {:10.2f}ms'.format(m, totals[m]*1000))
+
+if __name__=='__main__':
+    main(tuple(sys.argv[1:]) or dfa_methods)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# bench_derivative.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Compare derivative construction with Nfa.to_dfa on counting heavy
+# patterns, and the lazy DerivativeMatcher with a full Dfa on matching.
+
+from regex import *
+import derivative
+from benchmarks.corpus import corpus, best_time, random_lines
+
+counting = ['[a-z]{2,30}',
+            '([0-9]{1,3}.){3}[0-9]{1,3}',
+            '(x[0-9]{1,3}y){2,5}',
+            '(a|b)*a(a|b){7}',
+            '[:xdigit:]{8}(-[:xdigit:]{4}){3}-[:xdigit:]{12}',
+            '([:alpha:]{1,8}[:digit:]{0,4}){1,4}']
+
+def main():
+    print('{:45} {:>10} {:>8} {:>12}'.format('pattern', 'method', 'states', 'build'))
+    for rx in counting + [rx for rx, ins in corpus]:
+        pt = parser.parse(rx)
+        for m in ('thompson', 'derivative'):
+            t = best_time(lambda: Dfa(pt, method=m), 1)
+            df = Dfa(pt, method=m)
+            print('{:45} {:>10} {:>8} {:>10.2f}ms'.format(rx[:45], m, len(df.transitions), t*1000))
+
+    lines = random_lines(20000, alphabet='0123456789.', lo=7, hi=15)
+    rx = '([0-9]{1,3}.){3}[0-9]{1,3}'
+    df = Dfa(rx)
+    full = best_time(lambda: [df.matches(l) for l in lines])
+
+    # A new matcher each run, so states are built while matching
+    def lazy_run():
+        m = derivative.DerivativeMatcher(rx)
+        return [m.matches(l) for l in lines]
+    lazy = best_time(lazy_run)
+    print('matching {} lines: Dfa {:.3f}s, lazy derivatives {:.3f}s'.format(len(lines), full, lazy))
+
+if __name__=='__main__':
+    main()
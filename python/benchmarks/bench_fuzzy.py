@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# bench_fuzzy.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Time Nfa.fuzzy_matches for k = 0..3 edits, against the old way of
+# matching every variant within k edits of a literal indicator, with the
+# variants built into one Nfa.
+#
+#     python -m benchmarks.bench_fuzzy [lines]
+
+import random
+import sys
+import time
+
+from regex import *
+from benchmarks.corpus import random_lines, best_time
+
+# (pattern, a string it matches)
+INDICATORS = [('malware', 'malware'),
+              ('evilcorp-c2', 'evilcorp-c2'),
+              ('update[0-9]{2}-[a-f]+', 'update42-beef')]
+ALPHABET = 'abcdefilmorw-0123456789'
+VARIANT_SAMPLE = 100
+
+# n lines, half of them sample with up to 3 random edits
+def near_misses(sample, n, seed=1):
+    rnd = random.Random(seed)
+    rv = random_lines(n // 2, ALPHABET, 5, 16, seed)
+    for i in range(n - len(rv)):
+        s = sample
+        for j in range(rnd.randint(0, 3)):
+            p = rnd.randrange(len(s) + 1)
+            c = rnd.choice(ALPHABET)
+            s = rnd.choice([s[:p] + c + s[p:], s[:p] + s[p+1:], s[:p] + c + s[p+1:]])
+        rv.append(s)
+    return rv
+
+# An Nfa matching each of words, as if each were its own pattern
+def words_nfa(words):
+    nf = Nfa()
+    ns = 0
+    for w in words:
+        prev = 0
+        for c in w:
+            ns += 1
+            nf.addTransition(Transition(prev, c, ns))
+            prev = ns
+        nf.accepting.add(prev)
+    return nf
+
+# Every string within k edits of word over alphabet
+def variants(word, k, alphabet):
+    rv = {word}
+    for i in range(k):
+        more = set()
+        for w in rv:
+            for j in range(len(w) + 1):
+                more.update(w[:j] + c + w[j:] for c in alphabet)
+                if j < len(w):
+                    more.add(w[:j] + w[j+1:])
+                    more.update(w[:j] + c + w[j+1:] for c in alphabet)
+        rv |= more
+    return rv
+
+def main(n=2000):
+    for rx, sample in INDICATORS:
+        texts = near_misses(sample, n)
+        nf = Nfa(rx)
+        print('{}, {} lines'.format(rx, n))
+        for k in range(4):
+            t = best_time(lambda: [nf.fuzzy_matches(s, k) for s in texts])
+            hits = sum(nf.fuzzy_matches(s, k) for s in texts)
+            print('  k={}: fuzzy_matches {:8.3f}s {:9.0f} lines/s  {} hits'.format(
+                k, t, n / t, hits))
+        if '[' in rx:
+            continue
+        # The variant Nfas are slow enough to match only a sample
+        sample = texts[:VARIANT_SAMPLE]
+        for k in range(1, 3):
+            words = variants(rx, k, ALPHABET)
+            t0 = time.perf_counter()
+            vf = words_nfa(words)
+            t_build = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = [vf.matches(s) for s in sample]
+            t = time.perf_counter() - t0
+            assert got == [nf.fuzzy_matches(s, k) for s in sample]
+            print('  k={}: {} variants, {} Nfa states, built in {:.2f}s, {:9.0f} lines/s'.format(
+                k, len(words), len(vf.transitions) + len(vf.accepting), t_build, len(sample) / t))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
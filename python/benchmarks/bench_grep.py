@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# bench_grep.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Time python -m regex --count on the synthetic log of bench_scan, per
+# engine, against grep -Ex -c on the same file when grep is installed.
+#
+#     python -m benchmarks.bench_grep [megabytes]
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_scan import PATTERN, write_log
+
+GREP_PATTERN = ('[0-9]{8}T[0-9]{6}[[:blank:]]ERROR[[:blank:]][a-z]+[[:blank:]]'
+                'status=5[0-9]{2}[[:blank:]]took=[0-9]+ms')
+
+def timed_run(cmd):
+    t0 = time.perf_counter()
+    out = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+    return out.decode().strip(), time.perf_counter() - t0
+
+def main(megabytes=64):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.log')
+        nlines = write_log(path, megabytes)
+        print('{} lines, {}MB'.format(nlines, megabytes))
+        runs = [('regex --engine ' + engine,
+                 [sys.executable, '-m', 'regex', '--count', '--engine', engine, PATTERN, path])
+                for engine in ['dfa', 'lazy', 'sparse']]
+        if shutil.which('grep'):
+            runs.append(('grep -Ex', ['grep', '-Ex', '-c', GREP_PATTERN, path]))
+        want = None
+        for name, cmd in runs:
+            n, t = timed_run(cmd)
+            want = want or n
+            assert n == want, (name, n, want)
+            print('{:>24}: {:8.2f}s {:8.1f}MB/s  {} matches'.format(name, t, megabytes / t, n))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
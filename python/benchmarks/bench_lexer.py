@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# bench_lexer.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Tokenize the regex grammar with PLY's lexer and with a Scanner built
+# from the same token rules.
+#
+#     python -m benchmarks.bench_lexer [repeat]
+
+import sys
+
+import regex
+from regex import PTCharSet
+from scanner import Scanner
+from benchmarks.corpus import patterns, best_time
+
+singles = [('LPAREN', '('), ('RPAREN', ')'), ('LBRACK', '['), ('RBRACK', ']'),
+           ('LBRACE', '{'), ('RBRACE', '}'), ('ASTERIK', '*'), ('PLUS', '+'),
+           ('BAR', '|'), ('COMMA', ','), ('OPT', '?'), ('COLON', ':')]
+
+# The rules from regex.py.  Our patterns can't say [^...], so OTHER is
+# spelled out as every character of the input that isn't special.
+def regex_rules(text):
+    special = set('][()|+*{}?:, \t')
+    other = set(chr(c) for c in range(0x21, 0x7f)).union(text) - special
+    return ([('NUMBER', '[0-9]+'), ('OTHER', PTCharSet.from_set(other))] +
+            [(name, PTCharSet.from_set(ch)) for name, ch in singles] +
+            [(None, PTCharSet.from_set(' \t'))])
+
+def ply_tokens(text):
+    lexer = regex.lexer.clone()
+    lexer.input(text)
+    return [(tok.type, tok.value) for tok in lexer]
+
+def main(repeat=2000):
+    text = ' '.join(patterns()) * repeat
+    t0 = best_time(lambda: Scanner(regex_rules(text)), 1)
+    sc = Scanner(regex_rules(text))
+
+    expected = ply_tokens(text)
+    assert [(t.type, t.value) for t in sc.tokenize(text)] == expected
+
+    chunks = [text[i:i+4096] for i in range(0, len(text), 4096)]
+    ply = best_time(lambda: ply_tokens(text))
+    ours = best_time(lambda: list(sc.tokenize(text)))
+    streamed = best_time(lambda: list(sc.tokens(chunks)))
+
+    print('{} chars, {} tokens, scanner built in {:.1f}ms with {} states'.format(
+        len(text), len(expected), t0*1000, len(sc.transitions)))
+    for name, t in [('PLY', ply), ('Scanner.tokenize', ours), ('Scanner.tokens', streamed)]:
+        print('{:>20}: {:8.3f}s {:10.0f} tokens/s'.format(name, t, len(expected)/t))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
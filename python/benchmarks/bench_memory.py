@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# bench_memory.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# memory_report totals of each representation of the corpus patterns,
+# next to the memory tracemalloc sees retained after building them.
+#
+#     python -m benchmarks.bench_memory
+
+import gc
+import tracemalloc
+
+from regex import *
+from pattern_set import PatternSet
+from benchmarks.corpus import patterns
+
+builders = [('Nfa', lambda rx: Nfa(rx)),
+            ('Dfa', lambda rx: Dfa(rx)),
+            ('CompressedDfa', lambda rx: Dfa(rx).compress()),
+            ('FrozenDfa', lambda rx: Dfa(rx).freeze()),
+            ('SparseNfa', lambda rx: Nfa(rx).sparse())]
+
+# Bytes still allocated after build() returns, with its result alive
+def retained(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        gc.collect()
+        return obj, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+def main():
+    rxs = patterns()
+    # Warm the ParseTree memos and the lazily imported modules so they
+    # aren't counted below
+    for name, build in builders:
+        for rx in rxs:
+            build(rx)
+    print('{:>14} {:>10} {:>12}'.format('', 'report', 'tracemalloc'))
+    for name, build in builders:
+        objs, measured = retained(lambda: [build(rx) for rx in rxs])
+        reported = sum(o.memory_report()['total'] for o in objs)
+        print('{:>14} {:>10} {:>12}'.format(name, reported, measured))
+    ps, measured = retained(lambda: PatternSet(rxs))
+    print('{:>14} {:>10} {:>12}'.format('PatternSet', ps.memory_report()['total'], measured))
+    print('PatternSet by component:')
+    for k, v in sorted(ps.memory_report().items()):
+        print('  {:>12}: {}'.format(k, v))
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# bench_planner.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Check the planner against the benchmark corpus: time every engine, build
+# included, on inputs of several sizes and compare the planner's choice
+# with the fastest.
+#
+#     python -m benchmarks.bench_planner [volume ...]
+
+import random
+import sys
+import time
+
+import planner
+from regex import parser
+from benchmarks.corpus import corpus
+
+# (a|b)*a(a|b){n} has a Dfa of 2^n states
+extra = [('(a|b)*a(a|b){12}', ['abababbbababab', 'bbbbbbbbbbbbbbbb']),
+         ('(a|b)*a(a|b){16}', ['abababbbababababab', 'abbbbbbbbbbbbbbbbbab'])]
+
+# Lines of roughly volume characters in total, made by mutating inputs
+def make_input(inputs, volume, seed=1):
+    rnd = random.Random(seed)
+    chars = sorted(set(''.join(inputs)))
+    lines = []
+    total = 0
+    while total < volume:
+        line = list(rnd.choice(inputs))
+        if line and rnd.random() < 0.5:
+            line[rnd.randrange(len(line))] = rnd.choice(chars)
+        line = ''.join(line)
+        lines.append(line)
+        total += len(line) + 1
+    return lines
+
+def run(rx, engine, lines, volume):
+    t0 = time.perf_counter()
+    m = planner.compile(rx, volume, engine)
+    n = sum(1 for line in lines if m.matches(line))
+    return n, time.perf_counter() - t0
+
+def main(volumes=(40, 2000, 20000, 400000)):
+    print('{:42} {:>7} {:>12} {:>12} {:>8}'.format('pattern', 'volume', 'planned', 'fastest', 'regret'))
+    worst = 1.0
+    total_planned = total_best = 0.0
+    for rx, inputs in corpus + extra:
+        pt = parser.parse(rx)
+        for volume in volumes:
+            lines = make_input(inputs, volume)
+            times = dict()
+            counts = set()
+            for engine in planner.engines:
+                n, t = run(pt, engine, lines, volume)
+                times[engine] = t
+                counts.add(n)
+            assert len(counts) == 1, (rx, volume, counts)
+            chosen = planner.plan(pt, volume).engine
+            best = min(times, key=times.get)
+            regret = times[chosen] / times[best]
+            worst = max(worst, regret)
+            total_planned += times[chosen]
+            total_best += times[best]
+            print('{:42} {:>7} {:>12} {:>12} {:7.2f}x'.format(
+                rx[:42], volume, '{} {:.0f}ms'.format(chosen, times[chosen]*1000),
+                '{} {:.0f}ms'.format(best, times[best]*1000), regret))
+    print('total planned {:.2f}s, best possible {:.2f}s, worst regret {:.2f}x'.format(
+        total_planned, total_best, worst))
+
+if __name__=='__main__':
+    main(tuple(int(a) for a in sys.argv[1:]) or (40, 2000, 20000, 400000))
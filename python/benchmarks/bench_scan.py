@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# bench_scan.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Count the matching lines of a synthetic log with Dfa.count, and find the
+# first match with Dfa.first_index, against a loop over re_match.
+#
+#     python -m benchmarks.bench_scan [megabytes] [sample lines]
+#
+# re_match compiles its pattern for every line, so it is timed on the
+# first sample lines and scaled up to the whole file.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from regex import *
+
+# Log lines like  20261019T120304 ERROR api status=503 took=87ms
+# Patterns can't hold a literal space, so lines are matched with [:blank:]
+PATTERN = ('[0-9]{8}T[0-9]{6}[:blank:]ERROR[:blank:][a-z]+[:blank:]'
+           'status=5[0-9]{2}[:blank:]took=[0-9]+ms')
+
+levels = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARN', 'ERROR']
+services = ['api', 'auth', 'billing', 'search', 'worker']
+statuses = [200, 200, 200, 201, 204, 301, 404, 500, 503]
+
+def write_log(path, megabytes, seed=1):
+    rnd = random.Random(seed)
+    size = megabytes << 20
+    written = 0
+    lines = 0
+    with open(path, 'w') as f:
+        while written < size:
+            chunk = []
+            for i in range(10000):
+                chunk.append('2026{:02d}{:02d}T{:02d}{:02d}{:02d} {} {} status={} took={}ms\n'.format(
+                    rnd.randint(1, 12), rnd.randint(1, 28), rnd.randint(0, 23),
+                    rnd.randint(0, 59), rnd.randint(0, 59), rnd.choice(levels),
+                    rnd.choice(services), rnd.choice(statuses), rnd.randint(1, 999)))
+            text = ''.join(chunk)
+            f.write(text)
+            written += len(text)
+            lines += len(chunk)
+    return lines
+
+def timed(fn):
+    t0 = time.perf_counter()
+    rv = fn()
+    return rv, time.perf_counter() - t0
+
+def main(megabytes=1024, sample=2000):
+    df = Dfa(PATTERN)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.log')
+        nlines, t = timed(lambda: write_log(path, megabytes))
+        print('{} lines, {}MB written in {:.1f}s'.format(nlines, megabytes, t))
+
+        with open(path) as f:
+            head = [f.readline() for i in range(sample)]
+        expected, t_re = timed(lambda: sum(1 for line in head
+                                           if re_match(PATTERN, line.rstrip('\n'))))
+        assert df.count(head) == expected
+
+        with open(path) as f:
+            n, t_count = timed(lambda: df.count(f))
+        with open(path) as f:
+            first, t_first = timed(lambda: df.first_index(f))
+        with open(path) as f:
+            n2, t_loop = timed(lambda: sum(1 for line in f if df.matches(line.rstrip('\n'))))
+        assert n2 == n
+
+    t_re_all = t_re * nlines / sample
+    mb = megabytes
+    print('{:>28}: {:9.2f}s {:8.1f}MB/s  {} matches'.format('Dfa.count', t_count, mb / t_count, n))
+    print('{:>28}: {:9.4f}s  line {}'.format('Dfa.first_index', t_first, first))
+    print('{:>28}: {:9.2f}s {:8.1f}MB/s'.format('Dfa.matches loop', t_loop, mb / t_loop))
+    print('{:>28}: {:9.2f}s {:8.3f}MB/s  (from {} lines)'.format(
+        're_match loop, estimated', t_re_all, mb / t_re_all, sample))
+    print('{:>28}: {:9.0f}x'.format('speedup', t_re_all / t_count))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# bench_sparse.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Throughput and peak traced memory of Nfa.matches, FrozenNfa and
+# SparseNfa, on patterns whose Dfa is too big to build.
+#
+#     python -m benchmarks.bench_sparse [chars]
+
+import random
+import sys
+import tracemalloc
+
+from regex import *
+from benchmarks.corpus import best_time
+
+PATTERNS = ['(a|b)*a(a|b){20}', '(a|b)*a(a|b){60}', '((a|b)*(ab|ba){3,6})*b']
+
+def peak_memory(fn):
+    fn()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main(n=20000):
+    rnd = random.Random(1)
+    text = ''.join(rnd.choice('ab') for i in range(n))
+    for rx in PATTERNS:
+        nf = Nfa(rx)
+        print(rx)
+        engines = [('Nfa', nf),
+                   ('FrozenNfa', nf.freeze()),
+                   ('SparseNfa', nf.sparse(optimize=False)),
+                   ('SparseNfa opt', nf.sparse())]
+        want = nf.matches(text)
+        for name, fa in engines:
+            assert fa.matches(text) == want
+            t = best_time(lambda: fa.matches(text), repeat=2)
+            peak = peak_memory(lambda: fa.matches(text))
+            print('  {:>14}: {:10.0f} chars/s  peak {:>10} bytes'.format(name, n / t, peak))
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# bench_threads.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Time match_many across thread counts with frozen Dfas and Nfas.  Only a
+# free-threaded CPython build can run the threads in parallel.
+#
+#     python -m benchmarks.bench_threads [lines] [max threads]
+
+import sys
+
+from regex import *
+from frozen import match_many
+from benchmarks.corpus import random_lines, best_time
+
+PATTERN = '([0-9]{3}-){1,2}[0-9]{4}|[a-f]+[0-9]*'
+
+def gil_enabled():
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+def main(n=200000, max_threads=8):
+    texts = random_lines(n)
+    print('{} lines, GIL {}'.format(n, 'enabled' if gil_enabled() else 'disabled'))
+    for name, fa in [('FrozenDfa', Dfa(PATTERN).freeze()), ('FrozenNfa', Nfa(PATTERN).freeze())]:
+        want = match_many(fa, texts, workers=1)
+        base = None
+        threads = 1
+        while threads <= max_threads:
+            assert match_many(fa, texts, workers=threads) == want
+            t = best_time(lambda: match_many(fa, texts, workers=threads))
+            base = base or t
+            print('{:>10} {:>3} threads: {:8.3f}s {:6.2f}x'.format(name, threads, t, base / t))
+            threads *= 2
+
+if __name__=='__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# corpus.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Patterns and inputs shared by the benchmarks.  Run them from the python
+# directory, e.g.  python -m benchmarks.bench_construction
+
+import random
+import time
+
+# (pattern, inputs) pairs, inputs include matches and near misses
+corpus = [
+    ('abc|def', ['abc', 'def', 'abd']),
+    ('abc(ab|cd*)*def', ['abcdef', 'abccdabcddef', 'abcababcdabceddef']),
+    ('(abc+)+', ['abcccabccabc', 'abcccabccab']),
+    ('[a-z]+|[0-9]+', ['abcdefg', '1234567', '(432)']),
+    ('([0-9]{3}-){2}[0-9]{4}', ['720-303-1234', '720-3031-1234']),
+    ('([0-9]{3,4}-?){3}', ['720-303-1234', '7203031234', '720303a1234']),
+    ('([:digit:]{3}-){1,2}[:digit:]{4}', ['720-303-1234', '303-1234']),
+    ('[:alpha:][:word:]*@[:alnum:]+(.[:alnum:]+)+', ['bob_1@example.com', 'bob@com']),
+    ('(a|b)*a(a|b){5}', ['abababbbab', 'bbbbbbbbbb']),
+    ('(GET|POST|PUT)_/[a-z/]*', ['GET_/index', 'POST_/a/b/c', 'HEAD_/']),
+    ('[:xdigit:]{8}-[:xdigit:]{4}-[:xdigit:]{4}', ['deadbeef-0123-abcd', 'deadbeef-0123']),
+    ('(x[0-9]{1,3}y)*', ['x1yx22yx333y', 'x1234y']),
+]
+
+def patterns():
+    return [rx for rx, ins in corpus]
+
+# n random lines from alphabet, of length between lo and hi
+def random_lines(n, alphabet='abcdef0123456789-', lo=5, hi=40, seed=1):
+    rnd = random.Random(seed)
+    return [''.join(rnd.choice(alphabet) for i in range(rnd.randint(lo, hi)))
+            for j in range(n)]
+
+# Best of repeat runs of fn, in seconds
+def best_time(fn, repeat=3):
+    best = None
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t = time.perf_counter() - t0
+        if best is None or t < best:
+            best = t
+    return best
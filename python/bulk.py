@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# bulk.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Compile many patterns at once on a process pool.
+#
+# Each worker parses a pattern, builds its Dfa and sends back
+# Dfa.to_bytes, which is much smaller and quicker to move between
+# processes than a pickled Dfa.  A pattern that fails to compile gets an
+# error message instead of data, and the rest of the batch carries on.
+# Every result records how long its pattern took to compile, so slow rules
+# can be found with
+#     sorted(results, key=lambda r: r.seconds)[-10:]
+
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import regex
+
+class CompileResult(namedtuple('CompileResult', 'index, pattern, data, error, seconds')):
+    __slots__ = ()
+
+    def ok(self):
+        return self.error is None
+
+    # The compiled Dfa, or None if the pattern failed
+    def dfa(self):
+        if self.data is None:
+            return None
+        return regex.Dfa.from_bytes(self.data)
+
+def compile_one(job):
+    index, rx, budget, optimize, method, ignorecase = job
+    t0 = time.perf_counter()
+    try:
+        if budget:
+            budget = budget.started()
+            budget.check('parse', pattern_length=len(rx))
+        pt = regex.parse_regex(rx)
+        if pt is None:
+            raise Exception('Could not parse {!r}'.format(rx))
+        data = regex.compile_dfa(pt, budget, optimize, method, ignorecase).to_bytes()
+        error = None
+    except Exception as e:
+        data = None
+        error = '{}: {}'.format(type(e).__name__, e)
+    return CompileResult(index, rx, data, error, time.perf_counter() - t0)
+
+# Compile patterns on workers processes, or in this process if workers is
+# 1.  Returns a CompileResult per pattern, in the order of patterns.
+def compile_many(patterns, workers=None, budget=None, optimize=False,
+                 method='thompson', ignorecase=False, chunksize=1):
+    if method not in regex.dfa_methods:
+        raise Exception('Unknown Dfa method {}'.format(method))
+    jobs = [(i, rx, budget, optimize, method, ignorecase)
+            for i, rx in enumerate(patterns)]
+    if workers == 1:
+        return [compile_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(compile_one, jobs, chunksize=chunksize))
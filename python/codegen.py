@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+# codegen.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Generate matcher source code from a Dfa, in the spirit of to_dot.
+#
+# to_python writes one function that finds the current state with a
+# binary search of if/else tests and then runs that state's if/elif chain.
+# The characters leading to each target are tested as code point ranges,
+# and the state lives in a local variable.  Transitions into dead states
+# become an early return False.  specialize compiles that source with
+# compile() and exec, caching it in memory and optionally on disk by Dfa
+# hash.  The source starts and ends with a comment naming the hash, and a
+# file on disk without both, or that doesn't compile, is regenerated.
+#
+# to_c writes the same matcher as a self-contained C file working on
+# arrays of code points.  Built with -DDFA_MAIN it also gets a main() that
+# prints the lines of stdin (UTF-8) the Dfa matches.
+
+import hashlib
+import os
+import tempfile
+
+# Bump when the generated code changes so stale disk cache files are ignored
+CODEGEN_VERSION = 1
+
+_compiled = dict()
+
+def dfa_hash(dfa):
+    h = hashlib.sha256()
+    h.update(repr((CODEGEN_VERSION, dfa.start, sorted(dfa.accepting))).encode('utf-8'))
+    for st in sorted(dfa.transitions):
+        row = dfa.transitions[st]
+        h.update(repr((st, sorted(row.items()))).encode('utf-8'))
+    return h.hexdigest()
+
+# Sorted (first, last) code point ranges covering chars
+def char_ranges(chars):
+    rv = []
+    for cp in sorted(ord(c) for c in chars):
+        if rv and rv[-1][1] == cp - 1:
+            rv[-1][1] = cp
+        else:
+            rv.append([cp, cp])
+    return [tuple(r) for r in rv]
+
+# Every live state with its edges grouped by target.  States without a
+# row of transitions get an empty list.
+def live_rows(dfa):
+    dead = dfa.dead_states()
+    states = set(dfa.transitions).union(dfa.accepting)
+    states.add(dfa.start)
+    for row in dfa.transitions.values():
+        states.update(row.values())
+
+    rows = []
+    for st in sorted(states - dead):
+        by_target = dict()
+        for ch, ns in dfa.transitions.get(st, {}).items():
+            if ns not in dead:
+                by_target.setdefault(ns, []).append(ch)
+        rows.append((st, [(ns, char_ranges(by_target[ns])) for ns in sorted(by_target)]))
+    return rows
+
+def py_test(ranges):
+    tests = []
+    for lo, hi in ranges:
+        if lo == hi:
+            tests.append('c == {!r}'.format(chr(lo)))
+        else:
+            tests.append('{!r} <= c <= {!r}'.format(chr(lo), chr(hi)))
+    return ' or '.join(tests)
+
+# Emit the per-state blocks of rows as a binary search on state, so
+# dispatch costs log2(states) comparisons instead of a linear elif chain
+def py_dispatch(rows, indent, lines):
+    pad = ' ' * indent
+    if len(rows) == 1:
+        st, targets = rows[0]
+        kw = 'if'
+        for ns, ranges in targets:
+            lines.append('{}{} {}:'.format(pad, kw, py_test(ranges)))
+            lines.append('{}    state = {}'.format(pad, ns))
+            kw = 'elif'
+        if kw == 'if':
+            lines.append('{}return False'.format(pad))
+        else:
+            lines.append('{}else:'.format(pad))
+            lines.append('{}    return False'.format(pad))
+        return
+    mid = len(rows) // 2
+    lines.append('{}if state < {}:'.format(pad, rows[mid][0]))
+    py_dispatch(rows[:mid], indent + 4, lines)
+    lines.append('{}else:'.format(pad))
+    py_dispatch(rows[mid:], indent + 4, lines)
+
+def check_plain(dfa):
+    if dfa.ignorecase or dfa.categories:
+        raise Exception('Generated matchers do not support ignorecase or category classes')
+
+def to_python(dfa, name='match'):
+    check_plain(dfa)
+    dead = dfa.dead_states()
+    accepting = sorted(st for st in dfa.accepting if st not in dead)
+
+    lines = ['# Generated from Dfa {}'.format(dfa_hash(dfa)),
+             'def {}(s):'.format(name)]
+    if dfa.start in dead:
+        lines.append('    return False')
+        lines.append('# End of Dfa {}'.format(dfa_hash(dfa)))
+        return '\n'.join(lines) + '\n'
+
+    lines += ['    state = {}'.format(dfa.start),
+              '    for c in s:']
+    py_dispatch(live_rows(dfa), 8, lines)
+    lines.append('    return state in {}'.format(set(accepting) if accepting else '()'))
+    lines.append('# End of Dfa {}'.format(dfa_hash(dfa)))
+    return '\n'.join(lines) + '\n'
+
+# Write text or bytes to path so that readers see either the old file or
+# the whole new one
+def write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        if isinstance(data, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+# The compiled code in filename if it is a whole matcher for the Dfa with
+# hash key, otherwise None
+def load_source(filename, key):
+    try:
+        with open(filename, encoding='utf-8') as f:
+            src = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    lines = src.splitlines()
+    if (len(lines) < 2 or lines[0] != '# Generated from Dfa {}'.format(key) or
+            lines[-1] != '# End of Dfa {}'.format(key)):
+        return None
+    try:
+        return compile(src, filename, 'exec')
+    except (SyntaxError, ValueError):
+        return None
+
+# Return a compiled matching function for dfa
+def specialize(dfa, cache_dir=None):
+    key = dfa_hash(dfa)
+    fn = _compiled.get(key)
+    if fn is not None:
+        return fn
+
+    code = None
+    filename = '<dfa {}>'.format(key)
+    if cache_dir:
+        filename = os.path.join(cache_dir, 'dfa_{}.py'.format(key))
+        code = load_source(filename, key)
+    if code is None:
+        src = to_python(dfa)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            write_atomic(filename, src)
+        code = compile(src, filename, 'exec')
+
+    namespace = dict()
+    exec(code, namespace)
+    fn = namespace['match']
+    _compiled[key] = fn
+    return fn
+
+def c_test(ranges):
+    tests = []
+    for lo, hi in ranges:
+        if lo == hi:
+            tests.append('c == {}'.format(lo))
+        else:
+            tests.append('(c >= {} && c <= {})'.format(lo, hi))
+    return ' || '.join(tests)
+
+c_main = '''
+#ifdef DFA_MAIN
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/types.h>
+
+/* Decode UTF-8 from in into out, returning the number of code points */
+static size_t decode_utf8(const unsigned char *in, size_t n, uint32_t *out)
+{
+    size_t i = 0, k = 0;
+    while (i < n) {
+        unsigned char b = in[i];
+        int extra = b >= 0xF0 ? 3 : b >= 0xE0 ? 2 : b >= 0xC0 ? 1 : 0;
+        uint32_t c = extra == 3 ? (b & 0x07) : extra == 2 ? (b & 0x0F) :
+                     extra == 1 ? (b & 0x1F) : b;
+        i++;
+        while (extra-- > 0 && i < n)
+            c = (c << 6) | (in[i++] & 0x3F);
+        out[k++] = c;
+    }
+    return k;
+}
+
+int main(void)
+{
+    char *line = NULL;
+    size_t cap = 0;
+    ssize_t len;
+    uint32_t *cps = NULL;
+    size_t cps_cap = 0;
+
+    while ((len = getline(&line, &cap, stdin)) != -1) {
+        size_t n = (size_t)len;
+        while (n > 0 && (line[n-1] == '\\n' || line[n-1] == '\\r'))
+            n--;
+        if (n + 1 > cps_cap) {
+            cps_cap = n + 1;
+            cps = realloc(cps, cps_cap * sizeof(uint32_t));
+            if (!cps)
+                return 2;
+        }
+        if (NAME(cps, decode_utf8((const unsigned char *)line, n, cps)))
+            fwrite(line, 1, (size_t)len, stdout);
+    }
+    free(line);
+    free(cps);
+    return 0;
+}
+#endif
+'''
+
+def to_c(dfa, name='match'):
+    check_plain(dfa)
+    dead = dfa.dead_states()
+    accepting = sorted(st for st in dfa.accepting if st not in dead)
+
+    lines = ['/* Generated from Dfa {} */'.format(dfa_hash(dfa)),
+             '#include <stddef.h>',
+             '#include <stdint.h>',
+             '',
+             'int {}(const uint32_t *s, size_t n)'.format(name),
+             '{']
+    if dfa.start in dead:
+        lines += ['    (void)s;', '    (void)n;', '    return 0;', '}']
+    else:
+        lines += ['    int state = {};'.format(dfa.start),
+                  '    for (size_t i = 0; i < n; i++) {',
+                  '        uint32_t c = s[i];',
+                  '        switch (state) {']
+        for st, targets in live_rows(dfa):
+            lines.append('        case {}:'.format(st))
+            kw = 'if'
+            for ns, ranges in targets:
+                lines.append('            {} ({}) state = {};'.format(kw, c_test(ranges), ns))
+                kw = 'else if'
+            lines.append('            {}return 0;'.format('else ' if kw != 'if' else ''))
+            lines.append('            break;')
+        lines += ['        default:',
+                  '            return 0;',
+                  '        }',
+                  '    }']
+        if accepting:
+            lines.append('    return {};'.format(' || '.join('state == {}'.format(st) for st in accepting)))
+        else:
+            lines.append('    return 0;')
+        lines.append('}')
+    return '\n'.join(lines) + '\n' + c_main.replace('NAME', name)
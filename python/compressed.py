@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# compressed.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Dfa transition tables compressed with the base/next/check scheme from
+# section 3.9.8 of the Dragon book.
+#
+# Characters are mapped to column numbers.  Each state gets a default
+# target, the one most of its row goes to, which for most states is the
+# dead state.  Only the entries that differ from the default are stored.
+# They are packed into the shared next/check arrays by first fit, with
+# state s's entries starting at base[s]:
+#
+#     next_state(s, col) = next[base[s]+col]  if check[base[s]+col] == s
+#                          default[s]         otherwise
+#
+# The book's default[] names a state whose row is consulted in turn; here
+# it is the target itself, which is all that's needed to squeeze out the
+# rows of dead state transitions.  A target of -1 means no transition.
+
+from array import array
+
+from regex import charge_memory, deep_sizeof, memory_breakdown
+
+class CompressedDfa(object):
+    def __init__(self, dfa):
+        ids = dict((st, i) for i, st in enumerate(sorted(dfa.transitions)))
+        for st in [dfa.start] + sorted(dfa.accepting):
+            if st not in ids:
+                ids[st] = len(ids)
+        for row in dfa.transitions.values():
+            for ns in row.values():
+                if ns not in ids:
+                    ids[ns] = len(ids)
+
+        alphabet = set()
+        for row in dfa.transitions.values():
+            alphabet.update(row)
+        self.columns = dict((ch, i) for i, ch in enumerate(sorted(alphabet)))
+        ncols = len(self.columns)
+
+        nstates = len(ids)
+        self.start = ids[dfa.start]
+        self.accepting = bytearray(nstates)
+        for st in dfa.accepting:
+            self.accepting[ids[st]] = 1
+
+        self.default = array('i', [-1] * nstates)
+        entries = [[] for i in range(nstates)]
+        for st, row in dfa.transitions.items():
+            s = ids[st]
+            targets = [ids[row[ch]] if ch in row else -1 for ch in sorted(alphabet)]
+            counts = dict()
+            for t in targets:
+                counts[t] = counts.get(t, 0) + 1
+            deflt = max(sorted(counts), key=lambda t: counts[t])
+            self.default[s] = deflt
+            entries[s] = [(col, t) for col, t in enumerate(targets) if t != deflt]
+
+        # Pack the densest rows first, each at the lowest base that fits.
+        # No row can start before the first free slot.
+        self.base = array('i', [0] * nstates)
+        self.next = array('i')
+        self.check = array('i')
+        first_free = 0
+        for s in sorted(range(nstates), key=lambda s: -len(entries[s])):
+            if not entries[s]:
+                continue
+            b = max(0, first_free - entries[s][0][0])
+            while not all(b + col >= len(self.check) or self.check[b + col] == -1
+                          for col, t in entries[s]):
+                b += 1
+            top = b + max(col for col, t in entries[s]) + 1
+            if top > len(self.check):
+                self.next.extend([-1] * (top - len(self.check)))
+                self.check.extend([-1] * (top - len(self.check)))
+            self.base[s] = b
+            for col, t in entries[s]:
+                self.next[b + col] = t
+                self.check[b + col] = s
+            while first_free < len(self.check) and self.check[first_free] != -1:
+                first_free += 1
+
+        self.state_count = nstates
+        self.column_count = ncols
+        # Input is mapped to symbols first when ignoring case or matching
+        # categories
+        self.classes = dfa.classes if dfa.ignorecase or dfa.categories else None
+        charge_memory(self, 'compress')
+
+    def next_state(self, s, col):
+        i = self.base[s] + col
+        if i < len(self.check) and self.check[i] == s:
+            return self.next[i]
+        return self.default[s]
+
+    def matches(self, ins):
+        columns = self.columns
+        base = self.base
+        nxt = self.next
+        check = self.check
+        default = self.default
+        size = len(check)
+
+        if self.classes is not None:
+            ins = map(self.classes.__getitem__, ins)
+        s = self.start
+        for c in ins:
+            col = columns.get(c)
+            if col is None:
+                return False
+            i = base[s] + col
+            if i < size and check[i] == s:
+                s = nxt[i]
+            else:
+                s = default[s]
+            if s < 0:
+                return False
+        return self.accepting[s] == 1
+
+    def table_bytes(self):
+        return sum(a.itemsize * len(a) for a in
+                   (self.base, self.default, self.next, self.check)) + len(self.accepting)
+
+    # Bytes by component, see Dfa.memory_report.  The tables are arrays,
+    # whose sys.getsizeof is exact.
+    def memory_report(self):
+        return memory_breakdown([
+            ('symbols', list(self.columns)),
+            ('transitions', [self.columns, self.base, self.default, self.next, self.check]),
+            ('accepting', [self.accepting]),
+            ('caches', [self.classes, self.classes and self.classes.alphabet])])
+
+    # Bytes per state of the compressed tables next to the dict of dicts
+    # in dfa.transitions and a dense state x alphabet table of ints
+    def size_report(self, dfa):
+        nstates = max(self.state_count, 1)
+        compressed = self.table_bytes() + deep_sizeof(self.columns)
+        dicts = deep_sizeof(dfa.transitions) + deep_sizeof(dfa.accepting)
+        dense = self.state_count * self.column_count * self.next.itemsize
+        return {'states': self.state_count,
+                'columns': self.column_count,
+                'entries': len(self.check),
+                'compressed_bytes': compressed,
+                'dict_bytes': dicts,
+                'dense_bytes': dense,
+                'compressed_per_state': compressed / nstates,
+                'dict_per_state': dicts / nstates,
+                'dense_per_state': dense / nstates}
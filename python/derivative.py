@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+# derivative.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Matching with Brzozowski derivatives.
+#
+# The derivative of a regular expression r with respect to a character c
+# matches the rest of every string in r that starts with c.  A string
+# matches r if the derivative by all of its characters is nullable.
+#
+# A ParseTree is converted into Terms, which are hash-consed: building a
+# Term that already exists returns the existing object, so equality is
+# identity and hashing is cheap.  The table only holds weak references,
+# like ParseTree's, so Terms go away with the patterns and matchers that
+# use them.  The constructors normalize as they go
+# (alternation is flattened, deduplicated and unordered, concatenation is
+# right associated, and the empty set and empty string are simplified
+# away), which keeps the number of distinct derivatives finite.
+#
+# Counted repetition is a Term of its own, so r{m,n} is never unrolled:
+#     d(r{m,n}) = d(r) r{max(m-1,0),n-1}
+#
+# Each distinct derivative is one Dfa state.  DerivativeMatcher builds
+# states on demand as input is matched, and to_dfa builds all of them.
+
+import time
+import weakref
+
+import regex
+
+class Term(object):
+    __slots__ = ('kind', 'args', 'nullable', 'derivs', '__weakref__')
+
+    def __repr__(self):
+        return to_str(self)
+
+_terms = weakref.WeakValueDictionary()
+
+def make(kind, args, nullable):
+    key = (kind, args)
+    t = _terms.get(key)
+    if t is None:
+        t = Term()
+        t.kind = kind
+        t.args = args
+        t.nullable = nullable
+        t.derivs = dict()
+        _terms[key] = t
+    return t
+
+EMPTY = make('empty', (), False)
+EPS = make('eps', (), True)
+
+def char_set(chars):
+    if not chars:
+        return EMPTY
+    return make('set', frozenset(chars), False)
+
+def cat(a, b):
+    if a is EMPTY or b is EMPTY:
+        return EMPTY
+    if a is EPS:
+        return b
+    if b is EPS:
+        return a
+    if a.kind == 'cat':
+        return cat(a.args[0], cat(a.args[1], b))
+    return make('cat', (a, b), a.nullable and b.nullable)
+
+def alt(terms):
+    items = set()
+    for t in terms:
+        if t.kind == 'alt':
+            items.update(t.args)
+        elif t is not EMPTY:
+            items.add(t)
+    if not items:
+        return EMPTY
+    if len(items) == 1:
+        return items.pop()
+    items = frozenset(items)
+    return make('alt', items, any(t.nullable for t in items))
+
+def star(a):
+    if a is EMPTY or a is EPS:
+        return EPS
+    if a.kind == 'star':
+        return a
+    return make('star', (a,), True)
+
+def rep(a, lo, hi):
+    if hi == 0 or a is EPS:
+        return EPS
+    if a is EMPTY:
+        return EPS if lo == 0 else EMPTY
+    if lo == 1 and hi == 1:
+        return a
+    return make('rep', (a, lo, hi), lo == 0 or a.nullable)
+
+# Terms are memoized on the ParseTree node, so a subtree shared between
+# patterns is only converted once
+def from_tree(pt):
+    return pt.memo('derivative', lambda: build_term(pt))
+
+def build_term(pt):
+    if isinstance(pt, regex.PTCharSet):
+        return char_set(pt.cset) if pt.cset else EPS
+    if isinstance(pt, regex.PTConcatenation):
+        return cat(from_tree(pt.left), from_tree(pt.right))
+    if isinstance(pt, regex.PTAlternation):
+        return alt([from_tree(pt.left), from_tree(pt.right)])
+    if isinstance(pt, regex.PTClosure):
+        return star(from_tree(pt.child))
+    if isinstance(pt, regex.PTCount):
+        return rep(from_tree(pt.child), pt.cmin, pt.cmax)
+    raise Exception('Unknown ParseTree node {}'.format(pt))
+
+def to_str(t):
+    if t is EMPTY:
+        return '[]'
+    if t is EPS:
+        return '()'
+    if t.kind == 'set':
+        return ''.join(t.args) if len(t.args) == 1 else '[{}]'.format(''.join(sorted(t.args)))
+    if t.kind == 'cat':
+        return to_str(t.args[0]) + to_str(t.args[1])
+    if t.kind == 'alt':
+        return '|'.join(sorted('({})'.format(to_str(a)) for a in t.args))
+    if t.kind == 'star':
+        return '({})*'.format(to_str(t.args[0]))
+    a, lo, hi = t.args
+    return '({}){{{},{}}}'.format(to_str(a), lo, hi)
+
+def derivative(t, c):
+    d = t.derivs.get(c)
+    if d is not None:
+        return d
+
+    kind = t.kind
+    if kind == 'empty' or kind == 'eps':
+        d = EMPTY
+    elif kind == 'set':
+        d = EPS if any(k in t.args for k in regex.symbol_keys(c)) else EMPTY
+    elif kind == 'cat':
+        a, b = t.args
+        d = cat(derivative(a, c), b)
+        if a.nullable:
+            d = alt([d, derivative(b, c)])
+    elif kind == 'alt':
+        d = alt([derivative(a, c) for a in t.args])
+    elif kind == 'star':
+        d = cat(derivative(t.args[0], c), t)
+    else:
+        a, lo, hi = t.args
+        d = cat(derivative(a, c), rep(a, max(lo-1, 0), hi-1))
+
+    t.derivs[c] = d
+    return d
+
+def leaf_sets(t, seen=None, out=None):
+    if seen is None:
+        seen = set()
+        out = []
+    todo = [t]
+    while todo:
+        t = todo.pop()
+        if id(t) in seen:
+            continue
+        seen.add(id(t))
+        if t.kind == 'set':
+            out.append(t.args)
+        elif t.kind in ('cat', 'alt'):
+            todo.extend(t.args)
+        elif t.kind in ('star', 'rep'):
+            todo.append(t.args[0])
+    return out
+
+# Map every character of t's alphabet to a representative of its class.
+# Characters in exactly the same sets have the same derivatives.
+def char_classes(t):
+    sets = leaf_sets(t)
+    sig = dict()
+    for i, chars in enumerate(sets):
+        for c in chars:
+            sig.setdefault(c, []).append(i)
+    # A literal character is also in the sets holding its category
+    with_categories = [i for i, chars in enumerate(sets)
+                       if any(regex.is_category(c) for c in chars)]
+    if with_categories:
+        for c, ids in sig.items():
+            if not regex.is_category(c):
+                cat = regex.category_symbol(c)
+                ids.extend(i for i in with_categories if cat in sets[i] and i not in ids)
+                ids.sort()
+    reps = dict()
+    rv = dict()
+    for c in sorted(sig):
+        rv[c] = reps.setdefault(tuple(sig[c]), c)
+    return rv
+
+# A Dfa built lazily from derivatives as input is matched
+class DerivativeMatcher(object):
+    def __init__(self, rx):
+        if isinstance(rx, Term):
+            self.start = rx
+        else:
+            pt = rx if isinstance(rx, regex.ParseTree) else regex.parse_regex(rx)
+            self.start = from_tree(pt)
+        self.classes = char_classes(self.start)
+        self.terms = [self.start]
+        self.ids = {self.start: 0}
+        self.rows = [dict()]
+
+    def state_id(self, t):
+        sid = self.ids.get(t)
+        if sid is None:
+            sid = len(self.terms)
+            self.ids[t] = sid
+            self.terms.append(t)
+            self.rows.append(dict())
+        return sid
+
+    # Transition from state sid on c, None if c isn't in the alphabet
+    def step(self, sid, c):
+        ns = self.rows[sid].get(c)
+        if ns is None:
+            rep_c = self.classes.get(c)
+            if rep_c is None and len(c) == 1:
+                rep_c = self.classes.get(regex.category_symbol(c))
+            if rep_c is None:
+                return None
+            ns = self.state_id(derivative(self.terms[sid], rep_c))
+            self.rows[sid][c] = ns
+        return ns
+
+    def matches(self, ins):
+        rows = self.rows
+        sid = 0
+        for c in ins:
+            ns = rows[sid].get(c)
+            if ns is None:
+                ns = self.step(sid, c)
+                if ns is None:
+                    return False
+            sid = ns
+            if self.terms[sid] is EMPTY:
+                return False
+        return self.terms[sid].nullable
+
+    # Explore every state and return the complete Dfa
+    def to_dfa(self, budget=None):
+        stats = regex.get_stats()
+        if stats:
+            t0 = time.perf_counter()
+        if budget:
+            budget = budget.started()
+
+        alphabet = sorted(self.classes)
+        df = regex.Dfa()
+        sid = 0
+        while sid < len(self.terms):
+            if self.terms[sid].nullable:
+                df.addAcceptState(sid)
+            for c in alphabet:
+                before = len(self.terms)
+                df.addTransition(regex.Transition(sid, c, self.step(sid, c)))
+                if budget and len(self.terms) > before:
+                    budget.check('derivative', dfa_states=len(self.terms),
+                                 dfa_edges=sid*len(alphabet))
+            sid += 1
+
+        if stats:
+            stats.add_time('derivative', time.perf_counter() - t0)
+            stats.count('dfa_states', len(self.terms))
+        regex.charge_memory(df, 'derivative')
+        return df
+
+def to_dfa(pt, budget=None):
+    return DerivativeMatcher(pt).to_dfa(budget)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+# disk_cache.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# A directory of compiled Dfas shared between processes.
+#
+# Each entry is one file holding Dfa.to_bytes, named by a hash of the
+# pattern, the library version and the compile options, so entries from
+# another version are never looked up.  Files are written to a temporary
+# name and renamed into place, so concurrent readers and writers only ever
+# see whole entries.  Loading an entry updates its modification time, and
+# once the directory grows past max_bytes the least recently used entries
+# are removed.  An entry that fails to load is deleted and recompiled.
+
+import hashlib
+import os
+import time
+
+import codegen
+import regex
+
+SUFFIX = '.dfa'
+
+# Temporary files older than this were left by a writer that died
+STALE_SECONDS = 3600
+
+def cache_key(rx, optimize=False, method='thompson', ignorecase=False):
+    options = (regex.__version__, regex.DFA_FORMAT, rx, bool(optimize), method,
+               bool(ignorecase))
+    return hashlib.sha256(repr(options).encode('utf-8')).hexdigest()
+
+class DiskCache(object):
+    def __init__(self, directory, max_bytes=64 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Bytes in the directory as of the last scan plus what this process
+        # wrote since, None until the first scan
+        self.size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    # The cached Dfa for key, or None
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            dfa = regex.Dfa.from_bytes(data)
+        except Exception:
+            self.discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return dfa
+
+    def store(self, key, dfa):
+        data = dfa.to_bytes()
+        codegen.write_atomic(self.path(key), data)
+        if self.size is None:
+            self.evict()
+        else:
+            self.size += len(data)
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def discard(self, path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    # Remove the least recently used entries until the directory fits in
+    # max_bytes.  Other processes may be removing the same files.
+    def evict(self):
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith('.tmp'):
+                if now - st.st_mtime > STALE_SECONDS:
+                    self.discard(path)
+            elif name.endswith(SUFFIX):
+                entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+        self.size = total
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                self.discard(os.path.join(self.directory, name))
+        self.size = 0
+
+    # Load the Dfa for rx, compiling and storing it on a miss.  A hit is
+    # held to the same budget as a compile, so it raises BudgetExceeded
+    # when the cached Dfa is bigger than budget allows.
+    def get_dfa(self, rx, budget=None, optimize=False, method='thompson',
+                ignorecase=False):
+        stats = regex.get_stats()
+        key = cache_key(rx, optimize, method, ignorecase)
+        dfa = self.load(key)
+        if dfa is not None:
+            if stats:
+                stats.count('disk_cache_hits')
+            if budget:
+                states = set(dfa.transitions).union(dfa.accepting, [dfa.start])
+                budget.started().check('load', pattern_length=len(rx),
+                                       dfa_states=len(states),
+                                       dfa_edges=sum(map(len, dfa.transitions.values())))
+            return dfa
+        if stats:
+            stats.count('disk_cache_misses')
+        dfa = regex.compile_dfa(rx, budget, optimize, method, ignorecase)
+        self.store(key, dfa)
+        return dfa
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# export.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Write Nfas and Dfas to file objects one edge at a time, as DOT, JSON or
+# a compact edge list.
+#
+# Every writer takes the same options:
+#     collapse     merge the edges between two states into one edge whose
+#                  label is a character class such as [0-9a-f]
+#     around, max_states
+#                  only write the max_states states nearest to state
+#                  around, following edges in either direction, and the
+#                  edges between them
+#
+# to_dot on Dfa and Nfa is write_dot into a string.
+
+import json
+
+import frozen
+import regex
+from codegen import char_ranges
+
+def is_nfa(fa):
+    return isinstance(fa, (regex.Nfa, frozen.FrozenNfa))
+
+# (state, symbol, target) in the order to_dot has always used
+def raw_edges(fa):
+    nfa = is_nfa(fa)
+    for st in sorted(fa.transitions):
+        row = fa.transitions[st]
+        for ch in sorted(row):
+            if nfa:
+                for ns in sorted(row[ch]):
+                    yield (st, ch, ns)
+            else:
+                yield (st, ch, row[ch])
+
+def class_label(symbols):
+    chars = [s for s in symbols if len(s) == 1]
+    others = sorted(s for s in symbols if len(s) != 1)
+    if len(chars) == 1 and not others:
+        return chars[0]
+    parts = []
+    for lo, hi in char_ranges(chars):
+        lo, hi = chr(lo), chr(hi)
+        lo, hi = [c if c not in '-]\\' else '\\' + c for c in (lo, hi)]
+        if lo == hi:
+            parts.append(lo)
+        elif ord(hi[-1]) == ord(lo[-1]) + 1:
+            parts.append(lo + hi)
+        else:
+            parts.append(lo + '-' + hi)
+    return '[{}]'.format(''.join(parts + others))
+
+# (state, label, target) with the edges from each state to the same target
+# merged.  Epsilon edges are kept apart.
+def collapsed_edges(fa):
+    nfa = is_nfa(fa)
+    for st in sorted(fa.transitions):
+        by_target = dict()
+        for ch, tgts in fa.transitions[st].items():
+            if ch == '_eps':
+                continue
+            for ns in (tgts if nfa else (tgts,)):
+                by_target.setdefault(ns, []).append(ch)
+        if nfa:
+            for ns in sorted(fa.transitions[st].get('_eps', ())):
+                yield (st, '_eps', ns)
+        for ns in sorted(by_target):
+            yield (st, class_label(by_target[ns]), ns)
+
+# The max_states states closest to around, counting edges either way
+def neighborhood(fa, around, max_states):
+    nfa = is_nfa(fa)
+    adjacent = dict()
+    for st, row in fa.transitions.items():
+        for tgts in row.values():
+            for ns in (tgts if nfa else (tgts,)):
+                adjacent.setdefault(st, set()).add(ns)
+                adjacent.setdefault(ns, set()).add(st)
+
+    keep = {around}
+    order = [around]
+    for st in order:
+        if len(keep) >= max_states:
+            break
+        for ns in sorted(adjacent.get(st, ())):
+            if ns not in keep and len(keep) < max_states:
+                keep.add(ns)
+                order.append(ns)
+    return keep
+
+# Edges and accepting states to write, as described at the top of the file
+def select(fa, collapse=False, around=None, max_states=None):
+    edges = collapsed_edges(fa) if collapse else raw_edges(fa)
+    accepting = sorted(fa.accepting)
+    keep = None
+    if max_states is not None:
+        keep = neighborhood(fa, fa.start if around is None else around, max_states)
+        edges = ((st, ch, ns) for st, ch, ns in edges if st in keep and ns in keep)
+        accepting = [st for st in accepting if st in keep]
+    return (edges, accepting, keep)
+
+def dot_label(ch):
+    if ch == '_eps':
+        return '&epsilon;'
+    return ch.replace('\\', '\\\\').replace('"', '\\"')
+
+def write_dot(fa, f, collapse=False, around=None, max_states=None):
+    edges, accepting, keep = select(fa, collapse, around, max_states)
+    f.write('digraph { rankdir = LR;')
+    for st, ch, ns in edges:
+        f.write(' "{}" -> "{}" [label="{}"];'.format(st, ns, dot_label(ch)))
+    for st in accepting:
+        f.write(' {} [shape=doublecircle];'.format(st))
+    f.write(' node [shape=plaintext label=""];')
+    if keep is None or fa.start in keep:
+        f.write(' nothing->"{}";'.format(fa.start))
+    f.write(' }')
+
+# {"type": "nfa", "start": 0, "accepting": [2],
+#  "edges": [[0, "a", 1], [1, "_eps", 2], ...]}
+def write_json(fa, f, collapse=False, around=None, max_states=None):
+    edges, accepting, keep = select(fa, collapse, around, max_states)
+    f.write('{{"type": "{}", "start": {}, "accepting": {}, "edges": ['.format(
+        'nfa' if is_nfa(fa) else 'dfa', json.dumps(fa.start), json.dumps(accepting)))
+    sep = ''
+    for edge in edges:
+        f.write(sep)
+        f.write(json.dumps(edge))
+        sep = ', '
+    f.write(']}\n')
+
+short_escapes = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+
+def escape_label(label):
+    if label.isprintable() and '\\' not in label:
+        return label
+    return ''.join(short_escapes.get(c) or (c if c.isprintable() else '\\x{:02x}'.format(ord(c)))
+                   for c in label)
+
+# A header line, then one tab separated line per edge:
+#     dfa start=0 accepting=2,3
+#     0	1	a
+# Backslashes and unprintable characters in labels are escaped as \t, \n,
+# \r or \xNN, so every edge is one line.
+def write_edges(fa, f, collapse=False, around=None, max_states=None):
+    edges, accepting, keep = select(fa, collapse, around, max_states)
+    f.write('{} start={} accepting={}\n'.format('nfa' if is_nfa(fa) else 'dfa', fa.start,
+                                                ','.join(str(st) for st in accepting)))
+    for st, ch, ns in edges:
+        f.write('{}\t{}\t{}\n'.format(st, ns, escape_label(ch)))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# followpos.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Convert a ParseTree directly into a Dfa, without building an Nfa.
+#
+# This is Algorithm 3.36 from section 3.9.5 of the Dragon book.  Every
+# non-empty PTCharSet is a position.  nullable, firstpos and lastpos are
+# computed bottom up (Figure 3.58) while followpos is filled in from the
+# concatenation and closure rules.  PTCount is unrolled into copies of its
+# child, with the copies past cmin made optional, the same way
+# PTCount.getTransitions does it.
+
+import time
+
+import regex
+
+class Positions(object):
+    def __init__(self, pt):
+        self.chars = []
+        self.follow = []
+        nullable, first, last = self.analyze(pt)
+
+        # The augmented end marker, #, is the last position
+        self.end = self.new_position(set())
+        for p in last:
+            self.follow[p].add(self.end)
+        self.first = first | {self.end} if nullable else first
+
+    def new_position(self, chars):
+        self.chars.append(chars)
+        self.follow.append(set())
+        return len(self.chars) - 1
+
+    def concat(self, left, right):
+        n1, f1, l1 = left
+        n2, f2, l2 = right
+        for p in l1:
+            self.follow[p].update(f2)
+        return (n1 and n2,
+                f1 | f2 if n1 else f1,
+                l1 | l2 if n2 else l2)
+
+    def analyze(self, pt):
+        if isinstance(pt, regex.PTCharSet):
+            if not pt.cset:
+                return (True, frozenset(), frozenset())
+            p = frozenset({self.new_position(set(pt.cset))})
+            return (False, p, p)
+
+        if isinstance(pt, regex.PTConcatenation):
+            return self.concat(self.analyze(pt.left), self.analyze(pt.right))
+
+        if isinstance(pt, regex.PTAlternation):
+            n1, f1, l1 = self.analyze(pt.left)
+            n2, f2, l2 = self.analyze(pt.right)
+            return (n1 or n2, f1 | f2, l1 | l2)
+
+        if isinstance(pt, regex.PTClosure):
+            n, f, l = self.analyze(pt.child)
+            for p in l:
+                self.follow[p].update(f)
+            return (True, f, l)
+
+        if isinstance(pt, regex.PTCount):
+            rv = (True, frozenset(), frozenset())
+            for i in range(pt.cmax):
+                n, f, l = self.analyze(pt.child)
+                if i >= pt.cmin:
+                    n = True
+                rv = self.concat(rv, (n, f, l))
+            return rv
+
+        raise Exception('Unknown ParseTree node {}'.format(pt))
+
+    def alphabet(self):
+        rv = set()
+        for chars in self.chars:
+            rv.update(chars)
+        return rv
+
+    # For each symbol of alphabet, the positions it matches.  A literal
+    # character also matches the positions holding its Unicode category.
+    def matching(self, alphabet):
+        categories = any(regex.is_category(ch) for ch in alphabet)
+        rv = dict()
+        for ch in alphabet:
+            keys = regex.symbol_keys(ch) if categories else (ch,)
+            rv[ch] = frozenset(p for p, chars in enumerate(self.chars)
+                               if any(k in chars for k in keys))
+        return rv
+
+def to_dfa(pt, budget=None):
+    stats = regex.get_stats()
+    if stats:
+        t0 = time.perf_counter()
+    if budget:
+        budget = budget.started()
+
+    pos = Positions(pt)
+    alphabet = pos.alphabet()
+    matching = pos.matching(alphabet)
+    df = regex.Dfa()
+
+    start = frozenset(pos.first)
+    ids = {start: 0}
+    states = [start]
+    members = len(start)
+    for cs, ss in enumerate(states):
+        if pos.end in ss:
+            df.addAcceptState(cs)
+        for ch in alphabet:
+            nss = set()
+            for p in ss.intersection(matching[ch]):
+                nss.update(pos.follow[p])
+            nss = frozenset(nss)
+
+            ns = ids.get(nss)
+            if ns is None:
+                ns = len(states)
+                ids[nss] = ns
+                states.append(nss)
+                members += len(nss)
+                if budget:
+                    budget.check('followpos', nfa_states=len(pos.chars),
+                                 dfa_states=len(states),
+                                 dfa_edges=cs*len(alphabet),
+                                 set_members=members)
+            df.addTransition(regex.Transition(cs, ch, ns))
+
+    if stats:
+        stats.add_time('followpos', time.perf_counter() - t0)
+        stats.count('positions', len(pos.chars))
+        stats.count('dfa_states', len(states))
+    regex.charge_memory(df, 'followpos')
+    return df
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+# frozen.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Immutable automata that any number of threads can match with at once.
+#
+# Dfa.freeze() and Nfa.freeze() copy an automaton into a FrozenDfa or
+# FrozenNfa.  Their tables are built once in the constructor and never
+# changed afterwards, and assigning to their attributes raises.
+#
+# The only state that changes after construction is in caches filled as
+# input is matched: the character to symbol map, the Nfa e-closures and
+# the Nfa's lazily built Dfa states.  No locks are taken for them.  Every
+# entry is a pure function of its key, so two threads that miss at the
+# same time compute the same value, and storing it is a single dict
+# assignment, which is atomic with the GIL and under free-threaded builds
+# alike.  Readers see either no entry or a complete one.
+#
+# match_many splits a list of inputs into chunks and matches them on a
+# ThreadPoolExecutor.  With the GIL it gives no speedup, on free-threaded
+# builds it scales with the number of cores.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+import regex
+
+class Frozen(object):
+    # Weak references let the memory budget release a copy's charge
+    __slots__ = ('__weakref__',)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def init(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def freeze(self):
+        return self
+
+    def classify(self, ins):
+        return map(self.classes.__getitem__, ins)
+
+class FrozenDfa(Frozen):
+    __slots__ = ('start', 'accepting', 'transitions', 'ignorecase', 'categories',
+                 'classes', 'rows', 'dead')
+
+    # There is one read-only copy of the Dfa's rows, also known as rows.
+    # Matching stops as soon as it reaches a dead state.
+    def __init__(self, dfa):
+        rows = MappingProxyType(dict(
+            (st, MappingProxyType(dict(row))) for st, row in dfa.transitions.items()))
+        self.init(start=dfa.start,
+                  accepting=frozenset(dfa.accepting),
+                  transitions=rows,
+                  ignorecase=dfa.ignorecase,
+                  categories=dfa.categories,
+                  classes=regex.SymbolMap(frozenset(dfa.get_alphabet()), dfa.ignorecase),
+                  rows=rows,
+                  dead=frozenset(dfa.dead_states()))
+        regex.charge_memory(self, 'freeze')
+
+    # Bytes by component, see Dfa.memory_report
+    def memory_report(self):
+        return regex.memory_breakdown([
+            ('symbols', regex.symbol_objects(self.rows)),
+            ('transitions', [self.rows, self.dead]),
+            ('accepting', [self.accepting]),
+            ('caches', [self.classes, self.classes.alphabet])])
+
+    def matches(self, ins):
+        if self.ignorecase or self.categories:
+            ins = self.classify(ins)
+        rows = self.rows
+        dead = self.dead
+        curs = self.start
+        empty = MappingProxyType(dict())
+        for c in ins:
+            if curs in dead:
+                return False
+            row = rows.get(curs, empty)
+            if c in row:
+                curs = row[c]
+            else:
+                return False
+        return curs in self.accepting
+
+class FrozenNfa(Frozen):
+    __slots__ = ('start', 'accepting', 'transitions', 'ignorecase', 'categories',
+                 'classes', 'closures', 'moves', 'max_cached', 'initial')
+
+    # Up to max_cached Dfa states are kept in the cache of moves
+    def __init__(self, nfa, max_cached=10000):
+        rows = dict()
+        for st, row in nfa.transitions.items():
+            rows[st] = MappingProxyType(dict((ch, frozenset(tgts)) for ch, tgts in row.items()))
+        self.init(start=nfa.start,
+                  accepting=frozenset(nfa.accepting),
+                  transitions=MappingProxyType(rows),
+                  ignorecase=nfa.ignorecase,
+                  categories=nfa.categories,
+                  classes=regex.SymbolMap(frozenset(nfa.get_alphabet()), nfa.ignorecase),
+                  closures=dict(),
+                  moves=dict(),
+                  max_cached=max_cached)
+        self.init(initial=self.e_closure(nfa.start))
+        regex.charge_memory(self, 'freeze')
+
+    # Bytes by component, see Dfa.memory_report.  The caches hold the
+    # closures and the Dfa states built so far.
+    def memory_report(self):
+        return regex.memory_breakdown([
+            ('symbols', regex.symbol_objects(self.transitions)),
+            ('transitions', [self.transitions]),
+            ('accepting', [self.accepting, self.initial]),
+            ('caches', [self.closures, self.moves, self.classes, self.classes.alphabet])])
+
+    def e_closure(self, st):
+        ss = self.closures.get(st)
+        if ss is None:
+            ss = {st}
+            todo = [st]
+            while todo:
+                for ns in self.transitions.get(todo.pop(), {}).get('_eps', ()):
+                    if ns not in ss:
+                        ss.add(ns)
+                        todo.append(ns)
+            ss = frozenset(ss)
+            self.closures[st] = ss
+        return ss
+
+    def move(self, sts, ch):
+        key = (sts, ch)
+        rv = self.moves.get(key)
+        if rv is None:
+            new_states = set()
+            for st in sts:
+                for ns in self.transitions.get(st, {}).get(ch, ()):
+                    new_states.update(self.e_closure(ns))
+            rv = frozenset(new_states)
+            if len(self.moves) < self.max_cached:
+                self.moves[key] = rv
+        return rv
+
+    def matches(self, ins):
+        if self.ignorecase or self.categories:
+            ins = self.classify(ins)
+        curs = self.initial
+        for c in ins:
+            curs = self.move(curs, c)
+            if not curs:
+                return False
+        return not self.accepting.isdisjoint(curs)
+
+def match_chunk(fa, texts):
+    matches = fa.matches
+    return [matches(t) for t in texts]
+
+# Match every string of texts against fa on workers threads.  Returns a
+# list of booleans in the order of texts.
+def match_many(fa, texts, workers=None, chunksize=None):
+    fa = fa.freeze()
+    texts = list(texts)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(texts) // (workers * 4))
+    chunks = [texts[i:i+chunksize] for i in range(0, len(texts), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        return match_chunk(fa, texts)
+    rv = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(lambda chunk: match_chunk(fa, chunk), chunks):
+            rv.extend(part)
+    return rv
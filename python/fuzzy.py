@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# fuzzy.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Approximate matching: does a string match a pattern with at most k
+# insertions, deletions or substitutions?
+#
+# This is the Wu and Manber extension of bit-parallel matching to edit
+# distance, run over the epsilon free Nfa of BitParallelNfa instead of a
+# single string.  R[k] is the set of states reachable by consuming the
+# input so far with at most k edits, kept as the bits of an int.  For each
+# character c:
+#
+#     R'[0] = step(R[0], c)
+#     R'[k] = step(R[k], c)         c matches an edge
+#           | R[k-1]                c is inserted in the text
+#           | step_any(R[k-1])      c replaces the character of an edge
+#           | step_any(R'[k-1])     an edge is taken without input, deleted
+#
+# where step_any follows every edge whatever its symbol.  Before any input
+# R[k] is R[k-1] and step_any(R[k-1]), for deletions at the start.  Each
+# step is a lookup per byte of states, as in BitParallelNfa, so a
+# character costs O(k) lookups and k grows the work linearly instead of
+# multiplying the automaton the way variant patterns do.
+
+import planner
+
+# The follow masks of every edge, whatever its symbol
+ANY = '_any'
+
+class FuzzyNfa(planner.BitParallelNfa):
+    def __init__(self, nfa):
+        super(FuzzyNfa, self).__init__(nfa)
+        masks = dict()
+        for follow in self.follow.values():
+            for st, mask in follow.items():
+                masks[st] = masks.get(st, 0) | mask
+        self.follow[ANY] = masks
+        self.any_tables = self.table(ANY) if masks else None
+
+    def step(self, cur, tabs):
+        nxt = 0
+        for tab in tabs:
+            if not cur:
+                break
+            nxt |= tab[cur & 255]
+            cur >>= 8
+        return nxt
+
+    def step_any(self, cur):
+        return self.step(cur, self.any_tables) if self.any_tables else 0
+
+    # The fewest edits that make ins match, or None if it takes more than
+    # max_edits
+    def distance(self, ins, max_edits):
+        if self.classes is not None:
+            ins = map(self.classes.__getitem__, ins)
+        step = self.step
+        step_any = self.step_any
+        tables = self.tables
+        rs = [self.start]
+        for k in range(max_edits):
+            rs.append(rs[k] | step_any(rs[k]))
+        for c in ins:
+            tabs = tables.get(c, False)
+            if tabs is False:
+                tabs = self.table(c)
+            prev = rs[0]
+            r = step(prev, tabs) if tabs else 0
+            rs[0] = r
+            for k in range(1, max_edits + 1):
+                old = rs[k]
+                r = (step(old, tabs) if tabs else 0) | prev | step_any(prev | r)
+                prev = old
+                rs[k] = r
+            if not r:
+                return None
+        for k, r in enumerate(rs):
+            if r & self.accept:
+                return k
+        return None
+
+    def fuzzy_matches(self, ins, max_edits=1):
+        return self.distance(ins, max_edits) is not None
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+# grep.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Print the lines of files that match one of the patterns, like grep -Ex.
+#
+#     python -m regex [options] PATTERN [FILE...]
+#     python -m regex [options] -e PATTERN [-e PATTERN...] [FILE...]
+#
+# Patterns match whole lines, as everywhere else here, and a line ending in
+# '\r\n' matches without its '\r'.  Several patterns are joined into one
+# alternation and compiled once, with the engine planner.py picks for the
+# total input size unless --engine names one.
+#
+# Regular files are mapped with mmap and cut into blocks of about
+# BLOCK_SIZE bytes that end at a newline, each a memoryview of the map;
+# pipes and stdin are read in blocks of the same size.  Each block is
+# decoded once, lines are found with str.find, and the matcher is handed
+# the characters between a line's offsets rather than a copy of the line.
+# When a block is ASCII its character and byte offsets agree, and matching
+# lines are written as memoryview slices of the block, without copying.  Output is gathered and written with writelines once
+# BATCH_SIZE bytes are waiting.
+#
+# The exit status is 0 if a line matched, 1 if none did and 2 on errors.
+
+import argparse
+import mmap
+import os
+import stat
+import sys
+import time
+
+import planner
+import regex
+
+BLOCK_SIZE = 1 << 22
+BATCH_SIZE = 1 << 16
+
+grep_engines = ('auto', 'sparse') + planner.engines
+
+class Output(object):
+    def __init__(self, f, batch_size=BATCH_SIZE):
+        self.f = f
+        self.batch_size = batch_size
+        self.parts = []
+        self.size = 0
+        self.writes = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.f.writelines(self.parts)
+            self.writes += 1
+            self.parts = []
+            self.size = 0
+        self.f.flush()
+
+# Blocks of a regular file as memoryviews of the mapped file, each ending
+# at a newline except maybe the last.  The map isn't closed here: output
+# may still hold slices of it, and it is unmapped once the last is gone.
+def mmap_blocks(f, block_size):
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    pos = 0
+    while pos < size:
+        end = min(pos + block_size, size)
+        if end < size:
+            nl = mm.rfind(b'\n', pos, end)
+            end = nl + 1 if nl >= 0 else (mm.find(b'\n', end) + 1 or size)
+        yield view[pos:end]
+        pos = end
+
+def stream_blocks(f, block_size):
+    tail = b''
+    while True:
+        data = f.read(block_size)
+        if not data:
+            break
+        if tail:
+            data = tail + data
+        nl = data.rfind(b'\n')
+        if nl < 0:
+            tail = data
+            continue
+        tail = data[nl+1:]
+        yield data[:nl+1]
+    if tail:
+        yield tail
+
+def blocks(f, block_size):
+    try:
+        regular = stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+    except (OSError, ValueError):
+        regular = False
+    if regular:
+        return mmap_blocks(f, block_size)
+    return stream_blocks(f, block_size)
+
+# Match the lines of block, bytes or a memoryview, passing the matching
+# ones with their newline to emit.  Returns (lines, matches).
+def scan_block(block, matches, emit=None, prefix=None):
+    text = str(block, 'utf-8', 'surrogateescape')
+    view = memoryview(block) if len(text) == len(block) else None
+    n = len(text)
+    find = text.find
+    char = text.__getitem__
+    pos = 0
+    lines = 0
+    count = 0
+    while pos < n:
+        end = find('\n', pos)
+        if end < 0:
+            end = n
+        lines += 1
+        last = end - 1 if end > pos and text[end-1] == '\r' else end
+        if matches(map(char, range(pos, last))):
+            count += 1
+            if emit is not None:
+                if prefix is not None:
+                    emit(prefix)
+                if view is not None:
+                    emit(view[pos:end+1])
+                else:
+                    emit(text[pos:end+1].encode('utf-8', 'surrogateescape'))
+                if end == n:
+                    emit(b'\n')
+        pos = end + 1
+    return (lines, count)
+
+# Join patterns into one alternation and compile it.  Returns the object
+# to call matches on and the name of its engine.
+def compile_patterns(patterns, engine='auto', ignorecase=False, volume=None):
+    pt = None
+    for rx in patterns:
+        tree = regex.parse_regex(rx)
+        if tree is None:
+            raise Exception('Could not parse {!r}'.format(rx))
+        pt = tree if pt is None else regex.PTAlternation(pt, tree)
+    if engine == 'sparse':
+        return (regex.Nfa(pt, ignorecase=ignorecase).sparse(), 'sparse')
+    if engine not in grep_engines:
+        raise Exception('Unknown engine {}'.format(engine))
+    m = planner.compile(pt, volume, None if engine == 'auto' else engine, ignorecase)
+    fa = m.engine
+    if m.plan.engine == 'dfa':
+        # Stops at the first dead state, which Dfa.matches runs through
+        fa = fa.freeze()
+    return (fa, m.plan.engine)
+
+def parse_args(argv):
+    ap = argparse.ArgumentParser(prog='python -m regex',
+                                 description='Print lines that match one of the patterns.')
+    ap.add_argument('-e', '--regexp', action='append', dest='patterns', metavar='PATTERN',
+                    help='a pattern to match, may be repeated')
+    ap.add_argument('-c', '--count', action='store_true',
+                    help='print the number of matching lines instead')
+    ap.add_argument('-i', '--ignore-case', action='store_true', dest='ignorecase')
+    ap.add_argument('--engine', choices=grep_engines, default='auto')
+    ap.add_argument('--stats', action='store_true',
+                    help='print the engine, timings and throughput to stderr')
+    ap.add_argument('--block-size', type=int, default=BLOCK_SIZE, help=argparse.SUPPRESS)
+    ap.add_argument('args', nargs='*', metavar='FILE')
+    opts = ap.parse_args(argv)
+    if not opts.patterns:
+        if not opts.args:
+            ap.error('no pattern given')
+        opts.patterns = [opts.args.pop(0)]
+    opts.files = opts.args or ['-']
+    return opts
+
+def input_size(files):
+    total = 0
+    for name in files:
+        if name == '-':
+            return None
+        try:
+            total += os.path.getsize(name)
+        except OSError:
+            pass
+    return total
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    stderr = stderr or sys.stderr
+    opts = parse_args(sys.argv[1:] if argv is None else argv)
+
+    stats = regex.enable_stats() if opts.stats else None
+    try:
+        t0 = time.perf_counter()
+        fa, engine = compile_patterns(opts.patterns, opts.engine, opts.ignorecase,
+                                      input_size(opts.files))
+        if stats:
+            stats.add_time('compile', time.perf_counter() - t0)
+    except Exception as e:
+        print('regex: {}'.format(e), file=stderr)
+        return 2
+    finally:
+        # Only compilation is instrumented, the scan keeps its own counts
+        regex.disable_stats()
+
+    out = Output(stdout)
+    matches = fa.matches
+    named = len(opts.files) > 1
+    status = 1
+    failed = False
+    t0 = time.perf_counter()
+    for name in opts.files:
+        prefix = '{}:'.format(name).encode('utf-8', 'surrogateescape') if named else None
+        emit = None if opts.count else out.write
+        nlines = nmatches = nbytes = 0
+        try:
+            f = stdin if name == '-' else open(name, 'rb')
+            try:
+                for block in blocks(f, opts.block_size):
+                    n, m = scan_block(block, matches, emit, prefix)
+                    nlines += n
+                    nmatches += m
+                    nbytes += len(block)
+            finally:
+                if f is not stdin:
+                    f.close()
+        except OSError as e:
+            print('regex: {}: {}'.format(name, e.strerror or e), file=stderr)
+            failed = True
+            continue
+        if opts.count:
+            out.write('{}{}\n'.format(prefix.decode('utf-8', 'surrogateescape') if named else '',
+                                      nmatches).encode('utf-8', 'surrogateescape'))
+        if nmatches:
+            status = 0
+        if stats:
+            stats.count('bytes', nbytes)
+            stats.count('lines', nlines)
+            stats.count('matches', nmatches)
+    out.flush()
+
+    if stats:
+        seconds = time.perf_counter() - t0
+        stats.add_time('scan', seconds)
+        stats.count('writes', out.writes)
+        print('engine: {}'.format(engine), file=stderr)
+        print(stats, file=stderr)
+        mb = stats.counters.get('bytes', 0) / float(1 << 20)
+        print('{:>20}: {:.1f}MB/s'.format('throughput', mb / seconds if seconds else 0.0),
+              file=stderr)
+    return 2 if failed else status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# optimize.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Simplification passes run before Nfa.to_dfa.
+#
+# Tree passes rewrite the ParseTree before Thompson construction, and
+# their reports use the Thompson size of the tree.  Nfa passes take an Nfa
+# and return a new one.  Every pass returns a PassReport with the state
+# and edge counts before and after it ran.  With a Budget, the pattern
+# length and Thompson size are checked before anything is built, and the
+# sizes and time again after every pass.
+
+from collections import namedtuple
+
+from regex import *
+
+PassReport = namedtuple('PassReport',
+                        'name, states_before, states_after, edges_before, edges_after')
+
+# Rebuild pt bottom up, passing each rebuilt node through fn.  ParseTree
+# nodes are interned, so a subtree shared by several parents is only
+# rewritten once.
+def rewrite(pt, fn, done=None):
+    if done is None:
+        done = dict()
+    rv = done.get(pt)
+    if rv is not None:
+        return rv
+    node = pt
+    if isinstance(node, PTClosure):
+        node = PTClosure(rewrite(node.child, fn, done))
+    elif isinstance(node, PTCount):
+        node = PTCount(rewrite(node.child, fn, done), node.cmin, node.cmax)
+    elif isinstance(node, PTAlternation):
+        node = PTAlternation(rewrite(node.left, fn, done), rewrite(node.right, fn, done))
+    elif isinstance(node, PTConcatenation):
+        node = PTConcatenation(rewrite(node.left, fn, done), rewrite(node.right, fn, done))
+    rv = fn(node)
+    done[pt] = rv
+    return rv
+
+# (x*)* -> x*, and (x{0,n})* or (x{1,n})* -> x*
+def collapse_closures(pt):
+    if isinstance(pt, PTClosure):
+        child = pt.child
+        while (isinstance(child, PTClosure) or
+               (isinstance(child, PTCount) and child.cmin <= 1)):
+            child = child.child
+        if child is not pt.child:
+            return PTClosure(child)
+    return pt
+
+# a|b -> [ab]
+def merge_charsets(pt):
+    if (isinstance(pt, PTAlternation) and
+        isinstance(pt.left, PTCharSet) and isinstance(pt.right, PTCharSet) and
+        pt.left.cset and pt.right.cset):
+        return PTCharSet.from_set(pt.left.cset.union(pt.right.cset))
+    return pt
+
+def concat_items(pt):
+    if isinstance(pt, PTConcatenation):
+        return concat_items(pt.left) + concat_items(pt.right)
+    return [pt]
+
+def concat_of(items):
+    rv = items[0]
+    for it in items[1:]:
+        rv = PTConcatenation(rv, it)
+    return rv
+
+# ab|ac -> a(b|c), and ab|a -> a(b)?
+def factor_prefixes(pt):
+    if not isinstance(pt, PTAlternation):
+        return pt
+    left = concat_items(pt.left)
+    right = concat_items(pt.right)
+    n = 0
+    while n < len(left) and n < len(right) and left[n] is right[n]:
+        n += 1
+    if n == 0:
+        return pt
+
+    prefix = concat_of(left[:n])
+    left, right = left[n:], right[n:]
+    if not left and not right:
+        return prefix
+    if not left or not right:
+        return PTConcatenation(prefix, PTCount(concat_of(left or right), 0, 1))
+    return PTConcatenation(prefix, factor_prefixes(PTAlternation(concat_of(left),
+                                                                 concat_of(right))))
+
+tree_passes = [('collapse_closures', collapse_closures),
+               ('merge_charsets', merge_charsets),
+               ('factor_prefixes', factor_prefixes)]
+
+def optimize_tree(pt, budget=None):
+    if budget:
+        budget = budget.started()
+    reports = []
+    for name, fn in tree_passes:
+        sts, edges = pt.thompson_size()
+        pt = rewrite(pt, fn)
+        nsts, nedges = pt.thompson_size()
+        reports.append(PassReport(name, sts+1, nsts+1, edges, nedges))
+        if budget:
+            budget.check(name, nfa_states=nsts+1, nfa_edges=nedges)
+    return (pt, reports)
+
+def nfa_states(nf):
+    sts = set(nf.transitions).union(nf.accepting)
+    sts.add(nf.start)
+    for row in nf.transitions.values():
+        for tgts in row.values():
+            sts.update(tgts)
+    return sts
+
+# A new Nfa with the given states and edges and the flags of src, so
+# input is still folded or classified the way src's is
+def nfa_from(src, start, accepting, edges):
+    nf = Nfa(ignorecase=src.ignorecase)
+    nf.categories = src.categories
+    nf.start = start
+    nf.addTransitions(edges)
+    nf.accepting = set(accepting)
+    charge_memory(nf, 'optimize')
+    return nf
+
+# Replace epsilon edges by copying the edges of each state's e_closure
+def remove_epsilons(nf):
+    edges = []
+    accepting = set()
+    for st in nfa_states(nf):
+        closure = nf.e_closure(st)
+        if closure.intersection(nf.accepting):
+            accepting.add(st)
+        for cs in closure:
+            for ch, tgts in nf.transitions.get(cs, {}).items():
+                if ch != '_eps':
+                    edges.extend(Transition(st, ch, ns) for ns in tgts)
+    return nfa_from(nf, nf.start, accepting, edges)
+
+# Drop states that can't be reached from the start or can't reach an
+# accepting state
+def remove_useless(nf):
+    succs = dict()
+    preds = dict()
+    for st, row in nf.transitions.items():
+        for tgts in row.values():
+            for ns in tgts:
+                succs.setdefault(st, set()).add(ns)
+                preds.setdefault(ns, set()).add(st)
+
+    def reach(seeds, graph):
+        seen = set(seeds)
+        todo = list(seeds)
+        while todo:
+            for ns in graph.get(todo.pop(), ()):
+                if ns not in seen:
+                    seen.add(ns)
+                    todo.append(ns)
+        return seen
+
+    keep = reach({nf.start}, succs).intersection(reach(nf.accepting, preds))
+    keep.add(nf.start)
+    edges = [Transition(st, ch, ns)
+             for st, row in nf.transitions.items() if st in keep
+             for ch, tgts in row.items()
+             for ns in tgts if ns in keep]
+    return nfa_from(nf, nf.start, nf.accepting.intersection(keep), edges)
+
+# Merge states with the same acceptance and the same outgoing edges,
+# repeating until nothing changes
+def merge_equivalent(nf):
+    while True:
+        groups = dict()
+        for st in sorted(nfa_states(nf)):
+            row = nf.transitions.get(st, {})
+            sig = (st in nf.accepting,
+                   frozenset((ch, frozenset(tgts)) for ch, tgts in row.items()))
+            groups.setdefault(sig, []).append(st)
+
+        rep = dict()
+        for sts in groups.values():
+            for st in sts[1:]:
+                rep[st] = sts[0]
+        if not rep:
+            return nf
+
+        edges = [Transition(st, ch, rep.get(ns, ns))
+                 for st, row in nf.transitions.items() if st not in rep
+                 for ch, tgts in row.items()
+                 for ns in tgts]
+        nf = nfa_from(nf, rep.get(nf.start, nf.start),
+                      {st for st in nf.accepting if st not in rep}, edges)
+
+# Number states 0..n-1 in breadth first order from the start
+def renumber(nf):
+    ids = {nf.start: 0}
+    order = [nf.start]
+    for st in order:
+        row = nf.transitions.get(st, {})
+        for ch in sorted(row):
+            for ns in sorted(row[ch]):
+                if ns not in ids:
+                    ids[ns] = len(order)
+                    order.append(ns)
+    edges = [Transition(ids[st], ch, ids[ns])
+             for st, row in nf.transitions.items() if st in ids
+             for ch, tgts in row.items()
+             for ns in tgts]
+    return nfa_from(nf, 0, {ids[st] for st in nf.accepting if st in ids}, edges)
+
+nfa_passes = [('remove_epsilons', remove_epsilons),
+              ('remove_useless', remove_useless),
+              ('merge_equivalent', merge_equivalent),
+              ('renumber', renumber)]
+
+def optimize_nfa(nf, budget=None):
+    if budget:
+        budget = budget.started()
+    reports = []
+    for name, fn in nfa_passes:
+        sts, edges = len(nfa_states(nf)), nf.edge_count()
+        nf = fn(nf)
+        nsts, nedges = len(nfa_states(nf)), nf.edge_count()
+        reports.append(PassReport(name, sts, nsts, edges, nedges))
+        if budget:
+            budget.check(name, nfa_states=nsts, nfa_edges=nedges)
+    return (nf, reports)
+
+# Run the tree and Nfa passes over rx, a pattern or a ParseTree
+def optimize(rx, budget=None, ignorecase=False):
+    if budget:
+        budget = budget.started()
+    if isinstance(rx, ParseTree):
+        pt = rx
+    else:
+        if budget:
+            budget.check('parse', pattern_length=len(rx))
+        pt = parse_regex(rx)
+    if budget:
+        sts, edges = pt.thompson_size()
+        budget.check('thompson', nfa_states=sts+1, nfa_edges=edges)
+    pt, tree_reports = optimize_tree(pt, budget)
+    nf, nfa_reports = optimize_nfa(Nfa(pt, budget, ignorecase), budget)
+    return (nf, tree_reports + nfa_reports)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# pattern_set.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# A set of patterns matched together through a lazily built product of
+# the per-pattern DFAs.
+#
+# Each pattern is compiled to its own Dfa once, when it is added.  A state
+# of the combined automaton is a frozenset of (pattern id, Dfa state) pairs,
+# with pairs in a dead state dropped.  Combined transitions are computed on
+# demand and cached.  A cached transition only depends on the patterns that
+# appear in its source state, so adding a pattern invalidates nothing and
+# removing one only drops the cache entries that mention it.
+
+from regex import Dfa, get_stats, memory_breakdown
+
+class PatternSet(object):
+    def __init__(self, patterns=()):
+        self.patterns = dict()
+        self.dfas = dict()
+        self.start = frozenset()
+        self._dead = dict()
+        self._next_id = 0
+
+        # (combined state, char) -> combined state
+        self._cache = dict()
+        # pattern id -> cache keys whose source state mentions it
+        self._by_pattern = dict()
+
+        for rx in patterns:
+            self.add(rx)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __contains__(self, pid):
+        return pid in self.patterns
+
+    # Compile rx and add it to the set, returning its id
+    def add(self, rx):
+        df = Dfa(rx)
+        pid = self._next_id
+        self._next_id += 1
+
+        self.patterns[pid] = rx
+        self.dfas[pid] = df
+        self._dead[pid] = df.dead_states()
+        self._by_pattern[pid] = set()
+        if df.start not in self._dead[pid]:
+            self.start = self.start.union({(pid, df.start)})
+        return pid
+
+    def remove(self, pid):
+        if pid not in self.patterns:
+            raise Exception('No pattern with id {}'.format(pid))
+
+        for key in self._by_pattern.pop(pid):
+            if self._cache.pop(key, None) is None:
+                continue
+            for opid, st in key[0]:
+                if opid != pid:
+                    self._by_pattern[opid].discard(key)
+
+        self.start = frozenset(p for p in self.start if p[0] != pid)
+        del self.patterns[pid]
+        del self.dfas[pid]
+        del self._dead[pid]
+
+    # Combined transition from cs on ch
+    def move(self, cs, ch):
+        key = (cs, ch)
+        ns = self._cache.get(key)
+        if ns is not None:
+            return ns
+
+        new_states = []
+        for pid, st in cs:
+            df = self.dfas[pid]
+            sym = df.classes[ch] if df.ignorecase or df.categories else ch
+            row = df.transitions.get(st, {})
+            if sym in row and row[sym] not in self._dead[pid]:
+                new_states.append((pid, row[sym]))
+        ns = frozenset(new_states)
+
+        self._cache[key] = ns
+        for pid, st in cs:
+            self._by_pattern[pid].add(key)
+        return ns
+
+    # Bytes by component, see Dfa.memory_report.  Each component adds up
+    # the pattern Dfas, and caches also holds the combined transitions.
+    def memory_report(self):
+        components = [('patterns', [self.patterns])]
+        for pid in sorted(self.dfas):
+            components += self.dfas[pid].memory_components()
+        components.append(('dead_states', [self._dead]))
+        components.append(('caches', [self._cache, self._by_pattern]))
+        return memory_breakdown(components)
+
+    # Return the set of ids of the patterns that match ins
+    def matches(self, ins):
+        cache = self._cache
+        hits = 0
+        misses = 0
+        curs = self.start
+        for c in ins:
+            if not curs:
+                break
+            ns = cache.get((curs, c))
+            if ns is None:
+                ns = self.move(curs, c)
+                misses += 1
+            else:
+                hits += 1
+            curs = ns
+
+        stats = get_stats()
+        if stats:
+            stats.count('cache_hits', hits)
+            stats.count('cache_misses', misses)
+        return {pid for pid, st in curs if st in self.dfas[pid].accepting}
+
+    def matches_any(self, ins):
+        return len(self.matches(ins))>0
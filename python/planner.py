@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+# planner.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Choose how to match a pattern from the shape of its ParseTree and the
+# amount of input it will see.
+#
+# The engines, from cheapest to build to cheapest to run:
+#     nfa          Nfa.matches, simulating the set of Thompson states
+#     bitparallel  BitParallelNfa, the epsilon free Nfa with the state set
+#                  kept as the bits of an int and moves done a byte of
+#                  states at a time through lookup tables
+#     lazy         FrozenNfa, which builds Dfa states as input reaches them
+#                  by subset construction (not the derivative matcher)
+#                  and caches a bounded number of them
+#     dfa          the full Dfa from subset construction
+#
+# A Dfa can have exponentially many states.  The classic case is a closure
+# followed by a counted repeat of characters the closure also matches, as
+# in (a|b)*a(a|b){n}, where the Dfa has to remember the last n characters.
+# risk_bits adds up the counts of such repeats and the Dfa size is
+# estimated as nfa_states * 2**risk_bits.  The full Dfa is only built when
+# that estimate is small, and even then with a Budget, falling back to the
+# lazy Dfa if it's exceeded.  Past that, bit-parallel matching is used
+# whenever the Nfa is small enough: on input that reaches many Dfa states
+# the lazy Dfa spends its time building states it can't keep.
+#
+# plan returns the chosen engine with the reasons for it, explain formats
+# them, and compile builds the engine.
+
+import math
+from collections import namedtuple
+
+import regex
+import frozen
+import optimize
+
+engines = ('nfa', 'bitparallel', 'lazy', 'dfa')
+
+# Below TINY_INPUT characters nothing beats simulating the Nfa directly,
+# and below SMALL_INPUT building a Dfa or bit tables doesn't pay for
+# itself, while the lazy Dfa costs little more than the Nfa to set up
+TINY_INPUT = 16
+SMALL_INPUT = 4096
+# Largest estimated Dfa that is built in full
+DFA_LIMIT = 2000
+# Largest epsilon free Nfa simulated with bit-parallel tables
+BIT_LIMIT = 256
+# Input volume assumed when the caller doesn't give one
+DEFAULT_VOLUME = 1 << 20
+
+Features = namedtuple('Features', 'nfa_states, nfa_edges, positions, alphabet, '
+                      'counted, max_count, closure_depth, risk_bits, est_dfa_states')
+
+Plan = namedtuple('Plan', 'engine, reasons, features, volume')
+
+def tree_chars(pt):
+    def build():
+        if isinstance(pt, regex.PTCharSet):
+            return frozenset(pt.cset)
+        if isinstance(pt, (regex.PTClosure, regex.PTCount)):
+            return tree_chars(pt.child)
+        return tree_chars(pt.left) | tree_chars(pt.right)
+    return pt.memo('plan_chars', build)
+
+def concat_items(pt):
+    if isinstance(pt, regex.PTConcatenation):
+        return concat_items(pt.left) + concat_items(pt.right)
+    return [pt]
+
+# Statistics of the distinct nodes of pt: (positions, counted repeats,
+# largest count, closure nesting depth, risk bits)
+def tree_stats(pt):
+    def build():
+        if isinstance(pt, regex.PTCharSet):
+            return (1 if pt.cset else 0, 0, 0, 0, 0)
+        if isinstance(pt, regex.PTClosure):
+            pos, counted, mx, depth, risk = tree_stats(pt.child)
+            return (pos, counted, mx, depth + 1, risk)
+        if isinstance(pt, regex.PTCount):
+            pos, counted, mx, depth, risk = tree_stats(pt.child)
+            return (pos * pt.cmax, counted + 1, max(mx, pt.cmax),
+                    depth + (1 if pt.cmax > 1 else 0), risk)
+        if isinstance(pt, regex.PTAlternation):
+            left, right = tree_stats(pt.left), tree_stats(pt.right)
+            return (left[0] + right[0], left[1] + right[1], max(left[2], right[2]),
+                    max(left[3], right[3]), max(left[4], right[4]))
+
+        # A concatenation adds the risk of each counted repeat that follows
+        # a closure over some of the same characters
+        pos = counted = mx = depth = risk = 0
+        looped = frozenset()
+        for item in concat_items(pt):
+            ipos, icounted, imx, idepth, irisk = tree_stats(item)
+            pos += ipos
+            counted += icounted
+            mx = max(mx, imx)
+            depth = max(depth, idepth)
+            risk += irisk
+            if isinstance(item, regex.PTCount) and looped & tree_chars(item.child):
+                risk += item.cmax
+            if isinstance(item, regex.PTClosure):
+                looped = looped | tree_chars(item.child)
+        return (pos, counted, mx, depth, risk)
+    return pt.memo('plan_stats', build)
+
+def features(rx):
+    pt = rx if isinstance(rx, regex.ParseTree) else regex.parse_regex(rx)
+    if pt is None:
+        raise Exception('Could not parse {!r}'.format(rx))
+    sts, edges = pt.thompson_size()
+    positions, counted, max_count, depth, risk = tree_stats(pt)
+    est = (sts + 1) * 2 ** min(risk, 40)
+    return Features(sts + 1, edges, positions + 1, len(tree_chars(pt)), counted,
+                    max_count, depth, risk, est)
+
+def plan(rx, volume=None):
+    f = features(rx)
+    reasons = ['{} Thompson states, {} positions, {} symbols'.format(
+        f.nfa_states, f.positions, f.alphabet)]
+    if f.counted:
+        reasons.append('{} counted repeats, the largest {{{}}}'.format(f.counted, f.max_count))
+    if f.closure_depth > 1:
+        reasons.append('repeats nested {} deep'.format(f.closure_depth))
+    if f.risk_bits:
+        reasons.append('repeats after closures over the same characters: Dfa could need '
+                       '~2^{} x {} states'.format(f.risk_bits, f.nfa_states))
+
+    given = volume is not None
+    if not given:
+        volume = DEFAULT_VOLUME
+        reasons.append('no input volume given, assuming {} characters'.format(volume))
+
+    if volume < TINY_INPUT:
+        engine = 'nfa'
+        reasons.append('{} characters of input are too few to build anything for'.format(volume))
+    elif volume < SMALL_INPUT:
+        engine = 'lazy'
+        reasons.append('{} characters of input are too few to pay for building tables, '
+                       'caching the Dfa states reached instead'.format(volume))
+    elif f.est_dfa_states <= DFA_LIMIT:
+        engine = 'dfa'
+        reasons.append('estimated Dfa of {} states is small enough to build in full'.format(
+            f.est_dfa_states))
+    elif f.positions <= BIT_LIMIT:
+        engine = 'bitparallel'
+        reasons.append('Dfa too large, {} Nfa states fit in {} byte tables per symbol'.format(
+            f.positions, int(math.ceil(f.positions / 8.0))))
+    else:
+        engine = 'lazy'
+        reasons.append('Dfa too large to build in full, building the states the input reaches')
+    return Plan(engine, reasons, f, volume)
+
+def explain(rx, volume=None):
+    return describe(plan(rx, volume))
+
+def describe(p):
+    lines = ['engine: {}'.format(p.engine)]
+    lines += ['  - {}'.format(r) for r in p.reasons]
+    return '\n'.join(lines)
+
+# Bit-parallel simulation of the epsilon free form of an Nfa.  For each
+# symbol there is one table per byte of the state set, mapping that byte's
+# 256 possible values to the union of their successors, so a move costs
+# one lookup per byte of states.  Tables are made the first time a symbol
+# is seen.
+class BitParallelNfa(object):
+    def __init__(self, nfa):
+        ef = optimize.optimize_nfa(nfa)[0]
+        self.nstates = len(optimize.nfa_states(ef))
+        self.nbytes = max(1, (self.nstates + 7) // 8)
+        self.start = 1 << ef.start
+        self.accept = 0
+        for st in ef.accepting:
+            self.accept |= 1 << st
+        self.follow = dict()
+        for st, row in ef.transitions.items():
+            for ch, tgts in row.items():
+                masks = self.follow.setdefault(ch, dict())
+                for ns in tgts:
+                    masks[st] = masks.get(st, 0) | (1 << ns)
+        self.tables = dict()
+        self.classes = None
+        if nfa.ignorecase or nfa.categories:
+            self.classes = regex.SymbolMap(frozenset(nfa.get_alphabet()), nfa.ignorecase)
+
+    def table(self, ch):
+        masks = self.follow.get(ch)
+        if masks is None:
+            rv = None
+        else:
+            rv = []
+            for b in range(self.nbytes):
+                single = [masks.get(b * 8 + i, 0) for i in range(8)]
+                tab = [0] * 256
+                for v in range(1, 256):
+                    low = v & -v
+                    tab[v] = tab[v ^ low] | single[low.bit_length() - 1]
+                rv.append(tab)
+        self.tables[ch] = rv
+        return rv
+
+    def matches(self, ins):
+        if self.classes is not None:
+            ins = map(self.classes.__getitem__, ins)
+        tables = self.tables
+        cur = self.start
+        for c in ins:
+            tabs = tables.get(c, False)
+            if tabs is False:
+                tabs = self.table(c)
+            if tabs is None:
+                return False
+            nxt = 0
+            for tab in tabs:
+                if not cur:
+                    break
+                nxt |= tab[cur & 255]
+                cur >>= 8
+            cur = nxt
+            if not cur:
+                return False
+        return (cur & self.accept) != 0
+
+# The caller's budget with the Dfa size the planner allows, which is the
+# smaller of the two
+def dfa_budget(budget):
+    limit = 4 * DFA_LIMIT
+    if budget is None:
+        return regex.Budget(max_dfa_states=limit)
+    rv = regex.Budget(budget.max_pattern_length, budget.max_nfa_states,
+                      min(limit, budget.max_dfa_states or limit), budget.max_edges,
+                      budget.max_seconds, budget.max_memory)
+    rv.t0 = budget.t0
+    return rv
+
+# Build the engine for rx named by plan, or by engine if given.  The
+# returned object has a matches method and the plan as .plan.  Going over
+# the caller's budget raises BudgetExceeded, going over the planner's
+# limit on the Dfa falls back to the lazy Dfa.  A pattern string is looked
+# up in the disk cache when one is set, see regex.set_cache_dir.
+def compile(rx, volume=None, engine=None, ignorecase=False, budget=None):
+    if budget:
+        budget = budget.started()
+    if isinstance(rx, regex.ParseTree):
+        pt = rx
+    else:
+        if budget:
+            budget.check('parse', pattern_length=len(rx))
+        pt = regex.parse_regex(rx)
+    if pt is None:
+        raise Exception('Could not parse {!r}'.format(rx))
+    p = plan(pt, volume)
+    if engine is not None:
+        if engine not in engines:
+            raise Exception('Unknown engine {}'.format(engine))
+        p = p._replace(engine=engine, reasons=p.reasons + ['engine {} requested'.format(engine)])
+
+    if p.engine == 'dfa':
+        try:
+            if regex.get_disk_cache() is not None and isinstance(rx, str):
+                m = regex.Dfa(rx, dfa_budget(budget), ignorecase=ignorecase)
+            else:
+                m = regex.compile_dfa(pt, dfa_budget(budget), ignorecase=ignorecase)
+        except regex.BudgetExceeded as e:
+            if budget:
+                # Raises if the caller's own limits were exceeded too
+                budget.check(e.stage, **e.stats)
+            p = p._replace(engine='lazy', reasons=p.reasons + ['{}, using lazy'.format(e)])
+    if p.engine != 'dfa':
+        nf = regex.Nfa(pt, budget, ignorecase)
+        if p.engine == 'nfa':
+            m = nf
+        elif p.engine == 'bitparallel':
+            m = BitParallelNfa(nf)
+        else:
+            m = frozen.FrozenNfa(nf)
+    return Matcher(m, p)
+
+class Matcher(object):
+    def __init__(self, engine, plan):
+        self.engine = engine
+        self.plan = plan
+        self.matches = engine.matches
+
+    # The plan as built, with any fallback, see describe
+    def explain(self):
+        return describe(self.plan)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# product.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Boolean operations on Dfas by the product construction.
+#
+# A state of the product of a and b is a pair (sa, sb) of their states,
+# and it moves on a symbol to the pair of their targets.  The product
+# alphabet is the union of the two alphabets.  Each side looks a literal
+# character up through its SymbolMap, so a character the other Dfa has an
+# edge for still finds its category edge here.  A category symbol stands
+# for the characters of that category in neither alphabet.  A side with no
+# edge, or one in a dead state, becomes None and never accepts again.
+#
+# accept(in_a, in_b) says which pairs accept: intersection is "and",
+# union is "or" and difference is "a and not b".  Pairs that can't reach
+# an accepting pair because a None side can't accept are dropped.
+#
+# Emptiness and inclusion only need to know whether some accepting pair is
+# reachable, so find_accepting searches breadth first without building the
+# product, stops at the first one and returns the shortest string leading
+# to it.
+
+from collections import deque
+
+import regex
+
+def check_flags(a, b):
+    if a.ignorecase != b.ignorecase:
+        raise Exception('Cannot combine Dfas with different ignorecase flags')
+
+# (product symbol, symbol for a, symbol for b) for every product symbol
+def pair_symbols(a, b):
+    check_flags(a, b)
+    rv = []
+    for sym in sorted(a.get_alphabet().union(b.get_alphabet())):
+        if regex.is_category(sym):
+            rv.append((sym, sym, sym))
+        else:
+            rv.append((sym, a.classes[sym], b.classes[sym]))
+    return rv
+
+# Map a Dfa state to None if it's dead
+def live_state(dfa, dead):
+    def live(st):
+        return None if st is None or st in dead else st
+    return live
+
+def can_accept(pair, accept):
+    sa, sb = pair
+    return any(accept(ia, ib)
+               for ia in ((False,) if sa is None else (False, True))
+               for ib in ((False,) if sb is None else (False, True)))
+
+# Breadth first over the reachable pairs that can still accept.  Yields
+# each pair and its successors as (symbol, pair).
+def walk(a, b, accept):
+    symbols = pair_symbols(a, b)
+    live_a = live_state(a, a.dead_states())
+    live_b = live_state(b, b.dead_states())
+    start = (live_a(a.start), live_b(b.start))
+    seen = {start}
+    todo = deque([start])
+    while todo:
+        pair = todo.popleft()
+        sa, sb = pair
+        row_a = a.transitions.get(sa, {}) if sa is not None else {}
+        row_b = b.transitions.get(sb, {}) if sb is not None else {}
+        succs = []
+        for sym, sym_a, sym_b in symbols:
+            np = (live_a(row_a.get(sym_a)), live_b(row_b.get(sym_b)))
+            if not can_accept(np, accept):
+                continue
+            succs.append((sym, np))
+            if np not in seen:
+                seen.add(np)
+                todo.append(np)
+        yield pair, succs
+
+def accepts(a, b, pair, accept):
+    sa, sb = pair
+    return accept(sa is not None and sa in a.accepting,
+                  sb is not None and sb in b.accepting)
+
+def product(a, b, accept):
+    ids = dict()
+    df = regex.Dfa()
+    for pair, succs in walk(a, b, accept):
+        sid = ids.setdefault(pair, len(ids))
+        df.transitions.setdefault(sid, {})
+        if accepts(a, b, pair, accept):
+            df.addAcceptState(sid)
+        for sym, np in succs:
+            df.addTransition(regex.Transition(sid, sym, ids.setdefault(np, len(ids))))
+    df.set_flags(a.ignorecase)
+    regex.charge_memory(df, 'product')
+    return df
+
+def intersection(a, b):
+    return product(a, b, lambda x, y: x and y)
+
+def union(a, b):
+    return product(a, b, lambda x, y: x or y)
+
+def difference(a, b):
+    return product(a, b, lambda x, y: x and not y)
+
+# A character for sym: sym itself, or for a category symbol the first
+# character of that category in neither alphabet
+def sample_char(sym, alphabet):
+    if not regex.is_category(sym):
+        return sym
+    for cp in range(0x110000):
+        c = chr(cp)
+        if c not in alphabet and regex.category_symbol(c) == sym:
+            return c
+    return sym
+
+# The shortest string leading to an accepting pair, or None
+def find_accepting(a, b, accept):
+    parents = dict()
+    start = None
+    for pair, succs in walk(a, b, accept):
+        if start is None:
+            start = pair
+        if accepts(a, b, pair, accept):
+            path = []
+            while pair in parents:
+                pair, sym = parents[pair]
+                path.append(sym)
+            alphabet = a.get_alphabet().union(b.get_alphabet())
+            return ''.join(sample_char(sym, alphabet) for sym in reversed(path))
+        for sym, np in succs:
+            if np not in parents and np != start:
+                parents[np] = (pair, sym)
+    return None
+
+def is_empty(dfa):
+    return dfa.start in dfa.dead_states()
+
+# A string a matches and b doesn't, or None if b matches everything a does
+def counterexample(a, b):
+    return find_accepting(a, b, lambda x, y: x and not y)
+
+def is_subset(a, b):
+    return counterexample(a, b) is None
+
+def equivalent(a, b):
+    return find_accepting(a, b, lambda x, y: x != y) is None
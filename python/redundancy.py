@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# redundancy.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Find rules in a pattern list that can be dropped without changing which
+# inputs match some rule:
+#
+#   empty       the rule matches nothing
+#   duplicate   the rule matches exactly what an earlier rule matches
+#   subsumed    another rule matches everything this one matches
+#
+# Each rule is compiled to a Dfa once.  Comparisons use the product
+# searches in product.py, which stop at the first string that tells two
+# rules apart.  The length of the shortest match prunes most pairs first:
+# equal languages have equal shortest matches, and a rule can only be
+# subsumed by one whose shortest match is no longer.
+#
+#     python redundancy.py [-i] rules.txt
+
+import sys
+from collections import deque, namedtuple
+
+import product
+from regex import *
+
+# other is the index of the rule that makes this one redundant, and
+# example, for a subsumed rule, a string the other rule matches and it
+# doesn't
+Finding = namedtuple('Finding', 'kind, index, other, example')
+
+# Length of the shortest string dfa matches, or None if it matches nothing
+def shortest_match(dfa):
+    depth = {dfa.start: 0}
+    todo = deque([dfa.start])
+    while todo:
+        st = todo.popleft()
+        if st in dfa.accepting:
+            return depth[st]
+        for ns in dfa.transitions.get(st, {}).values():
+            if ns not in depth:
+                depth[ns] = depth[st] + 1
+                todo.append(ns)
+    return None
+
+# patterns may hold compiled Dfas as well as strings and ParseTrees
+def find_redundant(patterns, budget=None, ignorecase=False):
+    dfas = [rx if isinstance(rx, Dfa) else Dfa(rx, budget, ignorecase=ignorecase)
+            for rx in patterns]
+    lengths = [shortest_match(df) for df in dfas]
+
+    findings = []
+    kept = []
+    for i, df in enumerate(dfas):
+        if lengths[i] is None:
+            findings.append(Finding('empty', i, None, None))
+            continue
+        for j in kept:
+            if lengths[j] == lengths[i] and product.equivalent(df, dfas[j]):
+                findings.append(Finding('duplicate', i, j, None))
+                break
+        else:
+            kept.append(i)
+
+    # A rule subsumed by several others is reported against the first.
+    # Of two rules subsuming each other only the later one is a duplicate.
+    for i in kept:
+        for j in kept:
+            if j == i or lengths[j] > lengths[i]:
+                continue
+            if product.is_subset(dfas[i], dfas[j]):
+                findings.append(Finding('subsumed', i, j,
+                                        product.counterexample(dfas[j], dfas[i])))
+                break
+
+    findings.sort(key=lambda f: f.index)
+    return findings
+
+def describe(f, patterns):
+    rx = patterns[f.index]
+    if f.kind == 'empty':
+        return '{}: {!r} matches nothing'.format(f.index, rx)
+    text = '{}: {!r} is {} {}: {!r}'.format(
+        f.index, rx, 'a duplicate of' if f.kind == 'duplicate' else 'subsumed by',
+        f.other, patterns[f.other])
+    if f.example is not None:
+        text += ', which also matches {!r}'.format(f.example)
+    return text
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    ignorecase = '-i' in args
+    args = [a for a in args if a != '-i']
+    if len(args) != 1:
+        print('usage: redundancy.py [-i] rules.txt', file=sys.stderr)
+        return 2
+    with open(args[0], encoding='utf-8') as f:
+        patterns = [line.rstrip('\r\n') for line in f if line.strip()]
+    findings = find_redundant(patterns, ignorecase=ignorecase)
+    for f in findings:
+        print(describe(f, patterns))
+    print('{} of {} rules redundant'.format(len(findings), len(patterns)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,9 +21,21 @@
 # The source of the grammar:
 #     http://www.cs.sfu.ca/~cameron/Teaching/384/99-3/regexp-plg.html
 
+import gc
+import io
 import ply.lex as lex
 import ply.yacc as yacc
+import struct
+import sys
+import time
+import unicodedata
+import weakref
+import zlib
+from array import array
 from collections import namedtuple
+from types import MappingProxyType
+
+__version__ = '0.2'
 
 # List of token names.   This is always required
 
@@ -79,26 +91,266 @@ def t_error(t):
 
 Transition = namedtuple('Transition', 'os, ch, ns')
 
+# Rough per-object costs, in bytes, used to estimate memory use while
+# building automata.  They are in the right ballpark for CPython's dicts
+# and sets, which is all a budget needs.
+NFA_STATE_BYTES = 300
+DFA_STATE_BYTES = 400
+EDGE_BYTES = 100
+SET_MEMBER_BYTES = 40
+
+# Raised when building an automaton exceeds one of the limits in a Budget.
+# stats holds the counts reached when construction was stopped.
+class BudgetExceeded(Exception):
+    def __init__(self, stage, limit, stats):
+        self.stage = stage
+        self.limit = limit
+        self.stats = dict(stats)
+        super(BudgetExceeded, self).__init__(
+            '{} budget exceeded during {}: {}'.format(limit, stage, self.stats))
+
+# Limits on the cost of compiling a pattern.  None means unlimited.
+# A Budget is only configuration and can be shared between compiles;
+# started() makes the per-compile copy that carries the start time.
+class Budget(object):
+    def __init__(self, max_pattern_length=None, max_nfa_states=None,
+                 max_dfa_states=None, max_edges=None, max_seconds=None,
+                 max_memory=None):
+        self.max_pattern_length = max_pattern_length
+        self.max_nfa_states = max_nfa_states
+        self.max_dfa_states = max_dfa_states
+        self.max_edges = max_edges
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.t0 = None
+
+    def started(self):
+        if self.t0 is not None:
+            return self
+        rv = Budget(self.max_pattern_length, self.max_nfa_states,
+                    self.max_dfa_states, self.max_edges, self.max_seconds,
+                    self.max_memory)
+        rv.t0 = time.monotonic()
+        return rv
+
+    def elapsed(self):
+        if self.t0 is None:
+            return 0.0
+        return time.monotonic() - self.t0
+
+    # Estimated bytes for the given construction counts
+    @staticmethod
+    def memory(stats):
+        return (stats.get('nfa_states', 0) * NFA_STATE_BYTES +
+                stats.get('nfa_edges', 0) * EDGE_BYTES +
+                stats.get('dfa_states', 0) * DFA_STATE_BYTES +
+                stats.get('dfa_edges', 0) * EDGE_BYTES +
+                stats.get('set_members', 0) * SET_MEMBER_BYTES)
+
+    def check(self, stage, **stats):
+        stats['seconds'] = self.elapsed()
+        stats['memory'] = Budget.memory(stats)
+        edges = stats.get('nfa_edges', 0) + stats.get('dfa_edges', 0)
+
+        limits = [('pattern_length', stats.get('pattern_length', 0), self.max_pattern_length),
+                  ('nfa_states', stats.get('nfa_states', 0), self.max_nfa_states),
+                  ('dfa_states', stats.get('dfa_states', 0), self.max_dfa_states),
+                  ('edges', edges, self.max_edges),
+                  ('seconds', stats['seconds'], self.max_seconds),
+                  ('memory', stats['memory'], self.max_memory)]
+        for name, value, limit in limits:
+            if limit is not None and value > limit:
+                raise BudgetExceeded(stage, name, stats)
+
+# Counters and per-stage timers for the matching pipeline.
+#
+# Instrumentation is off unless enable_stats() has been called.  Each
+# instrumented function reads the module level _stats once and skips all
+# bookkeeping when it is None, so leaving the hooks in costs a global
+# lookup per call.  The optional callback is called as
+# callback(stage, seconds, stats) every time a stage finishes.
+class Stats(object):
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.counters = dict()
+        self.timers = dict()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, stage, seconds):
+        self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+        self.count(stage + '_calls')
+        if self.callback:
+            self.callback(stage, seconds, self)
+
+    def reset(self):
+        self.counters = dict()
+        self.timers = dict()
+
+    def __str__(self):
+        lines = ['{:>20}: {:.6f}s'.format(k, self.timers[k]) for k in sorted(self.timers)]
+        lines += ['{:>20}: {}'.format(k, self.counters[k]) for k in sorted(self.counters)]
+        return '\n'.join(lines)
+
+_stats = None
+
+def enable_stats(callback=None):
+    global _stats
+    _stats = Stats(callback)
+    return _stats
+
+# Turn instrumentation off, returning the stats collected so far
+def disable_stats():
+    global _stats
+    rv = _stats
+    _stats = None
+    return rv
+
+def get_stats():
+    return _stats
+
+# The on-disk compile cache used by Dfa(rx) and re_match, see disk_cache.py
+_disk_cache = None
+
+# Cache compiled Dfas in directory, or stop caching if directory is None.
+# The oldest entries are removed once the cache holds more than max_bytes.
+def set_cache_dir(directory, max_bytes=64 << 20):
+    global _disk_cache
+    if directory is None:
+        _disk_cache = None
+    else:
+        import disk_cache
+        _disk_cache = disk_cache.DiskCache(directory, max_bytes)
+    return _disk_cache
+
+def get_disk_cache():
+    return _disk_cache
+
+# A process wide limit on the memory held by automata.  While one is set,
+# every automaton with a memory_report() is charged its total when its
+# tables are built: compiled from a pattern, read by Dfa.from_bytes, made
+# by a subset, followpos, derivative or product construction, or copied
+# into a frozen, sparse or compressed form.  Building one raises
+# BudgetExceeded rather than take the total over max_bytes.  The charge
+# is given back when the automaton is garbage collected.  Subclasses can
+# override charge to apply a policy of their own.
+class MemoryBudget(object):
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+
+    def charge(self, owner, nbytes, stage):
+        if self.used + nbytes > self.max_bytes:
+            raise BudgetExceeded(stage, 'memory', {'memory': nbytes, 'used': self.used,
+                                                   'max_bytes': self.max_bytes})
+        self.used += nbytes
+        weakref.finalize(owner, self.release, nbytes)
+
+    def release(self, nbytes):
+        self.used -= nbytes
+
+_memory_budget = None
+
+# Set the memory budget to a MemoryBudget or a number of bytes, or remove
+# it with None
+def set_memory_budget(budget):
+    global _memory_budget
+    if budget is not None and not isinstance(budget, MemoryBudget):
+        budget = MemoryBudget(budget)
+    _memory_budget = budget
+    return budget
+
+def get_memory_budget():
+    return _memory_budget
+
+def charge_memory(owner, stage):
+    if _memory_budget is not None:
+        _memory_budget.charge(owner, owner.memory_report()['total'], stage)
+
+# ParseTree nodes are immutable and hash-consed: constructing a node equal
+# to one that already exists returns the existing node, so identical
+# subexpressions, within one pattern or across patterns, are one object and
+# compare equal by identity.  Each node has a memo for results derived
+# from it, such as its Thompson NFA fragment, which is built relative to
+# state 0 once and shifted into place by getTransitions.
 class ParseTree(object):
-    def __init__(self):
+    __slots__ = ('_memo', '__weakref__')
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *args):
         raise Exception('Impossible to create a base class ParseTree')
 
+    # Return the node of class cls for key, making it from fields if needed
+    @classmethod
+    def intern(cls, key, **fields):
+        key = (cls,) + key
+        node = ParseTree._interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(node, name, value)
+            object.__setattr__(node, '_memo', dict())
+            ParseTree._interned[key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ParseTree nodes are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('ParseTree nodes are immutable')
+
+    # Return memo[key], computing it with fn() the first time
+    def memo(self, key, fn):
+        rv = self._memo.get(key)
+        if rv is None:
+            rv = fn()
+            self._memo[key] = rv
+        return rv
+
     def __str__(self):
         raise Exception('Use a subclass')
-    
+
     def getTransitions(self, in_s):
+        ns, trans = self.memo('thompson', lambda: self.buildTransitions(0))
+        if in_s == 0:
+            return (ns, list(trans))
+        return (ns + in_s, [Transition(os + in_s, ch, ts + in_s) for os, ch, ts in trans])
+
+    def buildTransitions(self, in_s):
         raise Exception('No transitions for ParseTree base class')
 
+    # (new states, edges) that getTransitions would create, computed
+    # without building them
+    def thompson_size(self):
+        return self.memo('thompson_size', self.buildSize)
+
+    def buildSize(self):
+        raise Exception('No size for ParseTree base class')
+
+    # This tree with every character set folded to lower case
+    def folded(self):
+        return self.memo('folded', self.fold)
+
+    def fold(self):
+        raise Exception('No fold for ParseTree base class')
+
 class PTClosure(ParseTree):
-    def __init__(self, child):
+    __slots__ = ('child',)
+
+    def __new__(cls, child):
         if child is None:
             raise Exception('cannot have None closure')
-        self.child = child
+        return cls.intern((child,), child=child)
+
+    def __reduce__(self):
+        return (PTClosure, (self.child,))
 
     def __str__(self):
         return '({})*'.format(self.child)
 
-    def getTransitions(self, in_s):
+    def buildTransitions(self, in_s):
         ns, childTrans = self.child.getTransitions(in_s+1)
         
         return (ns+1, [Transition(in_s, '_eps', in_s+1),
@@ -106,15 +358,26 @@ class PTClosure(ParseTree):
                        Transition(ns, '_eps', in_s+1),
                        Transition(ns, '_eps', ns+1)] + childTrans)
 
+    def buildSize(self):
+        sts, edges = self.child.thompson_size()
+        return (sts + 2, edges + 4)
+
+    def fold(self):
+        return PTClosure(self.child.folded())
+
 class PTCount(ParseTree):
-    def __init__(self, child, cmin, cmax):
+    __slots__ = ('child', 'cmin', 'cmax')
+
+    def __new__(cls, child, cmin, cmax):
         if child is None:
             raise Exception('cannot have None count')
+        cmin, cmax = int(cmin), int(cmax)
         if cmin > cmax or cmax == 0:
             raise Exception('Bad range for count {} - {}'.format(cmin, cmax))
-        self.child = child
-        self.cmin = int(cmin)
-        self.cmax = int(cmax)
+        return cls.intern((child, cmin, cmax), child=child, cmin=cmin, cmax=cmax)
+
+    def __reduce__(self):
+        return (PTCount, (self.child, self.cmin, self.cmax))
 
     def __str__(self):
         rv = '({})'.format(self.child)
@@ -124,7 +387,7 @@ class PTCount(ParseTree):
             rv += '{{{},{}}}'.format(self.cmin, self.cmax)
         return rv
 
-    def getTransitions(self, in_s):
+    def buildTransitions(self, in_s):
         trans = []
         ns = in_s
         ct = []
@@ -148,18 +411,29 @@ class PTCount(ParseTree):
 
         return (ns, trans)
 
+    def buildSize(self):
+        sts, edges = self.child.thompson_size()
+        return (sts * self.cmax, edges * self.cmax + self.cmax - self.cmin)
+
+    def fold(self):
+        return PTCount(self.child.folded(), self.cmin, self.cmax)
+
 class PTAlternation(ParseTree):
-    def __init__(self, left, right):
+    __slots__ = ('left', 'right')
+
+    def __new__(cls, left, right):
         if left is None or right is None:
             raise Exception('cannot have None in Alternation')
-        self.left = left
-        self.right = right
+        return cls.intern((left, right), left=left, right=right)
+
+    def __reduce__(self):
+        return (PTAlternation, (self.left, self.right))
 
     def __str__(self):
         return '({})|({})'.format(self.left, self.right)
 
 
-    def getTransitions(self, in_s):
+    def buildTransitions(self, in_s):
         ns, leftTrans = self.left.getTransitions(in_s+1)
         ns2, rightTrans = self.right.getTransitions(ns+1)
         
@@ -169,22 +443,42 @@ class PTAlternation(ParseTree):
                       Transition(ns, '_eps', ns2+1),
                       Transition(ns2, '_eps', ns2+1)] + leftTrans + rightTrans)
 
+    def buildSize(self):
+        lsts, ledges = self.left.thompson_size()
+        rsts, redges = self.right.thompson_size()
+        return (lsts + rsts + 3, ledges + redges + 4)
+
+    def fold(self):
+        return PTAlternation(self.left.folded(), self.right.folded())
+
 class PTConcatenation(ParseTree):
-    def __init__(self, left, right):
+    __slots__ = ('left', 'right')
+
+    def __new__(cls, left, right):
         if left is None or right is None:
             raise Exception('cannot have None in Concatenation')
-        self.left = left
-        self.right = right
+        return cls.intern((left, right), left=left, right=right)
+
+    def __reduce__(self):
+        return (PTConcatenation, (self.left, self.right))
 
     def __str__(self):
         return '{}{}'.format(self.left, self.right)
 
-    def getTransitions(self, in_s):
+    def buildTransitions(self, in_s):
         ns, leftTrans = self.left.getTransitions(in_s)
         ns2, rightTrans = self.right.getTransitions(ns)
         
         return (ns2, leftTrans + rightTrans)
 
+    def buildSize(self):
+        lsts, ledges = self.left.thompson_size()
+        rsts, redges = self.right.thompson_size()
+        return (lsts + rsts, ledges + redges)
+
+    def fold(self):
+        return PTConcatenation(self.left.folded(), self.right.folded())
+
 
 # POSIX character sets
 named_csets = {':alnum:': 'a-zA-Z0-9',
@@ -202,31 +496,106 @@ named_csets = {':alnum:': 'a-zA-Z0-9',
                ':word:': 'a-zA-Z0-9_',
                ':xdigit:': '0-9a-fA-F'}
 
+# Unicode general categories.  [:Lu:] names one category and [:L:] all the
+# categories of a major class.  A category is kept in a PTCharSet as the
+# pseudo-symbol ':Lu:' instead of as the characters it holds, and input
+# characters are mapped to it at match time, see SymbolMap.
+unicode_categories = {'C': ('Cc', 'Cf', 'Cn', 'Co', 'Cs'),
+                      'L': ('Ll', 'Lm', 'Lo', 'Lt', 'Lu'),
+                      'M': ('Mc', 'Me', 'Mn'),
+                      'N': ('Nd', 'Nl', 'No'),
+                      'P': ('Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps'),
+                      'S': ('Sc', 'Sk', 'Sm', 'So'),
+                      'Z': ('Zl', 'Zp', 'Zs')}
+for major, minors in list(unicode_categories.items()):
+    for minor in minors:
+        unicode_categories[minor] = (minor,)
+
+# Letter categories that fold into each other when ignoring case
+cased_categories = frozenset((':Ll:', ':Lt:', ':Lu:'))
+
+def category_symbol(c):
+    return ':{}:'.format(unicodedata.category(c))
+
+def is_category(sym):
+    return len(sym) > 2 and sym[0] == ':' and sym[-1] == ':'
+
+# The lower case of c, or c if that isn't a single character
+def fold_char(c):
+    f = c.lower()
+    return f if len(f) == 1 else c
+
+# The symbols of a character set that ch matches: ch and, for a literal
+# character, its category
+def symbol_keys(ch):
+    return (ch,) if is_category(ch) else (ch, category_symbol(ch))
+
+def fold_set(cset):
+    rv = set()
+    for sym in cset:
+        if sym in cased_categories:
+            rv.update(cased_categories)
+        elif is_category(sym):
+            rv.add(sym)
+        else:
+            rv.add(fold_char(sym))
+    return rv
+
+# Maps input characters to alphabet symbols, classifying each distinct
+# character once.  A character is folded if ignorecase is set, then stands
+# for itself if it's in the alphabet, or for its category symbol if that
+# is.  Characters matching neither map to None, which has no edges.
+class SymbolMap(dict):
+    def __init__(self, alphabet, ignorecase=False):
+        self.alphabet = alphabet
+        self.ignorecase = ignorecase
+
+    def __missing__(self, c):
+        sym = fold_char(c) if self.ignorecase else c
+        if sym not in self.alphabet:
+            cat = category_symbol(sym)
+            sym = cat if cat in self.alphabet else None
+        self[c] = sym
+        return sym
+
 class PTCharSet(ParseTree):
-    def __init__(self, cset_str):
+    __slots__ = ('cset',)
+
+    def __new__(cls, cset_str):
         if cset_str is None:
             raise Exception('cannot have None in CharSet')
-        self.cset = set()
+        cset = set()
         if named_csets.get(cset_str):
             cset_str = named_csets[cset_str]
+        elif is_category(cset_str) and cset_str[1:-1] in unicode_categories:
+            return cls.from_set(':{}:'.format(c) for c in unicode_categories[cset_str[1:-1]])
         i = 0
         # print('cset_str = {}'.format(cset_str))
         while (i<len(cset_str)):
             if i==0 and cset_str[i]=='-':
-                self.cset.add('-')
+                cset.add('-')
 
             elif cset_str[i] == '-' and i==(len(cset_str)-1):
-                self.cset.add('-')
+                cset.add('-')
             
             elif cset_str[i] == '-':
                 first_val = ord(cset_str[i-1])
                 last_val = ord(cset_str[i+1])
-                self.cset = self.cset.union(chr(x) for x in range(first_val, last_val+1))
+                cset = cset.union(chr(x) for x in range(first_val, last_val+1))
                 i+=1
             else:
-                self.cset.add(cset_str[i])
+                cset.add(cset_str[i])
 
             i+=1
+        return cls.from_set(cset)
+
+    @classmethod
+    def from_set(cls, chars):
+        cset = frozenset(chars)
+        return cls.intern((cset,), cset=cset)
+
+    def __reduce__(self):
+        return (PTCharSet.from_set, (self.cset,))
 
     # ugly, but works
     def __str__(self):
@@ -235,7 +604,7 @@ class PTCharSet(ParseTree):
         # return '{}'.format([x for x in self.cset])
         return '[{}]'.format(''.join(sorted(self.cset)))
 
-    def getTransitions(self, in_s):
+    def buildTransitions(self, in_s):
         if len(self.cset)==0:
             return (in_s, [])
 
@@ -244,6 +613,14 @@ class PTCharSet(ParseTree):
             trs.append(Transition(in_s, char, in_s+1))
         return (in_s + 1, trs)
 
+    def buildSize(self):
+        if len(self.cset)==0:
+            return (0, 0)
+        return (1, len(self.cset))
+
+    def fold(self):
+        return PTCharSet.from_set(fold_set(self.cset))
+
 def debug_p(msg='', res=[]):
     # print('{}: {}'.format(msg, [str(x) for x in list(res)]))
     pass
@@ -423,18 +800,209 @@ lexer = lex.lex()
 # Build the parser
 parser = yacc.yacc()
 
+# Size in bytes of obj and everything reachable from it through dicts,
+# lists, tuples, sets and mapping proxies, counting shared objects once
+def deep_sizeof(obj, seen=None):
+    if seen is None:
+        seen = set()
+    size = 0
+    todo = [obj]
+    while todo:
+        o = todo.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            todo.extend(o.keys())
+            todo.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            todo.extend(o)
+        elif isinstance(o, MappingProxyType):
+            todo.extend(gc.get_referents(o))
+    return size
+
+# Bytes by component for a list of (component, objects), from deep_sizeof
+# with one seen set, so an object reachable from several components is
+# counted in the first.  Components may repeat and are added up.
+def memory_breakdown(components):
+    seen = set()
+    rv = dict()
+    for name, objs in components:
+        rv[name] = rv.get(name, 0) + sum(deep_sizeof(o, seen) for o in objs if o is not None)
+    rv['total'] = sum(rv.values())
+    return rv
+
+# The distinct symbol objects used as keys in a dict of rows
+def symbol_objects(rows):
+    return list(dict((id(ch), ch) for row in rows.values() for ch in row).values())
+
+# Count the distinct nodes of pt; shared subtrees are counted once
+def count_nodes(pt):
+    todo = [pt]
+    seen = set()
+    while todo:
+        node = todo.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        for attr in ('child', 'left', 'right'):
+            if hasattr(node, attr):
+                todo.append(getattr(node, attr))
+    return len(seen)
+
+# Parse rxs into a ParseTree
+def parse_regex(rxs):
+    stats = _stats
+    if stats is None:
+        return parser.parse(rxs)
+
+    ntokens = [0]
+    def next_token():
+        tok = lexer.token()
+        if tok is not None:
+            ntokens[0] += 1
+        return tok
+
+    t0 = time.perf_counter()
+    pt = parser.parse(rxs, lexer=lexer, tokenfunc=next_token)
+    stats.add_time('parse', time.perf_counter() - t0)
+    stats.count('tokens', ntokens[0])
+    if pt is not None:
+        stats.count('parse_nodes', count_nodes(pt))
+    return pt
+
+# Ways of turning a pattern into a Dfa:
+#   'thompson'   - Thompson's construction then subset construction
+#   'followpos'  - the direct construction from section 3.9.5
+#   'derivative' - Brzozowski derivatives, see derivative.py
+dfa_methods = ('thompson', 'followpos', 'derivative')
+
+# Build the Dfa for rx, a pattern or a ParseTree
+def compile_dfa(rx, budget=None, optimize=False, method='thompson',
+                ignorecase=False):
+    if budget:
+        budget = budget.started()
+
+    # optimize, followpos and derivative import this module, so they're
+    # imported here rather than at the top
+    if method != 'thompson' or ignorecase:
+        if not isinstance(rx, ParseTree):
+            if budget:
+                budget.check('parse', pattern_length=len(rx))
+            rx = parse_regex(rx)
+        if ignorecase:
+            rx = rx.folded()
+
+    if method != 'thompson':
+        pt = rx
+        if optimize:
+            import optimize as optimizer
+            if budget:
+                sts, edges = pt.thompson_size()
+                budget.check('thompson', nfa_states=sts+1, nfa_edges=edges)
+            pt = optimizer.optimize_tree(pt, budget)[0]
+        if method == 'followpos':
+            import followpos
+            df = followpos.to_dfa(pt, budget)
+        else:
+            import derivative
+            df = derivative.to_dfa(pt, budget)
+    else:
+        if optimize:
+            import optimize as optimizer
+            nf = optimizer.optimize(rx, budget)[0]
+        else:
+            nf = Nfa(rx, budget)
+        # I have my doubts whether or not this is a good practice...
+        df = nf.to_dfa(budget)
+    df.set_flags(ignorecase)
+    return df
+
+# Layout of Dfa.to_bytes, all little endian:
+#     header     magic, format, start, accepting count, symbol count,
+#                symbol bytes, row count, target width, flags
+#     accepting  int32 per accepting state
+#     symbols    uint8 UTF-8 length per symbol, then the UTF-8 text
+#     rows       int32 state per row, then for each row the target for
+#                every symbol, -1 for none, in the narrowest of int8, int16
+#                or int32 that holds every state
+#     trailer    CRC-32 of everything before it
+DFA_MAGIC = b'RXDF'
+DFA_FORMAT = 1
+dfa_header = struct.Struct('<4sHiIIIIBB')
+DFA_IGNORECASE = 1
+dfa_trailer = struct.Struct('<I')
+dfa_widths = {1: 'b', 2: 'h', 4: 'i'}
+
+def le_bytes(arr):
+    if sys.byteorder == 'big' and arr.itemsize > 1:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def le_read(code, data, offset, count):
+    arr = array(code)
+    end = offset + count * arr.itemsize
+    if end > len(data):
+        raise Exception('Bad Dfa data: truncated')
+    arr.frombytes(data[offset:end])
+    if sys.byteorder == 'big' and arr.itemsize > 1:
+        arr.byteswap()
+    return arr, end
+
+# States added by Dfa.line_table for a trailing '\n' or '\r\n'
+LINE_END = ('line', 'end')
+LINE_CR = ('line', 'cr')
+
+# line without one trailing '\n' or '\r\n', the same line end the rows
+# of Dfa.line_table accept
+def strip_line_end(line):
+    if line.endswith('\r\n'):
+        return line[:-2]
+    if line.endswith('\n'):
+        return line[:-1]
+    return line
+
 class Dfa(object):
-    def __init__(self, rx = None):
+    def __init__(self, rx = None, budget = None, optimize = False,
+                 method = 'thompson', ignorecase = False):
         if rx:
-            # I have my doubts whether or not this is a good practice...
-            tmp = Nfa(rx).to_dfa()
+            if method not in dfa_methods:
+                raise Exception('Unknown Dfa method {}'.format(method))
+            if _disk_cache is not None and isinstance(rx, str):
+                tmp = _disk_cache.get_dfa(rx, budget, optimize, method, ignorecase)
+            else:
+                tmp = compile_dfa(rx, budget, optimize, method, ignorecase)
             self.transitions = tmp.transitions
             self.accepting = tmp.accepting
             self.start = tmp.start
+            self.set_flags(tmp.ignorecase)
+            # tmp was charged when it was built; drop it so its charge is
+            # given back before the same tables are charged to self
+            del tmp
+            charge_memory(self, 'dfa')
         else:
             self.transitions = dict()
             self.start = 0
             self.accepting = set()
+            self.set_flags(False)
+
+    # Record whether input must be folded or classified before it's looked
+    # up, which is the case when ignoring case or when the alphabet has
+    # category symbols.  Call again after adding transitions by hand.
+    def set_flags(self, ignorecase):
+        self.ignorecase = ignorecase
+        self.categories = any(is_category(ch) for row in self.transitions.values()
+                              for ch in row)
+        self.classes = SymbolMap(self.get_alphabet(), ignorecase)
+
+    def get_alphabet(self):
+        return set(ch for row in self.transitions.values() for ch in row)
+
+    # ins as alphabet symbols, see SymbolMap
+    def classify(self, ins):
+        return map(self.classes.__getitem__, ins)
 
     def addTransition(self, tran):
         # Add empty dictionary if it's not there
@@ -448,6 +1016,11 @@ class Dfa(object):
 
     # Test whether an Dfa accepts for the given string
     def matches(self, ins):
+        if self.ignorecase or self.categories:
+            ins = self.classify(ins)
+        if _stats is not None:
+            return self.matches_instrumented(ins, _stats)
+
         curs = self.start
         for c in ins:
             if c in self.transitions[curs]:
@@ -457,29 +1030,311 @@ class Dfa(object):
 
         return len(self.accepting.intersection({curs}))>0
 
-    def to_dot(self):
-        result = 'digraph { rankdir = LR;'
-        for st in sorted(self.transitions):
-            for chs in sorted(self.transitions[st]):
-                result += ' "{}" -> "{}" [label="{}"];'.format(st, self.transitions[st][chs], chs)
+    def matches_instrumented(self, ins, stats):
+        t0 = time.perf_counter()
+        curs = self.start
+        consumed = 0
+        rv = None
+        for c in ins:
+            if c in self.transitions[curs]:
+                curs = self.transitions[curs][c]
+                consumed += 1
+            else:
+                rv = False
+                break
+        if rv is None:
+            rv = curs in self.accepting
+        stats.add_time('match', time.perf_counter() - t0)
+        stats.count('chars', consumed)
+        return rv
 
-        for st in sorted(self.accepting):
-            result += ' ' + str(st) + ' [shape=doublecircle];'
+    # Run the Dfa over ins starting in state curs.  Returns the state it
+    # ends in, or None if it hit a character with no transition.  Lets
+    # callers match input that arrives in pieces.
+    def advance(self, curs, ins):
+        if curs is None:
+            return None
+        if self.ignorecase or self.categories:
+            ins = self.classify(ins)
+        transitions = self.transitions
+        for c in ins:
+            row = transitions[curs]
+            if c in row:
+                curs = row[c]
+            else:
+                return None
+        return curs
+
+    # A compact binary copy of this Dfa that from_bytes reads back
+    def to_bytes(self):
+        symbols = sorted(set(ch for row in self.transitions.values() for ch in row))
+        encoded = [ch.encode('utf-8') for ch in symbols]
+        if any(len(e) > 255 for e in encoded):
+            raise Exception('Dfa symbol too long to store')
+        text = b''.join(encoded)
+
+        states = sorted(self.transitions)
+        top = max([self.start] + states + list(self.accepting) +
+                  [ns for row in self.transitions.values() for ns in row.values()])
+        width = 1 if top < 0x80 else 2 if top < 0x8000 else 4
+        targets = array(dfa_widths[width])
+        for st in states:
+            row = self.transitions[st]
+            targets.extend(row.get(ch, -1) for ch in symbols)
+
+        data = b''.join([dfa_header.pack(DFA_MAGIC, DFA_FORMAT, self.start,
+                                         len(self.accepting), len(symbols),
+                                         len(text), len(states), width,
+                                         DFA_IGNORECASE if self.ignorecase else 0),
+                         le_bytes(array('i', sorted(self.accepting))),
+                         bytes(len(e) for e in encoded),
+                         text,
+                         le_bytes(array('i', states)),
+                         le_bytes(targets)])
+        return data + dfa_trailer.pack(zlib.crc32(data))
+
+    # Read a Dfa written by to_bytes, raising an Exception if data is
+    # truncated, corrupt or from another format version
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        if len(data) < dfa_header.size + dfa_trailer.size:
+            raise Exception('Bad Dfa data: truncated')
+        body = data[:-dfa_trailer.size]
+        if dfa_trailer.unpack(data[-dfa_trailer.size:])[0] != zlib.crc32(body):
+            raise Exception('Bad Dfa data: checksum mismatch')
+        (magic, fmt, start, naccept, nsymbols,
+         ntext, nrows, width, flags) = dfa_header.unpack_from(body)
+        if magic != DFA_MAGIC:
+            raise Exception('Bad Dfa data: not a Dfa')
+        if fmt != DFA_FORMAT:
+            raise Exception('Bad Dfa data: format {} is not {}'.format(fmt, DFA_FORMAT))
+        if width not in dfa_widths:
+            raise Exception('Bad Dfa data: bad width {}'.format(width))
+
+        offset = dfa_header.size
+        accepting, offset = le_read('i', body, offset, naccept)
+        lengths, offset = le_read('B', body, offset, nsymbols)
+        if offset + ntext > len(body) or sum(lengths) != ntext:
+            raise Exception('Bad Dfa data: bad symbol table')
+        symbols = []
+        for n in lengths:
+            symbols.append(body[offset:offset+n].decode('utf-8'))
+            offset += n
+        states, offset = le_read('i', body, offset, nrows)
+        targets, offset = le_read(dfa_widths[width], body, offset, nrows * nsymbols)
+        if offset != len(body):
+            raise Exception('Bad Dfa data: trailing bytes')
+
+        rv = cls()
+        rv.start = start
+        rv.accepting = set(accepting)
+        for i, st in enumerate(states):
+            row = dict()
+            for ch, ns in zip(symbols, targets[i*nsymbols:(i+1)*nsymbols]):
+                if ns >= 0:
+                    row[ch] = ns
+            rv.transitions[st] = row
+        rv.set_flags(bool(flags & DFA_IGNORECASE))
+        charge_memory(rv, 'load')
+        return rv
 
-        result += ' node [shape=plaintext label=""]; nothing->"0"; }'
-        return result
+    # A copy stored in row displacement tables, see compressed.py
+    def compress(self):
+        # Imported here because compressed imports this module
+        import compressed
+        return compressed.CompressedDfa(self)
+
+    # Source code for a Python function that matches like this Dfa
+    def to_python(self, name='match'):
+        import codegen
+        return codegen.to_python(self, name)
+
+    # A compiled Python function generated from this Dfa
+    def specialize(self, cache_dir=None):
+        import codegen
+        return codegen.specialize(self, cache_dir)
+
+    # Source code for a self-contained C scanner
+    def to_c(self, name='match'):
+        import codegen
+        return codegen.to_c(self, name)
+
+    # Transition rows for matching whole lines: dead states get no edges,
+    # so a line stops at its first character that can't lead to a match,
+    # and accepting states get edges on '\n' and '\r\n' to LINE_END.
+    # Returns (rows, accepting, strip), where strip is set if '\n' or '\r'
+    # already has a symbol in the alphabet, literal or category, and lines
+    # must be stripped instead, the way Nfa.matching_lines does.
+    def line_table(self):
+        dead = self.dead_states()
+        rows = dict()
+        for st, row in self.transitions.items():
+            rows[st] = {} if st in dead else row
+        for st in dead:
+            rows[st] = {}
+        rows.setdefault(self.start, {})
+
+        if self.classes['\n'] is not None or self.classes['\r'] is not None:
+            return (rows, self.accepting, True)
+        for st in self.accepting:
+            row = dict(rows.get(st, {}))
+            row['\n'] = LINE_END
+            row['\r'] = LINE_CR
+            rows[st] = row
+        rows[LINE_CR] = {'\n': LINE_END}
+        rows[LINE_END] = {}
+        return (rows, self.accepting.union({LINE_END}), False)
+
+    # The number of lines that match.  A line may end in '\n' or '\r\n'.
+    def count(self, lines):
+        n = 0
+        for i in self.matching_lines(lines):
+            n += 1
+        return n
+
+    # The index of the first line that matches, or None
+    def first_index(self, lines):
+        for i in self.matching_lines(lines):
+            return i
+        return None
+
+    # Indexes of the lines that match, see count
+    def matching_lines(self, lines):
+        rows, accepting, strip = self.line_table()
+        start = self.start
+        classify = self.ignorecase or self.categories
+        if classify:
+            classes = SymbolMap(self.classes.alphabet, self.ignorecase)
+            if not strip:
+                classes['\n'] = '\n'
+                classes['\r'] = '\r'
+        for i, line in enumerate(lines):
+            if strip:
+                line = strip_line_end(line)
+            if classify:
+                line = map(classes.__getitem__, line)
+            curs = start
+            for c in line:
+                row = rows[curs]
+                if c in row:
+                    curs = row[c]
+                else:
+                    break
+            else:
+                if curs in accepting:
+                    yield i
+
+    # An immutable copy that threads can share, see frozen.py
+    def freeze(self):
+        import frozen
+        return frozen.FrozenDfa(self)
+
+    # Bytes used by transitions, accepting states, symbols and the symbol
+    # map, from sys.getsizeof over the dicts and sets holding them
+    def memory_report(self):
+        return memory_breakdown(self.memory_components())
+
+    def memory_components(self):
+        return [('symbols', symbol_objects(self.transitions)),
+                ('transitions', [self.transitions]),
+                ('accepting', [self.accepting]),
+                ('caches', [self.classes, self.classes.alphabet])]
+
+    # Return the set of states from which no accepting state can be reached
+    def dead_states(self):
+        preds = dict()
+        for st in self.transitions:
+            for ns in self.transitions[st].values():
+                preds.setdefault(ns, set()).add(st)
+
+        live = set(self.accepting)
+        todo = list(self.accepting)
+        while todo:
+            st = todo.pop()
+            for ps in preds.get(st, ()):
+                if ps not in live:
+                    live.add(ps)
+                    todo.append(ps)
+
+        states = set(self.transitions).union(preds)
+        states.add(self.start)
+        return states - live
+
+    # Product constructions, see product.py
+    def intersection(self, other):
+        import product
+        return product.intersection(self, other)
+
+    def union(self, other):
+        import product
+        return product.union(self, other)
+
+    def difference(self, other):
+        import product
+        return product.difference(self, other)
+
+    def is_empty(self):
+        import product
+        return product.is_empty(self)
+
+    # True if other matches every string this Dfa matches
+    def is_subset(self, other):
+        import product
+        return product.is_subset(self, other)
+
+    def equivalent(self, other):
+        import product
+        return product.equivalent(self, other)
+
+    # See export.py for the options, and for JSON and edge list output
+    def to_dot(self, **options):
+        import export
+        out = io.StringIO()
+        export.write_dot(self, out, **options)
+        return out.getvalue()
+
+    def write_dot(self, f, **options):
+        import export
+        export.write_dot(self, f, **options)
 
 class Nfa(object):
-    def __init__(self, rxs = None):
+    def __init__(self, rxs = None, budget = None, ignorecase = False):
         self.transitions = dict()
         self.start = 0
         self.accepting = set()
+        self.ignorecase = ignorecase
+        self.categories = False
+        self.classes = None
+        self._fuzzy = None
         if rxs:
-            pt = parser.parse(rxs)
+            if budget:
+                budget = budget.started()
+            if isinstance(rxs, ParseTree):
+                pt = rxs
+            else:
+                if budget:
+                    budget.check('parse', pattern_length=len(rxs))
+                pt = parse_regex(rxs)
+            if pt is not None and ignorecase:
+                pt = pt.folded()
+            if budget:
+                # Check the size of the Thompson NFA before building it
+                sts, edges = pt.thompson_size()
+                budget.check('thompson', nfa_states=sts+1, nfa_edges=edges)
+            stats = _stats
+            if stats:
+                t0 = time.perf_counter()
             curState = 0
             ns, newTrans = pt.getTransitions(0)
             self.addTransitions(newTrans)
             self.setAccepting(ns)
+            self.add_category_edges()
+            if stats:
+                stats.add_time('thompson', time.perf_counter() - t0)
+                stats.count('nfa_states', ns + 1)
+                stats.count('nfa_edges', len(newTrans))
+            charge_memory(self, 'nfa')
 
     def addTransition(self, tran):
         self.transitions.update({tran.os: self.transitions.get(tran.os, {})})
@@ -493,24 +1348,79 @@ class Nfa(object):
     def setAccepting(self, st):
         self.accepting.update(self.e_closure(st))
         
-    def to_dot(self):
-        result = 'digraph { rankdir = LR;'
-        for st in sorted(self.transitions):
-            for chs in sorted(self.transitions[st]):
-                for ns in sorted(self.transitions[st][chs]):
-                    lbl = chs
-                    if lbl == '_eps':
-                        lbl = '&epsilon;'
-                    result += ' "{}" -> "{}" [label="{}"];'.format(st, ns, lbl)
-
-        for st in sorted(self.accepting):
-            result += ' ' + str(st) + ' [shape=doublecircle];'
-
-        result += ' node [shape=plaintext label=""]; nothing->"0"; }'
-        return result
+    # See export.py for the options, and for JSON and edge list output
+    def to_dot(self, **options):
+        import export
+        out = io.StringIO()
+        export.write_dot(self, out, **options)
+        return out.getvalue()
+
+    def write_dot(self, f, **options):
+        import export
+        export.write_dot(self, f, **options)
+
+    # Give every state with an edge on a category symbol the same edges on
+    # each literal character of the alphabet in that category.  A character
+    # with an edge of its own is never looked up by category, so its edges
+    # have to include those of its category.
+    def add_category_edges(self):
+        literals = dict()
+        for ch in self.get_alphabet():
+            if is_category(ch):
+                self.categories = True
+            else:
+                literals.setdefault(category_symbol(ch), []).append(ch)
+        if not self.categories:
+            return
+        for row in self.transitions.values():
+            for sym in [sym for sym in row if sym in literals]:
+                for ch in literals[sym]:
+                    row.setdefault(ch, set()).update(row[sym])
+
+    # ins as alphabet symbols, see SymbolMap
+    def classify(self, ins):
+        if self.classes is None:
+            self.classes = SymbolMap(self.get_alphabet(), self.ignorecase)
+        return map(self.classes.__getitem__, ins)
+
+    # An immutable copy that threads can share, see frozen.py
+    def freeze(self):
+        import frozen
+        return frozen.FrozenNfa(self)
+
+    # Whether ins matches with at most max_edits insertions, deletions or
+    # substitutions, see fuzzy.py.  The tables are built on the first call.
+    def fuzzy_matches(self, ins, max_edits=1):
+        return self.edit_distance(ins, max_edits) is not None
+
+    # The fewest edits that make ins match, or None if it takes more than
+    # max_edits
+    def edit_distance(self, ins, max_edits):
+        if self._fuzzy is None:
+            import fuzzy
+            self._fuzzy = fuzzy.FuzzyNfa(self)
+        return self._fuzzy.distance(ins, max_edits)
+
+    # Bytes by component, see Dfa.memory_report.  The caches are the
+    # symbol map and the tables of fuzzy_matches.
+    def memory_report(self):
+        fuzzy = self._fuzzy
+        return memory_breakdown([
+            ('symbols', symbol_objects(self.transitions)),
+            ('transitions', [self.transitions]),
+            ('accepting', [self.accepting]),
+            ('caches', [self.classes, self.classes and self.classes.alphabet,
+                        fuzzy and vars(fuzzy)])])
+
+    # A matcher that allocates nothing per character, see sparse.py
+    def sparse(self, optimize=True):
+        import sparse
+        return sparse.SparseNfa(self, optimize)
 
     # Return a set of states accessible from st using only epsilon transitions
     def e_closure(self, st):
+        if _stats is not None:
+            _stats.count('e_closure')
         if self.transitions.get(st) is None:
             # This could happen in two cases:
             #  * st really doesn't exist
@@ -541,9 +1451,19 @@ class Nfa(object):
 
     # Test whether an Nfa accepts for the given string
     def matches(self, ins):
+        stats = _stats
+        if stats:
+            t0 = time.perf_counter()
         curs = self.e_closure(self.start)
+        consumed = 0
+        if self.ignorecase or self.categories:
+            ins = self.classify(ins)
         for c in ins:
             curs = self.move(curs, c)
+            consumed += 1
+        if stats:
+            stats.add_time('match', time.perf_counter() - t0)
+            stats.count('chars', consumed)
         return len(curs.intersection(self.accepting))>0
 
     def get_alphabet(self):
@@ -562,9 +1482,55 @@ class Nfa(object):
             states.append(ss)
         return sid
 
-    def to_dfa(self):
+    # The number of lines that match, see Dfa.count
+    def count(self, lines):
+        n = 0
+        for i in self.matching_lines(lines):
+            n += 1
+        return n
+
+    # The index of the first line that matches, or None
+    def first_index(self, lines):
+        for i in self.matching_lines(lines):
+            return i
+        return None
+
+    # Indexes of the lines that match.  A line stops being simulated once
+    # no states are left.
+    def matching_lines(self, lines):
+        start = self.e_closure(self.start)
+        accepting = self.accepting
+        classify = self.ignorecase or self.categories
+        for i, line in enumerate(lines):
+            line = strip_line_end(line)
+            if classify:
+                line = self.classify(line)
+            curs = start
+            for c in line:
+                curs = self.move(curs, c)
+                if not curs:
+                    break
+            else:
+                if not accepting.isdisjoint(curs):
+                    yield i
+
+    # Number of transitions, counting each target of a set separately
+    def edge_count(self):
+        return sum(len(tgts) for row in self.transitions.values()
+                   for tgts in row.values())
+
+    def to_dfa(self, budget = None):
+        stats = _stats
+        if stats:
+            t0 = time.perf_counter()
         df = Dfa()
 
+        if budget:
+            budget = budget.started()
+            nfa_states = len(set(self.transitions).union(self.accepting))
+            nfa_edges = self.edge_count()
+            set_members = 0
+
         alphabet = self.get_alphabet()
 
         states = []
@@ -584,8 +1550,16 @@ class Nfa(object):
             cs = unmarked_states.pop()
             for cur_char in alphabet:
                 nss = self.move(states[cs], cur_char)
+                old_count = len(states)
                 ns = self.state_id(states, nss)
 
+                if budget and len(states) > old_count:
+                    set_members += len(nss)
+                    budget.check('subset', nfa_states=nfa_states,
+                                 nfa_edges=nfa_edges, dfa_states=len(states),
+                                 dfa_edges=len(marked_states)*len(alphabet),
+                                 set_members=set_members)
+
                 df.addTransition(Transition(cs, cur_char, ns))
 
                 if ns not in marked_states:
@@ -594,24 +1568,32 @@ class Nfa(object):
                 if len(self.accepting.intersection(nss))>0:
                     df.addAcceptState(ns)
             marked_states.add(cs)
+
+        df.set_flags(self.ignorecase)
+        if stats:
+            stats.add_time('subset', time.perf_counter() - t0)
+            stats.count('dfa_states', len(states))
+        charge_memory(df, 'subset')
         return df
 
 
-def re_match(rx, ins, use_dfa=False):
+# With a disk cache set the Dfa is always used, since it can be loaded
+# instead of compiled.  use_dfa='auto' lets planner.py choose the engine
+# for an input of this length.
+def re_match(rx, ins, use_dfa=False, budget=None, ignorecase=False):
+    if use_dfa == 'auto':
+        import planner
+        return planner.compile(rx, len(ins), ignorecase=ignorecase,
+                               budget=budget).matches(ins)
     if use_dfa:
-        return Dfa(rx).matches(ins)
-    return Nfa(rx).matches(ins)
-
-def main():
-    # print(Nfa('abc(ab|cd*)*def').to_dfa().to_dot())
-    # print(Nfa('(a|b)*abb').to_dfa().to_dot())
-    # print(Dfa('a{0,3}').to_dot())
-    # print(Dfa('(a|b)*abb').to_dot())
-    # print(Nfa('(a|b)*abb').to_dfa().to_dot())
-    # print(Nfa('[0123456789]{3}-[0123456789]{3}-[0123456789]{4}').to_dot())
-    print(Dfa('([:digit:]{3}-){1,2}[:digit:]{4}').to_dot())
-    return
+        return Dfa(rx, budget, ignorecase=ignorecase).matches(ins)
+    return Nfa(rx, budget, ignorecase).matches(ins)
+
+# python -m regex greps files, see grep.py
+def main(argv=None):
+    import grep
+    return grep.main(argv)
 
 if __name__=="__main__":
-    main()
+    sys.exit(main())
 
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+# scanner.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# A lexer generator in the style of section 3.8 of the Dragon book.
+#
+# The Thompson NFAs of all the rules hang off one start state, and subset
+# construction turns them into a single Dfa.  A Dfa state that contains
+# the final state of several rules accepts for the one listed first.
+# Tokenizing runs the Dfa from the start of each token until it dies,
+# remembering the last accepting position, and emits the longest match.
+# Rules named None match text that is skipped, like PLY's t_ignore.
+# Category classes like [:L:] work as in Dfa: each input character is
+# looked up through a SymbolMap when the rules use one.
+
+from collections import namedtuple
+
+from regex import *
+
+Token = namedtuple('Token', 'type, value, pos')
+
+class LexError(Exception):
+    def __init__(self, pos, text):
+        self.pos = pos
+        self.text = text
+        super(LexError, self).__init__(
+            'No token matches at position {}: {!r}'.format(pos, text[:20]))
+
+class Scanner(object):
+    # rules is an ordered list of (token name, pattern), where the pattern
+    # is a string or a ParseTree
+    def __init__(self, rules):
+        self.names = [name for name, rx in rules]
+
+        nf = Nfa()
+        finals = dict()
+        ns = 0
+        for i, (name, rx) in enumerate(rules):
+            pt = rx if isinstance(rx, ParseTree) else parse_regex(rx)
+            if pt is None:
+                raise Exception('Could not parse rule {} {!r}'.format(name, rx))
+            first = ns + 1
+            ns, trans = pt.getTransitions(first)
+            nf.addTransition(Transition(0, '_eps', first))
+            nf.addTransitions(trans)
+            finals[ns] = i
+
+        nf.add_category_edges()
+        charge_memory(nf, 'scanner')
+        self.classes = SymbolMap(nf.get_alphabet()) if nf.categories else None
+        self.build(nf, finals)
+
+    # Subset construction, tagging each Dfa state with the first rule whose
+    # final state it contains.  The dead state is left out.
+    def build(self, nf, finals):
+        alphabet = sorted(nf.get_alphabet())
+        start = frozenset(nf.e_closure(nf.start))
+        ids = {start: 0}
+        states = [start]
+        self.transitions = []
+        self.accept = []
+        for ss in states:
+            row = dict()
+            for ch in alphabet:
+                nss = frozenset(nf.move(ss, ch))
+                if not nss:
+                    continue
+                ns = ids.get(nss)
+                if ns is None:
+                    ns = len(states)
+                    ids[nss] = ns
+                    states.append(nss)
+                row[ch] = ns
+            self.transitions.append(row)
+            rules = [finals[st] for st in ss if st in finals]
+            self.accept.append(min(rules) if rules else None)
+
+    # Find the longest token in text starting at pos.  Returns (rule, end),
+    # or None if the Dfa ran off the end of text while it could still match
+    # and more input may follow.
+    def scan(self, text, pos, final=True):
+        transitions = self.transitions
+        accept = self.accept
+        classes = self.classes
+        state = 0
+        last_rule = None
+        last_end = pos
+        i = pos
+        n = len(text)
+        while i < n:
+            c = text[i] if classes is None else classes[text[i]]
+            state = transitions[state].get(c)
+            if state is None:
+                break
+            i += 1
+            if accept[state] is not None:
+                last_rule = accept[state]
+                last_end = i
+        else:
+            if not final:
+                return None
+
+        if last_rule is None or last_end == pos:
+            raise LexError(pos, text[pos:])
+        return (last_rule, last_end)
+
+    def tokenize(self, text, pos=0):
+        names = self.names
+        n = len(text)
+        while pos < n:
+            rule, end = self.scan(text, pos)
+            if names[rule] is not None:
+                yield Token(names[rule], text[pos:end], pos)
+            pos = end
+
+    # Tokenize text that arrives as an iterable of string chunks.  A token
+    # can span chunks; positions count from the start of the first chunk.
+    def tokens(self, chunks):
+        names = self.names
+        buf = ''
+        offset = 0
+        for chunk in chunks:
+            buf += chunk
+            pos = 0
+            while pos < len(buf):
+                found = self.scan(buf, pos, False)
+                if found is None:
+                    break
+                rule, end = found
+                if names[rule] is not None:
+                    yield Token(names[rule], buf[pos:end], offset + pos)
+                pos = end
+            buf = buf[pos:]
+            offset += pos
+
+        for tok in self.tokenize(buf):
+            yield tok._replace(pos=tok.pos + offset)
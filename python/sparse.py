@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+# sparse.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Nfa simulation without allocating per character, for automata too big
+# for the bit-parallel matcher in planner.py.
+#
+# The states are renumbered 0..n-1 and the current and next state sets are
+# sparse sets (Briggs and Torczon): a dense array holding the members in
+# insertion order and a sparse array holding each member's index in it.
+# i is a member when dense[sparse[i]] == i and sparse[i] < size, so the
+# arrays never need to be initialized and clear() just sets size to 0.
+# The two sets are allocated once and swapped after each character.
+#
+# With optimize set the Nfa is first run through optimize.optimize_nfa,
+# which removes the epsilon edges and usually shrinks it several times.
+#
+# Edges are tuples of target indexes per symbol, and each state's epsilon
+# edges are a tuple as well.  The e-closure of a target is added with a
+# preallocated worklist that holds at most n states, since a state is only
+# pushed when it is added to the set.
+#
+# The sets and worklist belong to the SparseNfa, so one SparseNfa must not
+# be used by two threads at once.
+
+from array import array
+
+import regex
+
+class SparseSet(object):
+    __slots__ = ('dense', 'sparse', 'size')
+
+    def __init__(self, n):
+        self.dense = array('i', bytes(4 * n))
+        self.sparse = array('i', bytes(4 * n))
+        self.size = 0
+
+    def __contains__(self, i):
+        k = self.sparse[i]
+        return k < self.size and self.dense[k] == i
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        dense = self.dense
+        for k in range(self.size):
+            yield dense[k]
+
+    def add(self, i):
+        k = self.sparse[i]
+        if k < self.size and self.dense[k] == i:
+            return
+        self.dense[self.size] = i
+        self.sparse[i] = self.size
+        self.size += 1
+
+    def clear(self):
+        self.size = 0
+
+class SparseNfa(object):
+    def __init__(self, nfa, optimize=True):
+        self.ignorecase = nfa.ignorecase
+        self.categories = nfa.categories
+        self.classes = regex.SymbolMap(nfa.get_alphabet(), nfa.ignorecase)
+        if optimize:
+            from optimize import optimize_nfa
+            nfa = optimize_nfa(nfa)[0]
+
+        states = set(nfa.transitions).union(nfa.accepting)
+        states.add(nfa.start)
+        for row in nfa.transitions.values():
+            for tgts in row.values():
+                states.update(tgts)
+        ids = dict((st, i) for i, st in enumerate(sorted(states)))
+        n = len(ids)
+
+        self.size = n
+        self.start = ids[nfa.start]
+        self.accepting = bytearray(n)
+        for st in nfa.accepting:
+            self.accepting[ids[st]] = 1
+        self.edges = [dict() for i in range(n)]
+        self.eps = [() for i in range(n)]
+        for st, row in nfa.transitions.items():
+            for ch, tgts in row.items():
+                tgts = tuple(sorted(ids[ns] for ns in tgts))
+                if ch == '_eps':
+                    self.eps[ids[st]] = tgts
+                else:
+                    self.edges[ids[st]][ch] = tgts
+
+        self.current = SparseSet(n)
+        self.next = SparseSet(n)
+        self.worklist = array('i', bytes(4 * n))
+        regex.charge_memory(self, 'sparse')
+
+    # Bytes by component, see Dfa.memory_report.  Everything but the dicts
+    # of edges and the symbol map is an array or tuple, counted exactly.
+    def memory_report(self):
+        sets = [self.current, self.next]
+        return regex.memory_breakdown([
+            ('symbols', regex.symbol_objects(dict(enumerate(self.edges)))),
+            ('transitions', [self.edges, self.eps]),
+            ('accepting', [self.accepting]),
+            ('state_sets', sets + [a for ss in sets for a in (ss.dense, ss.sparse)] +
+             [self.worklist]),
+            ('caches', [self.classes, self.classes.alphabet])])
+
+    # Add st and its e-closure to ss
+    def add_closure(self, ss, st):
+        dense = ss.dense
+        sparse = ss.sparse
+        size = ss.size
+        k = sparse[st]
+        if k < size and dense[k] == st:
+            return
+        eps = self.eps
+        todo = self.worklist
+        dense[size] = st
+        sparse[st] = size
+        size += 1
+        todo[0] = st
+        top = 1
+        while top:
+            top -= 1
+            for ns in eps[todo[top]]:
+                k = sparse[ns]
+                if k < size and dense[k] == ns:
+                    continue
+                dense[size] = ns
+                sparse[ns] = size
+                size += 1
+                todo[top] = ns
+                top += 1
+        ss.size = size
+
+    def matches(self, ins):
+        if self.ignorecase or self.categories:
+            ins = map(self.classes.__getitem__, ins)
+        cur = self.current
+        nxt = self.next
+        edges = self.edges
+        add_closure = self.add_closure
+        cur.clear()
+        add_closure(cur, self.start)
+        for c in ins:
+            nxt.clear()
+            dense = cur.dense
+            for k in range(cur.size):
+                tgts = edges[dense[k]].get(c)
+                if tgts is not None:
+                    for ns in tgts:
+                        add_closure(nxt, ns)
+            if not nxt.size:
+                return False
+            cur, nxt = nxt, cur
+        accepting = self.accepting
+        dense = cur.dense
+        for k in range(cur.size):
+            if accepting[dense[k]]:
+                return True
+        return False
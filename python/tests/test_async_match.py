@@ -0,0 +1,106 @@
+#/usr/bin/python3
+
+# test_async_match.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from regex import *
+from async_match import *
+
+async def chunks(parts):
+    for p in parts:
+        yield p
+
+def stream_of(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+class TestAsyncMatch(unittest.TestCase):
+
+    def testAdvance(self):
+        df = Dfa('abc(ab|cd*)*def')
+        curs = df.advance(df.start, 'abccd')
+        curs = df.advance(curs, 'def')
+        self.assertIn(curs, df.accepting)
+        self.assertIsNone(df.advance(df.start, 'x'))
+        self.assertIsNone(df.advance(None, 'abc'))
+
+    def testAsyncIterator(self):
+        df = Dfa('(abc+)+')
+        self.assertTrue(asyncio.run(async_matches(df, chunks([b'ab', b'cc', b'cabc']))))
+        self.assertFalse(asyncio.run(async_matches(df, chunks([b'ab', b'cc', b'cab']))))
+
+    def testStreamReader(self):
+        df = Dfa('[a-z]+')
+
+        async def run(data):
+            return await async_matches(df, stream_of(data), read_size=7)
+
+        self.assertTrue(asyncio.run(run(b'abcdefghijklmnopqrstuvwxyz' * 10)))
+        self.assertFalse(asyncio.run(run(b'abcdefg1')))
+
+    def testSplitMultibyte(self):
+        df = Dfa('▰+▣▰')
+        data = '▰▰▣▰'.encode('utf-8')
+        parts = [data[i:i+1] for i in range(len(data))]
+        self.assertTrue(asyncio.run(async_matches(df, chunks(parts))))
+
+    def testYields(self):
+        df = Dfa('a*')
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        async def run():
+            task = asyncio.ensure_future(ticker())
+            rv = await async_matches(df, chunks([b'a' * 1000]), yield_every=100)
+            task.cancel()
+            return rv
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertGreaterEqual(len(ticks), 9)
+
+    def testStopsWhenDead(self):
+        df = Dfa('ab')
+        m = AsyncMatcher(df)
+        asyncio.run(m.consume(chunks([b'ab', b'b', b'abababab'])))
+        self.assertTrue(m.failed())
+        self.assertEqual(m.consumed, 3)
+
+    def testThreadExecutor(self):
+        df = Dfa('[0-9]+')
+        with ThreadPoolExecutor(2) as ex:
+            m = AsyncMatcher(df, executor=ex, offload_size=100)
+            self.assertTrue(asyncio.run(m.consume(chunks([b'1' * 500, b'23']))))
+
+    def testProcessExecutor(self):
+        df = Dfa('[0-9]+')
+        with process_executor(df, 1) as ex:
+            m = AsyncMatcher(df, executor=ex, offload_size=100, process=True)
+            self.assertTrue(asyncio.run(m.consume(chunks([b'1' * 500]))))
+            m.reset()
+            self.assertFalse(asyncio.run(m.consume(chunks([b'1' * 500 + b'x']))))
+
+if __name__=='__main__':
+    unittest.main()
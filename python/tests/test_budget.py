@@ -0,0 +1,93 @@
+#/usr/bin/python3
+
+# test_budget.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+
+class TestBudget(unittest.TestCase):
+
+    def testThompsonSize(self):
+        for rx in ['a', '[ab][def]', 'ab|c', 'a*|b', '(ab)*', 'a{1,2}',
+                   '([0-9]{3,4}-?){3}', '(abc+)+']:
+            sts, edges = parser.parse(rx).thompson_size()
+            nf = Nfa(rx)
+            self.assertEqual(sts + 1, len(set(nf.transitions).union(nf.accepting)))
+            self.assertEqual(edges, nf.edge_count())
+
+    def testCountRange(self):
+        self.assertTrue(re_match('a{5,12}', 'aaaaaaa'))
+        self.assertFalse(re_match('a{5,12}', 'aaaa'))
+
+    def testUnlimited(self):
+        self.assertTrue(Dfa('(a|b)*abb', Budget()).matches('aabb'))
+
+    def testPatternLength(self):
+        with self.assertRaises(BudgetExceeded) as cm:
+            Nfa('abcdef', Budget(max_pattern_length=5))
+        self.assertEqual(cm.exception.stage, 'parse')
+        self.assertEqual(cm.exception.limit, 'pattern_length')
+
+    def testNfaStates(self):
+        with self.assertRaises(BudgetExceeded) as cm:
+            Nfa('(a{100}b*)*', Budget(max_nfa_states=50))
+        self.assertEqual(cm.exception.stage, 'thompson')
+        self.assertEqual(cm.exception.limit, 'nfa_states')
+        self.assertGreater(cm.exception.stats['nfa_states'], 100)
+
+    def testOptimize(self):
+        # The optimizer must not get to work on a pattern the budget rejects
+        for method in ['thompson', 'followpos', 'derivative']:
+            with self.assertRaises(BudgetExceeded) as cm:
+                Dfa('([a-z]{40}){40}', Budget(max_nfa_states=1000),
+                    optimize=True, method=method)
+            self.assertEqual(cm.exception.stage, 'thompson')
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa('abcdef', Budget(max_pattern_length=5), optimize=True)
+        self.assertEqual(cm.exception.stage, 'parse')
+        self.assertTrue(Dfa('(a|b)*abb', Budget(max_nfa_states=1000),
+                            optimize=True).matches('babb'))
+
+    def testEdges(self):
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa('[a-z]{50}', Budget(max_edges=500))
+        self.assertEqual(cm.exception.limit, 'edges')
+
+    def testDfaStates(self):
+        budget = Budget(max_dfa_states=10)
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa('(a|b)*a(a|b){6}', budget)
+        self.assertEqual(cm.exception.stage, 'subset')
+        self.assertEqual(cm.exception.stats['dfa_states'], 11)
+        self.assertIn('memory', cm.exception.stats)
+
+        # The budget is only configuration, so it can be reused
+        self.assertTrue(Dfa('(a|b)*abb', budget).matches('babb'))
+
+    def testMemory(self):
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa('(a|b)*a(a|b){8}', Budget(max_memory=100000))
+        self.assertEqual(cm.exception.limit, 'memory')
+        self.assertGreater(cm.exception.stats['memory'], 100000)
+
+    def testSeconds(self):
+        budget = Budget(max_seconds=0).started()
+        self.assertRaises(BudgetExceeded, Nfa('(a|b)*abb').to_dfa, budget)
+
+if __name__=='__main__':
+    unittest.main()
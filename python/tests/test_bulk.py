@@ -0,0 +1,62 @@
+#/usr/bin/python3
+
+# test_bulk.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from bulk import *
+
+patterns = ['abc', '(a|b)*abb', 'a(', '[:digit:]{3}-[:digit:]{4}', 'x{3,1}']
+
+class TestBulk(unittest.TestCase):
+
+    def check(self, results):
+        self.assertEqual([r.index for r in results], list(range(len(patterns))))
+        self.assertEqual([r.pattern for r in results], patterns)
+        self.assertEqual([r.ok() for r in results], [True, True, False, True, False])
+        for r in results:
+            self.assertGreaterEqual(r.seconds, 0.0)
+            if r.ok():
+                self.assertEqual(r.dfa().transitions, Dfa(r.pattern).transitions)
+            else:
+                self.assertIsNone(r.dfa())
+        self.assertIn('Could not parse', results[2].error)
+        self.assertIn('Bad range', results[4].error)
+        self.assertTrue(results[1].dfa().matches('babb'))
+
+    def testSerial(self):
+        self.check(compile_many(patterns, workers=1))
+
+    def testPool(self):
+        self.check(compile_many(patterns, workers=2))
+
+    def testOptions(self):
+        rs = compile_many(['(a|b)*abb'], workers=1, method='followpos', optimize=True)
+        self.assertTrue(rs[0].dfa().matches('aabb'))
+        with self.assertRaises(Exception):
+            compile_many(['a'], method='nope')
+
+    def testBudget(self):
+        rs = compile_many(['(a|b)*a(a|b){12}', 'ab'], workers=1,
+                          budget=Budget(max_dfa_states=100))
+        self.assertFalse(rs[0].ok())
+        self.assertIn('BudgetExceeded', rs[0].error)
+        self.assertTrue(rs[1].ok())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#/usr/bin/python3
+
+# test_codegen.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import codegen
+
+from regex import *
+from codegen import *
+
+cases = [('abc(ab|cd*)*def', ['abcdef', 'abccdabcddef', 'abcababcdabceddef', 'abc']),
+         ('([0-9]{3,4}-?){3}', ['720-303-1234', '7203031234', '720303a1234']),
+         ('[a-z]+|[0-9]+', ['abcdefg', '1', '(432)', '']),
+         ('([◯-◿])+', ['◯◺◯◿◯', '◯x']),
+         ('a{0,3}', ['', 'aaa', 'aaaa'])]
+
+class TestCodegen(unittest.TestCase):
+
+    def testCharRanges(self):
+        self.assertEqual(char_ranges('abcxz0'), [(48, 48), (97, 99), (120, 120), (122, 122)])
+
+    def testSpecialize(self):
+        for rx, inputs in cases:
+            df = Dfa(rx)
+            fn = df.specialize()
+            for ins in inputs:
+                self.assertEqual(fn(ins), df.matches(ins), (rx, ins))
+
+    def testStateWithoutRow(self):
+        df = Dfa()
+        df.addTransition(Transition(0, 'a', 1))
+        df.addTransition(Transition(1, 'b', 2))
+        df.addTransition(Transition(2, 'c', 3))
+        df.addAcceptState(3)
+        df.addAcceptState(1)
+        fn = df.specialize()
+        self.assertTrue(fn('abc'))
+        self.assertTrue(fn('a'))
+        self.assertFalse(fn('abcc'))
+        self.assertFalse(fn('ab'))
+
+    def testSameDfaSameFunction(self):
+        self.assertIs(Dfa('ab*').specialize(), Dfa('ab*').specialize())
+        self.assertEqual(dfa_hash(Dfa('ab*')), dfa_hash(Dfa('ab*')))
+        self.assertNotEqual(dfa_hash(Dfa('ab*')), dfa_hash(Dfa('ab+')))
+
+    def testDiskCache(self):
+        df = Dfa('(xy|z)*q')
+        with tempfile.TemporaryDirectory() as d:
+            fn = specialize(df, d)
+            path = os.path.join(d, 'dfa_{}.py'.format(dfa_hash(df)))
+            self.assertTrue(os.path.exists(path))
+            codegen._compiled.clear()
+            self.assertTrue(specialize(df, d)('xyzq'))
+            self.assertFalse(fn('xyz'))
+
+    def testCorruptDiskCache(self):
+        df = Dfa('(xy|z)*q')
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'dfa_{}.py'.format(dfa_hash(df)))
+            src = to_python(df)
+            # Truncated, mangled, and for another Dfa
+            for bad in [src[:len(src) // 2], src.replace('state', 'sta te'),
+                        src.replace(dfa_hash(df), dfa_hash(Dfa('q')))]:
+                with open(path, 'w') as f:
+                    f.write(bad)
+                codegen._compiled.clear()
+                fn = specialize(df, d)
+                self.assertTrue(fn('xyzq'))
+                self.assertFalse(fn('xyz'))
+                with open(path) as f:
+                    self.assertEqual(f.read(), src)
+        codegen._compiled.clear()
+
+    @unittest.skipUnless(shutil.which('cc'), 'needs a C compiler')
+    def testCScanner(self):
+        df = Dfa('([0-9]{3}-){1,2}[0-9]{4}|◯+')
+        lines = ['720-303-1234', '303-1234', '12-1234', '◯◯', 'x']
+        with tempfile.TemporaryDirectory() as d:
+            src = os.path.join(d, 'scan.c')
+            exe = os.path.join(d, 'scan')
+            with open(src, 'w') as f:
+                f.write(df.to_c())
+            subprocess.check_call(['cc', '-std=c99', '-D_POSIX_C_SOURCE=200809L',
+                                   '-DDFA_MAIN', '-o', exe, src])
+            out = subprocess.run([exe], input='\n'.join(lines).encode('utf-8'),
+                                 stdout=subprocess.PIPE, check=True).stdout
+        self.assertEqual(out.decode('utf-8').split(),
+                         [l for l in lines if df.matches(l)])
+
+if __name__=='__main__':
+    unittest.main()
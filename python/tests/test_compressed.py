@@ -0,0 +1,63 @@
+#/usr/bin/python3
+
+# test_compressed.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from compressed import *
+
+class TestCompressed(unittest.TestCase):
+
+    def testNextState(self):
+        df = Dfa('abc|abd')
+        cd = df.compress()
+        for st, row in df.transitions.items():
+            for ch, ns in row.items():
+                self.assertEqual(cd.next_state(st, cd.columns[ch]), ns)
+
+    def testMatches(self):
+        cases = [('abc(ab|cd*)*def', ['abcdef', 'abccdabcddef', 'abcababcdabceddef', 'abc']),
+                 ('([0-9]{3,4}-?){3}', ['720-303-1234', '7203031234', '720303a1234']),
+                 ('([◯-◿])+', ['◯◺◯◿◯', '◯x']),
+                 ('a{0,3}', ['', 'aaa', 'aaaa'])]
+        for rx, inputs in cases:
+            df = Dfa(rx)
+            cd = df.compress()
+            for ins in inputs:
+                self.assertEqual(cd.matches(ins), df.matches(ins), (rx, ins))
+
+    def testMissingTransition(self):
+        df = Dfa()
+        df.addTransition(Transition(0, 'a', 1))
+        df.addTransition(Transition(1, 'b', 0))
+        df.addAcceptState(1)
+        cd = df.compress()
+        self.assertTrue(cd.matches('aba'))
+        self.assertFalse(cd.matches('aa'))
+        self.assertFalse(cd.matches('ac'))
+
+    def testSmallerThanDicts(self):
+        df = Dfa('[:alnum:]{4}-[:alnum:]{4}')
+        cd = df.compress()
+        report = cd.size_report(df)
+        self.assertEqual(report['states'], len(df.transitions))
+        self.assertLess(report['entries'], report['states'] * report['columns'])
+        self.assertLess(report['compressed_per_state'], report['dict_per_state'])
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#/usr/bin/python3
+
+# test_count.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import io
+import unittest
+
+from regex import *
+
+lines = ['abc\n', 'ab\n', 'abbbc\r\n', 'x\n', 'ac', '', 'abcx\n']
+
+class TestCount(unittest.TestCase):
+
+    def testDfa(self):
+        for m in dfa_methods:
+            df = Dfa('ab*c', method=m)
+            self.assertEqual(df.count(lines), 3, m)
+            self.assertEqual(df.first_index(lines), 0, m)
+            self.assertEqual(df.first_index(lines[1:]), 1, m)
+            self.assertEqual(list(df.matching_lines(lines)), [0, 2, 4], m)
+
+    def testNfa(self):
+        nf = Nfa('ab*c')
+        self.assertEqual(nf.count(lines), 3)
+        self.assertEqual(nf.first_index(lines[3:]), 1)
+        self.assertEqual(list(nf.matching_lines(lines)), [0, 2, 4])
+
+    def testNoMatch(self):
+        self.assertEqual(Dfa('q').count(lines), 0)
+        self.assertIsNone(Dfa('q').first_index(lines))
+        self.assertIsNone(Nfa('q').first_index(iter(lines)))
+
+    def testEmptyLine(self):
+        self.assertEqual(Dfa('a*').count(['\n', '', 'aa\n', 'b\n']), 3)
+        self.assertEqual(Nfa('a*').count(['\n', '', 'aa\n', 'b\n']), 3)
+
+    def testNewlineInPattern(self):
+        df = Dfa('a[:space:]b')
+        self.assertEqual(df.count(['a\nb\n', 'a b', 'ab\n']), 2)
+
+    def testStopsEarly(self):
+        # Lines are only read up to the first character that can't match
+        seen = []
+        class Line(str):
+            def __iter__(self):
+                for c in str.__iter__(self):
+                    seen.append(c)
+                    yield c
+        self.assertEqual(Dfa('ab').count([Line('xbbbbbbb\n')]), 0)
+        self.assertEqual(seen, ['x'])
+
+    def testFirstIndexStops(self):
+        def gen():
+            yield 'no\n'
+            yield 'ab\n'
+            raise Exception('read past the first match')
+        self.assertEqual(Dfa('ab').first_index(gen()), 1)
+        self.assertEqual(Nfa('ab').first_index(gen()), 1)
+
+    def testFile(self):
+        f = io.StringIO('abc\nab\nabbbc\r\nx\nac')
+        self.assertEqual(Dfa('ab*c').count(f), 3)
+
+    def testIgnorecase(self):
+        self.assertEqual(Dfa('ab*c', ignorecase=True).count(['ABC\n', 'abBc', 'x']), 2)
+        self.assertEqual(Nfa('ab*c', ignorecase=True).count(['ABC\n', 'abBc', 'x']), 2)
+
+    def testCategoryTerminators(self):
+        # [:Cc:] and [:space:] cover '\r' and '\n', which then have to be
+        # stripped instead of matched as line ends
+        lines = ['a\rb\n', 'a\rb', 'ab\n', 'a\tb\r\n', 'a\r\n', 'a\n\n', 'xy\r', 'a\x01b']
+        for rx in ['a[:Cc:]b', 'a[:Cc:]?', '[:L:]+', 'a[:C:]b', 'a[:space:]b', 'xy[:Cc:]*']:
+            for ignorecase in [False, True]:
+                df = Dfa(rx, ignorecase=ignorecase)
+                nf = Nfa(rx, ignorecase=ignorecase)
+                want = list(nf.matching_lines(lines))
+                self.assertEqual(list(df.matching_lines(lines)), want, (rx, ignorecase))
+                self.assertEqual(df.count(lines), nf.count(lines), rx)
+                self.assertEqual(df.first_index(lines), nf.first_index(lines), rx)
+        self.assertTrue(Dfa('a[:Cc:]b').matches('a\rb'))
+        self.assertEqual(Dfa('a[:Cc:]b').count(['a\rb\n']), 1)
+        self.assertEqual(Dfa('a[:Cc:]b').first_index(['ab\n', 'a\rb\n']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
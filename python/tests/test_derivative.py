@@ -0,0 +1,97 @@
+#/usr/bin/python3
+
+# test_derivative.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import gc
+import itertools
+import unittest
+
+from regex import *
+from derivative import *
+import derivative as derivative_module
+
+cases = ['abc|def', 'abc(ab|cd*)*def', '(abc+)+', '[a-c]+|[0-9]+',
+         '(abc*)+', '(abc){2}', 'a{2,3}', 'a{0,3}', '(a*)*b', 'ab|a',
+         '(a|b)*abb', '((a|b){1,2})*c', '(a?b?)*c?', '(a*b?){2,3}c']
+
+def term(rx):
+    return from_tree(parser.parse(rx))
+
+class TestDerivative(unittest.TestCase):
+
+    def testHashConsed(self):
+        self.assertIs(term('ab*|c'), term('c|ab*'))
+        self.assertIs(term('(ab)c'), term('a(bc)'))
+        self.assertIs(term('(a*)*'), term('a*'))
+        self.assertIs(alt([term('a'), EMPTY]), term('a'))
+
+    def testTermsCollected(self):
+        gc.collect()
+        before = len(derivative_module._terms)
+        for i in range(200):
+            Dfa('(a|b)*c{}d'.format('e' * i), method='derivative')
+        # The parser holds on to the last tree it built
+        parser.parse('a')
+        gc.collect()
+        self.assertLess(len(derivative_module._terms), before + 20)
+
+    def testDerivative(self):
+        self.assertIs(derivative(term('ab'), 'a'), term('b'))
+        self.assertIs(derivative(term('ab'), 'b'), EMPTY)
+        self.assertIs(derivative(term('a*'), 'a'), term('a*'))
+        self.assertIs(derivative(term('a{2,5}'), 'a'), term('a{1,4}'))
+        self.assertIs(derivative(term('a{1,5}'), 'a'), term('a{0,4}'))
+
+    def testCountsNotUnrolled(self):
+        t = term('[0-9]{1000}')
+        self.assertEqual(t.kind, 'rep')
+        self.assertEqual(len(leaf_sets(t)), 1)
+        m = DerivativeMatcher('[0-9]{1000}')
+        self.assertTrue(m.matches('7' * 1000))
+        self.assertFalse(m.matches('7' * 999))
+
+    def testCharClasses(self):
+        classes = char_classes(term('[a-z]+[0-9]|x'))
+        self.assertEqual(classes['b'], classes['q'])
+        self.assertNotEqual(classes['x'], classes['b'])
+        self.assertNotEqual(classes['1'], classes['b'])
+
+    def testLazyMatcher(self):
+        m = DerivativeMatcher('(a|b)*abb')
+        self.assertTrue(m.matches('babb'))
+        self.assertFalse(m.matches('babc'))
+        self.assertFalse(m.matches('bab'))
+        self.assertLessEqual(len(m.terms), 6)
+
+    def testSmallerDfa(self):
+        rx = '(a|b)*a(a|b){4}'
+        self.assertLessEqual(len(Dfa(rx, method='derivative').transitions),
+                             len(Dfa(rx).transitions))
+
+    def testMatchesThompson(self):
+        for rx in cases:
+            df = Dfa(rx)
+            ddf = Dfa(rx, method='derivative')
+            m = DerivativeMatcher(rx)
+            for n in range(6):
+                for t in itertools.product('abc', repeat=n):
+                    s = ''.join(t)
+                    self.assertEqual(df.matches(s), ddf.matches(s), (rx, s))
+                    self.assertEqual(df.matches(s), m.matches(s), (rx, s))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#/usr/bin/python3
+
+# test_disk_cache.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import os
+import tempfile
+import unittest
+
+from regex import *
+import disk_cache
+
+patterns = ['abc', '(a|b)*abb', '[:digit:]{3}-[:digit:]{4}', 'a{0,3}', '[^a]x']
+
+class TestDfaBytes(unittest.TestCase):
+
+    def testRoundTrip(self):
+        for rx in patterns:
+            df = Dfa(rx)
+            df2 = Dfa.from_bytes(df.to_bytes())
+            self.assertEqual(df2.start, df.start)
+            self.assertEqual(df2.accepting, df.accepting)
+            self.assertEqual(df2.transitions, df.transitions)
+
+    def testNonAscii(self):
+        df = Dfa('é+ü')
+        df2 = Dfa.from_bytes(df.to_bytes())
+        self.assertTrue(df2.matches('ééü'))
+        self.assertFalse(df2.matches('eü'))
+
+    def testEmpty(self):
+        df = Dfa.from_bytes(Dfa().to_bytes())
+        self.assertEqual(df.transitions, {})
+        self.assertEqual(df.accepting, set())
+
+    def testCorrupt(self):
+        data = bytearray(Dfa('(a|b)*abb').to_bytes())
+        with self.assertRaises(Exception):
+            Dfa.from_bytes(data[:-5])
+        with self.assertRaises(Exception):
+            Dfa.from_bytes(b'')
+        data[20] ^= 0xFF
+        with self.assertRaises(Exception):
+            Dfa.from_bytes(data)
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = set_cache_dir(self.tmp.name)
+
+    def tearDown(self):
+        set_cache_dir(None)
+        disable_stats()
+        self.tmp.cleanup()
+
+    def entries(self):
+        return [n for n in os.listdir(self.tmp.name) if n.endswith(disk_cache.SUFFIX)]
+
+    def testHit(self):
+        stats = enable_stats()
+        self.assertTrue(Dfa('(a|b)*abb').matches('aabb'))
+        self.assertTrue(Dfa('(a|b)*abb').matches('babb'))
+        self.assertEqual(stats.counters['disk_cache_misses'], 1)
+        self.assertEqual(stats.counters['disk_cache_hits'], 1)
+        self.assertEqual(len(self.entries()), 1)
+
+    def testOptionsInKey(self):
+        Dfa('ab*')
+        Dfa('ab*', method='followpos')
+        Dfa('ab*', optimize=True)
+        self.assertEqual(len(self.entries()), 3)
+        self.assertNotEqual(disk_cache.cache_key('ab*'), disk_cache.cache_key('ab+'))
+
+    def testReMatch(self):
+        self.assertTrue(re_match('a[:digit:]+', 'a12', use_dfa=True))
+        self.assertFalse(re_match('a[:digit:]+', 'a', use_dfa=True))
+        self.assertEqual(len(self.entries()), 1)
+        # The Nfa path never builds a Dfa, cached or not
+        self.assertTrue(re_match('(a|b)*a(a|b){3}', 'abbb'))
+        self.assertEqual(len(self.entries()), 1)
+
+    def testBudgetOnHit(self):
+        rx = '(a|b)*a(a|b){6}'
+        with self.assertRaises(BudgetExceeded):
+            Dfa(rx, Budget(max_dfa_states=50))
+        Dfa(rx)
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa(rx, Budget(max_dfa_states=50))
+        self.assertEqual(cm.exception.stage, 'load')
+        self.assertTrue(Dfa(rx, Budget(max_dfa_states=1000)).matches('abbbbbb'))
+
+    def testCorruptEntry(self):
+        Dfa('abc')
+        path = os.path.join(self.tmp.name, self.entries()[0])
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        self.assertTrue(Dfa('abc').matches('abc'))
+        self.assertEqual(Dfa.from_bytes(open(path, 'rb').read()).transitions,
+                         Dfa('abc').transitions)
+
+    def testEviction(self):
+        size = len(compile_dfa('a').to_bytes())
+        self.cache.max_bytes = size * 3
+        for i, rx in enumerate(['a', 'b', 'c', 'd', 'e']):
+            Dfa(rx)
+            # Give each entry a distinct age
+            os.utime(self.cache.path(disk_cache.cache_key(rx)), (i, i))
+        self.cache.evict()
+        self.assertLessEqual(len(self.entries()), 3)
+        self.assertIn(disk_cache.cache_key('e') + disk_cache.SUFFIX, self.entries())
+
+    def testParseTreeNotCached(self):
+        Dfa(parser.parse('ab'))
+        self.assertEqual(self.entries(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#/usr/bin/python3
+
+# test_export.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import io
+import json
+import unittest
+
+from regex import *
+from export import *
+
+def written(fn, fa, **options):
+    out = io.StringIO()
+    fn(fa, out, **options)
+    return out.getvalue()
+
+class TestExport(unittest.TestCase):
+
+    def testDot(self):
+        df = Dfa('(a|b)*abb')
+        self.assertEqual(written(write_dot, df), df.to_dot())
+        self.assertTrue(df.to_dot().startswith('digraph { rankdir = LR; "0" -> '))
+        nf = Nfa('a|b')
+        self.assertIn('[label="&epsilon;"]', nf.to_dot())
+
+    def testDotQuotes(self):
+        nf = Nfa()
+        nf.addTransition(Transition(0, '"', 1))
+        self.assertIn('[label="\\""]', nf.to_dot())
+
+    def testCollapse(self):
+        df = Dfa('[a-z0-9]x')
+        dot = df.to_dot(collapse=True)
+        self.assertIn('"0" -> "1" [label="[0-9a-z]"];', dot)
+        self.assertNotIn('label="q"', dot)
+        nf = Nfa('[a-c]|d')
+        self.assertIn('[label="[a-c]"]', nf.to_dot(collapse=True))
+        self.assertIn('[label="&epsilon;"]', nf.to_dot(collapse=True))
+        self.assertIn('[label="d"]', nf.to_dot(collapse=True))
+
+    def testClassLabel(self):
+        self.assertEqual(class_label(['a']), 'a')
+        self.assertEqual(class_label(['c', 'a', 'b', 'x']), '[a-cx]')
+        self.assertEqual(class_label(['a', 'b']), '[ab]')
+        self.assertEqual(class_label(['-', ']']), '[\\-\\]]')
+        self.assertEqual(class_label([':Lu:', 'a']), '[a:Lu:]')
+
+    def testCap(self):
+        nf = Nfa('abcdefgh')
+        keep = neighborhood(nf, 4, 3)
+        self.assertEqual(keep, {3, 4, 5})
+        dot = nf.to_dot(around=4, max_states=3)
+        self.assertIn('"3" -> "4" [label="d"];', dot)
+        self.assertIn('"4" -> "5" [label="e"];', dot)
+        self.assertNotIn('"2" -> "3"', dot)
+        self.assertNotIn('nothing', dot)
+        self.assertIn('nothing->"0"', nf.to_dot(max_states=2))
+        self.assertEqual(len(neighborhood(Dfa('abcdefgh'), 0, 4)), 4)
+
+    def testJson(self):
+        nf = Nfa('ab')
+        data = json.loads(written(write_json, nf))
+        self.assertEqual(data['type'], 'nfa')
+        self.assertEqual(data['start'], 0)
+        self.assertEqual(data['accepting'], sorted(nf.accepting))
+        self.assertEqual(data['edges'], [[0, 'a', 1], [1, 'b', 2]])
+        data = json.loads(written(write_json, Dfa('[ab]c'), collapse=True))
+        self.assertIn('[ab]', [ch for st, ch, ns in data['edges'] if st == 0])
+
+    def testEdgeList(self):
+        nf = Nfa('a[:space:]')
+        lines = written(write_edges, nf).splitlines()
+        self.assertEqual(lines[0], 'nfa start=0 accepting=2')
+        self.assertIn('0\t1\ta', lines)
+        self.assertIn('1\t2\t\\n', lines)
+        self.assertIn('1\t2\t\\x0b', lines)
+        self.assertTrue(all(len(line.split('\t')) == 3 for line in lines[1:]))
+
+    def testFrozen(self):
+        for fa in [Nfa('a|b*c'), Dfa('a|b*c')]:
+            for fn in [write_dot, write_json, write_edges]:
+                self.assertEqual(written(fn, fa.freeze()), written(fn, fa))
+        self.assertEqual(json.loads(written(write_json, Nfa('ab').freeze()))['type'], 'nfa')
+
+    def testStreams(self):
+        # Each edge is its own write, nothing is built up in memory
+        class Counter(object):
+            writes = 0
+            def write(self, s):
+                self.writes += 1
+        out = Counter()
+        df = Dfa('[a-z]{3}')
+        write_dot(df, out)
+        self.assertGreater(out.writes, sum(len(row) for row in df.transitions.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#/usr/bin/python3
+
+# test_followpos.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import itertools
+import unittest
+
+from regex import *
+from followpos import *
+
+cases = ['abc|def', 'abc(ab|cd*)*def', '(abc+)+', '[a-c]+|[0-9]+',
+         '(abc*)+', '(abc){2}', 'a{2,3}', 'a{0,3}', '(a*)*b', 'ab|a',
+         '(a|b)*abb', '((a|b){1,2})*c', '(a?b?)*c?']
+
+class TestFollowpos(unittest.TestCase):
+
+    # Example 3.35 from the Dragon book, (a|b)*abb#
+    def testDragonExample(self):
+        pos = Positions(parser.parse('(a|b)*abb'))
+        self.assertEqual(pos.first, {0, 1, 2})
+        self.assertEqual(pos.follow, [{0, 1, 2}, {0, 1, 2}, {3}, {4}, {5}, set()])
+        self.assertEqual(pos.end, 5)
+
+        # Figure 3.63 has four states, plus the dead state
+        df = Dfa('(a|b)*abb', method='followpos')
+        self.assertEqual(len(df.transitions), 4)
+        self.assertEqual(len(df.accepting), 1)
+
+    def testNullable(self):
+        pos = Positions(parser.parse('a{0,2}'))
+        self.assertEqual(pos.first, {0, 1, 2})
+
+    def testUnknownMethod(self):
+        self.assertRaises(Exception, Dfa, 'a', method='nope')
+
+    def testBudget(self):
+        self.assertRaises(BudgetExceeded, Dfa, '(a|b)*a(a|b){6}',
+                          Budget(max_dfa_states=10), method='followpos')
+
+    def testMatchesThompson(self):
+        for rx in cases:
+            df = Dfa(rx)
+            fdf = Dfa(rx, method='followpos')
+            odf = Dfa(rx, method='followpos', optimize=True)
+            for n in range(6):
+                for t in itertools.product('abc', repeat=n):
+                    s = ''.join(t)
+                    self.assertEqual(df.matches(s), fdf.matches(s), (rx, s))
+                    self.assertEqual(df.matches(s), odf.matches(s), (rx, s))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#/usr/bin/python3
+
+# test_frozen.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import threading
+import unittest
+
+from regex import *
+from frozen import *
+from benchmarks.corpus import corpus, random_lines
+
+class TestFrozen(unittest.TestCase):
+
+    def testSameAnswers(self):
+        lines = random_lines(200, 'abcd0123-', 0, 12)
+        for rx, inputs in corpus:
+            df = Dfa(rx)
+            nf = Nfa(rx)
+            fdf = df.freeze()
+            fnf = nf.freeze()
+            for ins in inputs + lines:
+                want = df.matches(ins)
+                self.assertEqual(fdf.matches(ins), want, (rx, ins))
+                self.assertEqual(fnf.matches(ins), want, (rx, ins))
+
+    def testImmutable(self):
+        for fa in [Dfa('ab').freeze(), Nfa('ab').freeze()]:
+            with self.assertRaises(AttributeError):
+                fa.start = 1
+            with self.assertRaises(AttributeError):
+                fa.extra = 1
+            with self.assertRaises(TypeError):
+                fa.transitions[0] = {}
+            with self.assertRaises(AttributeError):
+                fa.addTransition(Transition(0, 'x', 1))
+            self.assertIs(fa.freeze(), fa)
+
+    def testReadOnlyRows(self):
+        fdf = Dfa('ab').freeze()
+        self.assertIs(fdf.rows, fdf.transitions)
+        with self.assertRaises(TypeError):
+            fdf.rows[0] = {}
+        with self.assertRaises(TypeError):
+            fdf.rows[fdf.start]['x'] = 1
+        self.assertTrue(fdf.matches('ab'))
+
+    def testSameTransitions(self):
+        for rx, inputs in corpus:
+            df = Dfa(rx)
+            fdf = df.freeze()
+            self.assertEqual(dict((st, dict(row)) for st, row in fdf.transitions.items()),
+                             df.transitions)
+
+    def testCopy(self):
+        df = Dfa('ab')
+        fdf = df.freeze()
+        df.transitions.clear()
+        df.accepting.clear()
+        self.assertTrue(fdf.matches('ab'))
+
+    def testFlags(self):
+        self.assertTrue(Dfa('ab', ignorecase=True).freeze().matches('AB'))
+        self.assertTrue(Nfa('[:L:]+').freeze().matches('héllo'))
+        self.assertFalse(Nfa('[:L:]+').freeze().matches('h1'))
+
+    def testCacheLimit(self):
+        fnf = FrozenNfa(Nfa('(a|b)*a(a|b){4}'), max_cached=5)
+        self.assertTrue(fnf.matches('abbbaabab'))
+        self.assertLessEqual(len(fnf.moves), 5)
+
+    def testMatchMany(self):
+        texts = random_lines(1000, 'ab', 1, 10)
+        for fa in [Dfa('(a|b)*abb'), Nfa('(a|b)*abb')]:
+            want = [fa.matches(t) for t in texts]
+            self.assertEqual(match_many(fa, texts, workers=1), want)
+            self.assertEqual(match_many(fa, texts, workers=8, chunksize=7), want)
+        self.assertEqual(match_many(Dfa('a'), []), [])
+
+    def testSharedCaches(self):
+        # Many threads filling the same caches get the same answers
+        fnf = Nfa('([:digit:]{3}-){1,2}[:digit:]{4}').freeze()
+        texts = random_lines(300, '0123456789-', 4, 14, seed=3)
+        want = [Nfa('([:digit:]{3}-){1,2}[:digit:]{4}').matches(t) for t in texts]
+        start = threading.Barrier(8)
+        results = []
+        def run():
+            start.wait()
+            results.append([fnf.matches(t) for t in texts])
+        threads = [threading.Thread(target=run) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [want] * 8)
+
+if __name__ == '__main__':
+    unittest.main()
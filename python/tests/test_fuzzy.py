@@ -0,0 +1,79 @@
+#/usr/bin/python3
+
+# test_fuzzy.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from fuzzy import *
+from benchmarks.corpus import random_lines
+
+def levenshtein(s, t):
+    row = list(range(len(t) + 1))
+    for i, a in enumerate(s):
+        prev, row[0] = row[0], i + 1
+        for j, b in enumerate(t):
+            prev, row[j+1] = row[j+1], min(row[j+1] + 1, row[j] + 1, prev + (a != b))
+    return row[-1]
+
+# Every string of at most n characters that rx matches
+def language(rx, n):
+    df = Dfa(rx)
+    alphabet = sorted(df.get_alphabet())
+    rv = []
+    level = ['']
+    for i in range(n + 1):
+        rv.extend(w for w in level if df.matches(w))
+        level = [w + c for w in level for c in alphabet]
+    return rv
+
+class TestFuzzy(unittest.TestCase):
+
+    def testBruteForce(self):
+        for rx in ['abc', '(ab)*', 'a(b|c)*d', '(a|b)*a(a|b)', 'ab{2,3}c?']:
+            words = language(rx, 7)
+            nf = Nfa(rx)
+            for text in random_lines(60, 'abcdx', 0, 4, seed=5):
+                want = min(levenshtein(text, w) for w in words)
+                for k in range(4):
+                    self.assertEqual(nf.edit_distance(text, k), want if want <= k else None,
+                                     (rx, text, k))
+
+    def testIndicators(self):
+        nf = Nfa('malware[0-9]{2}-c2')
+        self.assertTrue(nf.fuzzy_matches('malware12-c2', 0))
+        self.assertFalse(nf.fuzzy_matches('malwar12-c2', 0))
+        self.assertTrue(nf.fuzzy_matches('malwar12-c2'))
+        self.assertTrue(nf.fuzzy_matches('mallware12-c2'))
+        self.assertTrue(nf.fuzzy_matches('nalware12-c2'))
+        self.assertFalse(nf.fuzzy_matches('xmalware123-c2'))
+        self.assertEqual(nf.edit_distance('xmalware123-c2', 3), 2)
+        self.assertIsNone(nf.edit_distance('benign', 3))
+
+    def testFlags(self):
+        self.assertEqual(Nfa('hello', ignorecase=True).edit_distance('HELO', 1), 1)
+        self.assertEqual(Nfa('[:Lu:][:Nd:]').edit_distance('Ä٣x', 1), 1)
+        self.assertEqual(Nfa('[:Lu:][:Nd:]').edit_distance('ä', 2), 2)
+
+    def testEmptyLanguageEdges(self):
+        self.assertEqual(Nfa('(ab)*').edit_distance('', 0), 0)
+        self.assertEqual(Nfa('abc').edit_distance('', 3), 3)
+        self.assertIsNone(Nfa('abc').edit_distance('', 2))
+        self.assertEqual(Nfa('a').edit_distance('zzzz', 4), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#/usr/bin/python3
+
+# test_grep.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from regex import *
+from grep import *
+import grep
+
+class TestGrep(unittest.TestCase):
+    text = 'abc\nabd\r\nxyz\n' + 'a' * 50 + '\nhéllo\nabc'
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'in.txt')
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(self.text)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_grep(self, args, stdin=b''):
+        out = io.BytesIO()
+        err = io.StringIO()
+        status = grep.main(args, io.BytesIO(stdin), out, err)
+        return (status, out.getvalue().decode('utf-8'), err.getvalue())
+
+    def testBlocks(self):
+        data = self.text.encode('utf-8')
+        for size in [1, 7, 64, 1 << 20]:
+            with open(self.path, 'rb') as f:
+                parts = list(mmap_blocks(f, size))
+            self.assertTrue(all(isinstance(p, memoryview) for p in parts))
+            self.assertEqual(b''.join(parts), data)
+            self.assertTrue(all(p[-1:] == b'\n' for p in parts[:-1]))
+            del parts
+            parts = list(stream_blocks(io.BytesIO(data), size))
+            self.assertEqual(b''.join(parts), data)
+            self.assertTrue(all(p.endswith(b'\n') for p in parts[:-1]))
+        with open(os.path.join(self.dir, 'empty'), 'wb') as f:
+            pass
+        with open(os.path.join(self.dir, 'empty'), 'rb') as f:
+            self.assertEqual(list(blocks(f, 10)), [])
+
+    def testLines(self):
+        want = 'abc\nabd\r\nabc\n'
+        for engine in grep_engines:
+            for size in [5, 1 << 20]:
+                args = ['--engine', engine, '--block-size', str(size), 'ab(c|d)', self.path]
+                self.assertEqual(self.run_grep(args), (0, want, ''), (engine, size))
+
+    def testStdin(self):
+        data = self.text.encode('utf-8')
+        self.assertEqual(self.run_grep(['-i', 'HÉLLO|XYZ'], data), (0, 'xyz\nhéllo\n', ''))
+        self.assertEqual(self.run_grep(['a+', '-'], data), (0, 'a' * 50 + '\n', ''))
+
+    def testCount(self):
+        self.assertEqual(self.run_grep(['-c', '-e', 'abc', '-e', 'x+', self.path]),
+                         (0, '2\n', ''))
+        status, out, err = self.run_grep(['-c', '[:L:]+', self.path, self.path])
+        self.assertEqual(out, '{0}:6\n{0}:6\n'.format(self.path))
+        self.assertEqual(self.run_grep(['-c', 'q', self.path]), (1, '0\n', ''))
+
+    def testPrefix(self):
+        status, out, err = self.run_grep(['xyz', self.path, self.path])
+        self.assertEqual(out, '{0}:xyz\n{0}:xyz\n'.format(self.path))
+
+    def testErrors(self):
+        status, out, err = self.run_grep(['abc', os.path.join(self.dir, 'missing'), self.path])
+        self.assertEqual((status, out), (2, '{0}:abc\n{0}:abc\n'.format(self.path)))
+        self.assertIn('missing', err)
+        status, out, err = self.run_grep(['(ab', self.path])
+        self.assertEqual(status, 2)
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            self.run_grep([])
+
+    def testStats(self):
+        status, out, err = self.run_grep(['--stats', '--engine', 'dfa', 'abc', self.path])
+        self.assertEqual(out, 'abc\nabc\n')
+        self.assertIn('engine: dfa', err)
+        self.assertIn('lines: 6', err)
+        self.assertIn('matches: 2', err)
+        self.assertIn('throughput', err)
+        self.assertIsNone(get_stats())
+
+    def testOutputBatching(self):
+        f = io.BytesIO()
+        out = Output(f, batch_size=10)
+        for i in range(25):
+            out.write(b'x')
+        out.flush()
+        self.assertEqual(f.getvalue(), b'x' * 25)
+        self.assertEqual(out.writes, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#/usr/bin/python3
+
+# test_ignorecase.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from pattern_set import PatternSet
+
+def edges(df):
+    return sum(len(row) for row in df.transitions.values())
+
+class TestIgnoreCase(unittest.TestCase):
+
+    def testMatches(self):
+        for m in dfa_methods:
+            df = Dfa('ab(c|d)*', method=m, ignorecase=True)
+            self.assertTrue(df.matches('AbCdc'), m)
+            self.assertTrue(df.matches('ab'), m)
+            self.assertFalse(df.matches('AbE'), m)
+        self.assertTrue(Nfa('[A-F]+x', ignorecase=True).matches('aBfX'))
+        self.assertTrue(re_match('HeLLo', 'hello', ignorecase=True))
+        self.assertTrue(re_match('HeLLo', 'HELLO', use_dfa=True, ignorecase=True))
+        self.assertFalse(re_match('HeLLo', 'hello'))
+
+    def testSameSize(self):
+        for rx, lower in [('aBc', 'abc'), ('[A-Z]+x', '[a-z]+x'),
+                          ('[a-zA-Z][:alpha:]*', '[a-z][a-z]*')]:
+            df = Dfa(rx, ignorecase=True)
+            plain = Dfa(lower)
+            self.assertEqual(df.transitions, plain.transitions)
+            self.assertEqual(df.accepting, plain.accepting)
+
+    def testOptimize(self):
+        df = Dfa('(ab|aC)*', optimize=True, ignorecase=True)
+        self.assertTrue(df.matches('ABac'))
+
+    def testBytes(self):
+        df = Dfa.from_bytes(Dfa('xY', ignorecase=True).to_bytes())
+        self.assertTrue(df.ignorecase)
+        self.assertTrue(df.matches('XY'))
+
+class TestCategories(unittest.TestCase):
+
+    def testLetters(self):
+        for m in dfa_methods:
+            df = Dfa('[:L:]+', method=m)
+            self.assertTrue(df.matches('héllo'), m)
+            self.assertTrue(df.matches('Ωmega'), m)
+            self.assertFalse(df.matches('abc1'), m)
+            self.assertFalse(df.matches(''), m)
+        self.assertTrue(Nfa('[:L:]+').matches('日本'))
+
+    def testNoBlowup(self):
+        df = Dfa('[:L:]+')
+        ascii = Dfa('[:alpha:]+')
+        self.assertEqual(len(df.transitions), len(ascii.transitions))
+        self.assertEqual(len(df.get_alphabet()), 5)
+        self.assertLess(edges(df), edges(ascii))
+
+    def testDigits(self):
+        df = Dfa('[:Nd:]{3}')
+        self.assertTrue(df.matches('123'))
+        self.assertTrue(df.matches('١٢٣'))
+        self.assertFalse(df.matches('12x'))
+
+    def testOverlap(self):
+        # 'a' has an edge of its own and is also in [:Ll:]
+        rx = 'a[:Nd:]|[:Ll:]b'
+        for m in dfa_methods:
+            df = Dfa(rx, method=m)
+            for ins, want in [('a1', True), ('ab', True), ('zb', True),
+                              ('éb', True), ('z1', False), ('Ab', False)]:
+                self.assertEqual(df.matches(ins), want, (m, ins))
+        self.assertTrue(Nfa(rx).matches('ab'))
+        self.assertFalse(Nfa(rx).matches('z1'))
+
+    def testCaseCategory(self):
+        df = Dfa('[:Lu:]x', ignorecase=True)
+        self.assertTrue(df.matches('ax'))
+        self.assertTrue(df.matches('AX'))
+        self.assertFalse(Dfa('[:Lu:]x').matches('ax'))
+
+    def testConsumers(self):
+        df = Dfa('[:Lu:][:Ll:]*')
+        self.assertTrue(df.compress().matches('Émile'))
+        self.assertFalse(df.compress().matches('émile'))
+        self.assertEqual(df.advance(df.start, 'Ab'), df.advance(df.start, 'Éz'))
+        ps = PatternSet(['[:Lu:][:Ll:]*', 'x+'])
+        self.assertEqual(ps.matches('Émile'), {0})
+        with self.assertRaises(Exception):
+            df.to_python()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#/usr/bin/python3
+
+# test_memory.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import gc
+import sys
+import unittest
+
+from regex import *
+from pattern_set import PatternSet
+
+class TestMemoryReport(unittest.TestCase):
+
+    def checkReport(self, report, components):
+        self.assertEqual(set(report), set(components) | {'total'})
+        self.assertEqual(report['total'], sum(v for k, v in report.items() if k != 'total'))
+        # The caches of an Nfa fill as it is used
+        self.assertTrue(all(v > 0 for k, v in report.items() if k != 'caches'), report)
+
+    def testAutomata(self):
+        rx = '(a|b)*abb[:L:]'
+        common = ['symbols', 'transitions', 'accepting', 'caches']
+        df = Dfa(rx)
+        nf = Nfa(rx)
+        self.checkReport(df.memory_report(), common)
+        self.checkReport(nf.memory_report(), common)
+        self.checkReport(df.compress().memory_report(), common)
+        self.checkReport(df.freeze().memory_report(), common)
+        self.checkReport(nf.freeze().memory_report(), common)
+        self.checkReport(nf.sparse().memory_report(), common + ['state_sets'])
+
+    def testTransitions(self):
+        df = Dfa('[a-z]+[0-9]{2}')
+        report = df.memory_report()
+        self.assertEqual(report['transitions'] + report['symbols'],
+                         deep_sizeof(df.transitions))
+        # States in accepting are already counted under transitions
+        self.assertEqual(report['accepting'], sys.getsizeof(df.accepting))
+
+    def testCompressedIsExact(self):
+        cd = Dfa('[a-z]+[0-9]{2}').compress()
+        report = cd.memory_report()
+        arrays = sum(sys.getsizeof(a) for a in (cd.base, cd.default, cd.next, cd.check))
+        self.assertEqual(report['transitions'] + report['symbols'],
+                         arrays + deep_sizeof(cd.columns))
+        self.assertEqual(report['accepting'], sys.getsizeof(cd.accepting))
+
+    def testCaches(self):
+        nf = Nfa('malware[0-9]{2}')
+        before = nf.memory_report()['caches']
+        nf.fuzzy_matches('malwar12')
+        self.assertGreater(nf.memory_report()['caches'], before)
+
+        ps = PatternSet(['abc', '[0-9]+'])
+        before = ps.memory_report()
+        ps.matches('12345')
+        after = ps.memory_report()
+        self.assertGreater(after['caches'], before['caches'])
+        self.assertEqual(after['transitions'], before['transitions'])
+        one = Dfa('abc').memory_report()
+        self.assertGreater(after['transitions'], one['transitions'])
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def tearDown(self):
+        set_memory_budget(None)
+
+    def testRefuse(self):
+        budget = set_memory_budget(5000)
+        self.assertIs(get_memory_budget(), budget)
+        with self.assertRaises(BudgetExceeded) as cm:
+            Dfa('[a-z]{8}')
+        self.assertEqual(cm.exception.limit, 'memory')
+        gc.collect()
+        self.assertEqual(budget.used, 0)
+
+    def testCharges(self):
+        budget = set_memory_budget(1 << 30)
+        df = Dfa('(a|b)*abb')
+        nf = Nfa('(a|b)*abb')
+        self.assertEqual(budget.used, df.memory_report()['total'] + nf.memory_report()['total'])
+        data = df.to_bytes()
+        loaded = Dfa.from_bytes(data)
+        self.assertGreater(budget.used, df.memory_report()['total'] + nf.memory_report()['total'])
+        del df, nf, loaded
+        gc.collect()
+        self.assertEqual(budget.used, 0)
+
+    def testPatternSet(self):
+        ps = PatternSet(['abc'])
+        # Compiling holds the Nfa and the Dfa built from it at once
+        peak = Nfa('abc').memory_report()['total'] + Dfa('abc').memory_report()['total']
+        budget = set_memory_budget(MemoryBudget(peak + 100))
+        ps.add('abd')
+        with self.assertRaises(BudgetExceeded):
+            ps.add('[a-z]{5}[0-9]{5}')
+        self.assertEqual(len(ps), 2)
+
+    def testDerived(self):
+        nf = Nfa('(a|b)*a(a|b){8}')
+        set_memory_budget(nf.memory_report()['total'] + 1000)
+        with self.assertRaises(BudgetExceeded) as cm:
+            nf.to_dfa()
+        self.assertEqual(cm.exception.stage, 'subset')
+        self.assertEqual(cm.exception.limit, 'memory')
+        df = Dfa('ab*')
+        for make in [df.freeze, df.compress, Nfa('ab*').freeze, Nfa('ab*').sparse,
+                     lambda: df.intersection(Dfa('a*b')),
+                     lambda: Dfa('ab*', method='followpos'),
+                     lambda: Dfa('ab*', method='derivative')]:
+            set_memory_budget(1 << 30)
+            fa = make()
+            self.assertGreaterEqual(get_memory_budget().used, fa.memory_report()['total'])
+            set_memory_budget(10)
+            self.assertRaises(BudgetExceeded, make)
+
+    def testCustomPolicy(self):
+        charged = []
+        class Logged(MemoryBudget):
+            def charge(self, owner, nbytes, stage):
+                charged.append((type(owner).__name__, stage))
+                MemoryBudget.charge(self, owner, nbytes, stage)
+        set_memory_budget(Logged(1 << 30))
+        Dfa('ab')
+        self.assertIn(('Dfa', 'dfa'), charged)
+        set_memory_budget(None)
+        charged[:] = []
+        Dfa('ab')
+        self.assertEqual(charged, [])
+
+if __name__ == '__main__':
+    unittest.main()
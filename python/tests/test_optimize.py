@@ -0,0 +1,107 @@
+#/usr/bin/python3
+
+# test_optimize.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import itertools
+import unittest
+
+from regex import *
+from optimize import *
+
+cases = ['abc|def', 'abc(ab|cd*)*def', '(abc+)+', '[a-c]+|[0-9]+',
+         '(abc*)+', '(abc){2}', 'a{2,3}', 'a{0,3}', '(a*)*b', '(ab|ac)|ad',
+         'ab|a', 'a|b|c', '(a|b)*abb', '((a|b){1,2})*c']
+
+def all_strings(alphabet, n):
+    for i in range(n+1):
+        for t in itertools.product(alphabet, repeat=i):
+            yield ''.join(t)
+
+class TestOptimize(unittest.TestCase):
+
+    def testCollapseClosures(self):
+        pt, reports = optimize_tree(parser.parse('(a*)*'))
+        self.assertEqual(str(pt), '(a)*')
+        self.assertLess(reports[0].states_after, reports[0].states_before)
+        self.assertEqual(str(rewrite(parser.parse('(a?)*'), collapse_closures)), '(a)*')
+
+    def testMergeCharsets(self):
+        self.assertEqual(str(rewrite(parser.parse('a|b|c'), merge_charsets)), '[abc]')
+
+    def testFactorPrefixes(self):
+        self.assertEqual(str(rewrite(parser.parse('abc|abd'), factor_prefixes)),
+                         'ab(c)|(d)')
+        self.assertEqual(str(rewrite(parser.parse('ab|a'), factor_prefixes)),
+                         'a(b){0,1}')
+        self.assertEqual(str(rewrite(parser.parse('ab|ab'), factor_prefixes)), 'ab')
+
+    def testRemoveEpsilons(self):
+        nf = remove_epsilons(Nfa('a*|b'))
+        self.assertNotIn('_eps', nf.get_alphabet().union(
+            *[set(row) for row in nf.transitions.values()]))
+
+    def testRemoveUseless(self):
+        nf = Nfa()
+        nf.addTransitions([Transition(0, 'a', 1), Transition(0, 'b', 2),
+                           Transition(3, 'a', 1)])
+        nf.setAccepting(1)
+        nf = remove_useless(nf)
+        self.assertEqual(nfa_states(nf), {0, 1})
+
+    def testMergeEquivalent(self):
+        nf = Nfa()
+        nf.addTransitions([Transition(0, 'a', 1), Transition(0, 'b', 2),
+                           Transition(1, 'c', 3), Transition(2, 'c', 4)])
+        nf.accepting = {3, 4}
+        nf = merge_equivalent(nf)
+        self.assertEqual(len(nfa_states(nf)), 3)
+        self.assertTrue(nf.matches('bc'))
+
+    def testReports(self):
+        nf, reports = optimize('(a|b)*abb')
+        self.assertEqual([r.name for r in reports],
+                         [n for n, f in tree_passes] + [n for n, f in nfa_passes])
+        self.assertLess(reports[-1].states_after, reports[3].states_before)
+        self.assertEqual(nf.start, 0)
+
+    def testEquivalent(self):
+        for rx in cases:
+            nf = Nfa(rx)
+            onf = optimize(rx)[0]
+            odf = Dfa(rx, optimize=True)
+            for s in all_strings('abcd', 5):
+                self.assertEqual(nf.matches(s), onf.matches(s), (rx, s))
+                self.assertEqual(nf.matches(s), odf.matches(s), (rx, s))
+
+    def testIgnorecase(self):
+        for rx in ['ab|aC', '(a|b)*abb']:
+            nf = Nfa(rx, ignorecase=True)
+            for onf in [optimize(rx, ignorecase=True)[0], optimize_nfa(nf)[0]]:
+                self.assertTrue(onf.ignorecase)
+                for s in list(all_strings('abAB', 4)) + ['AC', 'ac']:
+                    self.assertEqual(onf.matches(s), nf.matches(s), (rx, s))
+
+    def testCategories(self):
+        for rx in ['[:L:]', '[:Lu:]x|[:digit:]+']:
+            nf = Nfa(rx)
+            onf = optimize(rx)[0]
+            self.assertTrue(onf.categories)
+            for s in ['a', 'É', 'Éx', 'ax', '12', '1a', '']:
+                self.assertEqual(onf.matches(s), nf.matches(s), (rx, s))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#/usr/bin/python3
+
+# test_parse_tree.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import pickle
+import unittest
+
+from regex import *
+
+class TestParseTree(unittest.TestCase):
+
+    def testInterned(self):
+        self.assertIs(PTCharSet('a-c'), PTCharSet('abc'))
+        self.assertIs(PTClosure(PTCharSet('a')), PTClosure(PTCharSet('a')))
+        self.assertIs(PTCount(PTCharSet('a'), '2', 3), PTCount(PTCharSet('a'), 2, 3))
+        self.assertIsNot(PTCount(PTCharSet('a'), 2, 3), PTCount(PTCharSet('a'), 2, 4))
+        self.assertIsNot(PTAlternation(PTCharSet('a'), PTCharSet('b')),
+                         PTConcatenation(PTCharSet('a'), PTCharSet('b')))
+
+    def testSharedAcrossPatterns(self):
+        one = parser.parse('x[:digit:]{3}')
+        two = parser.parse('y[:digit:]{3}')
+        self.assertIs(one.right, two.right)
+        self.assertIs(parser.parse('(ab)+'), parser.parse('(ab)(ab)*'))
+
+    def testImmutable(self):
+        pt = PTCharSet('a')
+        with self.assertRaises(AttributeError):
+            pt.cset = frozenset('b')
+        with self.assertRaises(AttributeError):
+            pt.extra = 1
+        with self.assertRaises(AttributeError):
+            del PTClosure(pt).child
+
+    def testHashable(self):
+        pts = {PTCharSet('a'), PTCharSet('a'), PTCharSet('b')}
+        self.assertEqual(len(pts), 2)
+
+    def testPickle(self):
+        pt = parser.parse('a(b|c)*d{2,3}')
+        self.assertIs(pickle.loads(pickle.dumps(pt)), pt)
+
+    def testFragmentShared(self):
+        child = parser.parse('[:digit:]{3}')
+        pt = parser.parse('[:digit:]{3}-[:digit:]{3}')
+        nf = Nfa(pt)
+        self.assertIn('thompson', child._memo)
+        self.assertTrue(nf.matches('123-456'))
+        self.assertFalse(nf.matches('123-45'))
+
+    def testFragmentShifted(self):
+        pt = parser.parse('ab*')
+        ns, trans = pt.getTransitions(0)
+        ns5, trans5 = pt.getTransitions(5)
+        self.assertEqual(ns5, ns + 5)
+        self.assertEqual(sorted((os + 5, ch, ts + 5) for os, ch, ts in trans),
+                         sorted(tuple(t) for t in trans5))
+
+    def testNestedPlus(self):
+        # Each + doubles the size of the tree, but the shared nodes are only
+        # visited once
+        pt = parser.parse('(' * 30 + 'a' + ')+' * 30)
+        self.assertGreater(pt.thompson_size()[0], 2**30)
+        self.assertTrue(Dfa(pt, method='derivative').matches('aaa'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#/usr/bin/python3
+
+# test_pattern_set.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from pattern_set import *
+
+class TestPatternSet(unittest.TestCase):
+
+    def testDeadStates(self):
+        df = Dfa('ab')
+        dead = df.dead_states()
+        self.assertEqual(len(dead), 1)
+        self.assertNotIn(df.start, dead)
+
+    def testEmpty(self):
+        ps = PatternSet()
+        self.assertEqual(ps.matches('abc'), set())
+        self.assertFalse(ps.matches_any(''))
+
+    def testAdd(self):
+        ps = PatternSet()
+        a = ps.add('[a-z]+')
+        b = ps.add('[0-9]+')
+        c = ps.add('abc|def')
+        self.assertEqual(ps.matches('abc'), {a, c})
+        self.assertEqual(ps.matches('123'), {b})
+        self.assertEqual(ps.matches('abc1'), set())
+
+    def testRemove(self):
+        ps = PatternSet(['[a-z]+', 'abc|def', '(abc)*'])
+        self.assertEqual(ps.matches('abc'), {0, 1, 2})
+        ps.remove(1)
+        self.assertNotIn(1, ps)
+        self.assertEqual(len(ps), 2)
+        self.assertEqual(ps.matches('abc'), {0, 2})
+        self.assertEqual(ps.matches('abcabc'), {0, 2})
+        self.assertRaises(Exception, ps.remove, 1)
+
+    def testRemoveDropsOnlyItsCache(self):
+        ps = PatternSet(['a+', 'b+'])
+        ps.matches('aaa')
+        ps.matches('bbb')
+        before = len(ps._cache)
+        ps.remove(0)
+        self.assertLess(len(ps._cache), before)
+        self.assertTrue(all(0 not in {p for p, s in key[0]}
+                            for key in ps._cache))
+        self.assertEqual(ps.matches('bbb'), {1})
+
+    def testAddAfterMatching(self):
+        ps = PatternSet(['(ab|cd*)*'])
+        self.assertEqual(ps.matches('abcdd'), {0})
+        pid = ps.add('abc[d]+')
+        self.assertEqual(ps.matches('abcdd'), {0, pid})
+
+    def testAgreesWithReMatch(self):
+        rxs = ['abc(ab|cd*)*def', '(abc+)+', '[:alpha:]+|[:digit:]+',
+               '([0-9]{3}-){2}[0-9]{4}', 'a{2,3}']
+        inputs = ['abcdef', 'abccc', '432', '720-303-1234', 'aa', 'aaaa', '']
+        ps = PatternSet(rxs)
+        for ins in inputs:
+            expected = {i for i, rx in enumerate(rxs) if re_match(rx, ins)}
+            self.assertEqual(ps.matches(ins), expected)
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#/usr/bin/python3
+
+# test_planner.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import shutil
+import tempfile
+import unittest
+
+from regex import *
+from planner import *
+from benchmarks.corpus import corpus, random_lines
+
+class TestPlanner(unittest.TestCase):
+
+    def testFeatures(self):
+        f = features('(a|b)*a(a|b){12}')
+        self.assertEqual(f.risk_bits, 12)
+        self.assertEqual(f.counted, 1)
+        self.assertEqual(f.max_count, 12)
+        self.assertEqual(f.alphabet, 2)
+        self.assertGreater(f.est_dfa_states, 4096)
+        self.assertEqual(features('[0-9]*x[a-z]{5}').risk_bits, 0)
+        self.assertEqual(features('((ab)*c)*').closure_depth, 2)
+
+    def testChoices(self):
+        self.assertEqual(plan('abc', 5).engine, 'nfa')
+        self.assertEqual(plan('abc', 1000).engine, 'lazy')
+        self.assertEqual(plan('abc').engine, 'dfa')
+        self.assertEqual(plan('(a|b)*a(a|b){16}', 100000).engine, 'bitparallel')
+        self.assertEqual(plan('(a|b)*a(a|b){300}', 100000).engine, 'lazy')
+
+    def testExplain(self):
+        text = explain('(a|b)*a(a|b){16}')
+        self.assertTrue(text.startswith('engine: bitparallel\n'))
+        self.assertIn('2^16', text)
+        self.assertIn('no input volume given', text)
+        self.assertEqual(compile('ab').explain(), explain('ab'))
+
+    def testEnginesAgree(self):
+        for rx, inputs in corpus:
+            lines = inputs + random_lines(50, ''.join(set(''.join(inputs))), 0, 12)
+            want = [Nfa(rx).matches(ins) for ins in lines]
+            for engine in engines:
+                m = compile(rx, engine=engine)
+                self.assertEqual([m.matches(ins) for ins in lines], want, (rx, engine))
+
+    def testBitParallelWide(self):
+        # More than 64 states spill over several bytes of tables
+        rx = '(a|b)*a(a|b){70}'
+        m = BitParallelNfa(Nfa(rx))
+        self.assertGreater(m.nbytes, 8)
+        self.assertTrue(m.matches('b' * 5 + 'a' + 'b' * 70))
+        self.assertFalse(m.matches('b' * 5 + 'a' + 'b' * 71))
+        self.assertFalse(m.matches('c'))
+
+    def testFallback(self):
+        m = compile('(a|b)*a(a|b){14}', engine='dfa')
+        self.assertEqual(m.plan.engine, 'lazy')
+        self.assertIn('budget exceeded', m.explain())
+        self.assertTrue(m.matches('a' * 15))
+
+    def testFlags(self):
+        for engine in engines:
+            self.assertTrue(compile('ab+', engine=engine, ignorecase=True).matches('ABb'))
+            self.assertTrue(compile('[:L:]+', engine=engine).matches('héllo'))
+
+    def testReMatch(self):
+        self.assertTrue(re_match('(a|b)*abb', 'ababb', use_dfa='auto'))
+        self.assertFalse(re_match('(a|b)*abb', 'abab', use_dfa='auto'))
+        self.assertTrue(re_match('x+', 'X' * 5000, use_dfa='auto', ignorecase=True))
+
+    def testBudget(self):
+        text = 'ab' * 5000 + 'b'
+        with self.assertRaises(BudgetExceeded) as cm:
+            re_match('(a|b)*abb', text, use_dfa='auto', budget=Budget(max_dfa_states=2))
+        self.assertEqual(cm.exception.limit, 'dfa_states')
+        for engine in engines:
+            with self.assertRaises(BudgetExceeded):
+                compile('(a|b)*abb', engine=engine, budget=Budget(max_nfa_states=3))
+        with self.assertRaises(BudgetExceeded):
+            re_match('(a|b)*abb', 'abb', use_dfa='auto', budget=Budget(max_pattern_length=3))
+        self.assertTrue(re_match('(a|b)*abb', text, use_dfa='auto', budget=Budget(max_dfa_states=50)))
+        # The planner's own Dfa limit still falls back to the lazy Dfa
+        m = compile('(a|b)*a(a|b){14}', engine='dfa', budget=Budget(max_nfa_states=1000))
+        self.assertEqual(m.plan.engine, 'lazy')
+
+    def testDiskCache(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            set_cache_dir(tmp)
+            stats = enable_stats()
+            self.assertTrue(re_match('x[0-9]+', 'x' + '1' * 5000, use_dfa='auto'))
+            self.assertTrue(re_match('x[0-9]+', 'x' + '2' * 5000, use_dfa='auto'))
+            self.assertEqual(stats.counters.get('disk_cache_hits'), 1)
+        finally:
+            disable_stats()
+            set_cache_dir(None)
+            shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    unittest.main()
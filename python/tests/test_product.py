@@ -0,0 +1,105 @@
+#/usr/bin/python3
+
+# test_product.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from regex import *
+from product import *
+from redundancy import *
+from benchmarks.corpus import corpus, random_lines
+
+class TestProduct(unittest.TestCase):
+
+    def testOperations(self):
+        lines = random_lines(300, 'ab01x-', 0, 8)
+        pairs = [('(a|b)*abb', '(a|b)*b'), ('[a-z]*1', 'x+[0-9]'),
+                 ('ab|[:N:]', '[0-9]+'), ('(ab)*', 'a(ba)*b')]
+        for rx1, rx2 in pairs:
+            a = Dfa(rx1)
+            b = Dfa(rx2)
+            both = a.intersection(b)
+            either = a.union(b)
+            only = a.difference(b)
+            for ins in lines + ['١٢', 'ab']:
+                ma = a.matches(ins)
+                mb = b.matches(ins)
+                self.assertEqual(both.matches(ins), ma and mb, (rx1, rx2, ins))
+                self.assertEqual(either.matches(ins), ma or mb, (rx1, rx2, ins))
+                self.assertEqual(only.matches(ins), ma and not mb, (rx1, rx2, ins))
+
+    def testInclusion(self):
+        self.assertTrue(Dfa('(a|b)*abb').is_subset(Dfa('(a|b)*b')))
+        self.assertFalse(Dfa('(a|b)*b').is_subset(Dfa('(a|b)*abb')))
+        self.assertEqual(counterexample(Dfa('(a|b)*b'), Dfa('(a|b)*abb')), 'b')
+        self.assertTrue(Dfa('[A-Z]x').is_subset(Dfa('[:Lu:]x')))
+        self.assertFalse(Dfa('[:Lu:]x').is_subset(Dfa('[A-Z]x')))
+        self.assertTrue(Dfa('[:Lu:]x').matches(counterexample(Dfa('[:Lu:]x'), Dfa('[A-Z]x'))))
+        self.assertTrue(Dfa('abc').is_subset(Dfa('abc')))
+
+    def testEquivalence(self):
+        self.assertTrue(Dfa('a+').equivalent(Dfa('aa*')))
+        self.assertTrue(Dfa('(a|b)*').equivalent(Dfa('(a*b*)*')))
+        self.assertFalse(Dfa('a*').equivalent(Dfa('a+')))
+        self.assertTrue(Dfa('AB', ignorecase=True).equivalent(Dfa('ab', ignorecase=True)))
+        with self.assertRaises(Exception):
+            Dfa('ab', ignorecase=True).equivalent(Dfa('ab'))
+        for rx, inputs in corpus:
+            self.assertTrue(Dfa(rx).equivalent(Dfa(rx, method='followpos')), rx)
+
+    def testEmpty(self):
+        self.assertFalse(Dfa('a').is_empty())
+        self.assertTrue(Dfa('a').intersection(Dfa('b')).is_empty())
+        self.assertTrue(Dfa('abc').difference(Dfa('[a-z]+')).is_empty())
+        self.assertTrue(Dfa().is_empty())
+
+class TestRedundancy(unittest.TestCase):
+    patterns = ['abc', 'x[0-9]{2}', 'a(bc)', 'x[0-9]+', '[A-Z]x', '[:Lu:]x', 'q+']
+
+    def testFindings(self):
+        findings = find_redundant(self.patterns + [Dfa()])
+        self.assertEqual([(f.kind, f.index, f.other) for f in findings],
+                         [('subsumed', 1, 3), ('duplicate', 2, 0),
+                          ('subsumed', 4, 5), ('empty', 7, None)])
+        self.assertTrue(Dfa('x[0-9]+').matches(findings[0].example))
+        self.assertFalse(Dfa('x[0-9]{2}').matches(findings[0].example))
+
+    def testNothingRedundant(self):
+        self.assertEqual(find_redundant(['ab', 'ba', 'aa+b']), [])
+        self.assertEqual(find_redundant(['AB', 'ab']), [])
+        self.assertEqual(len(find_redundant(['AB', 'ab'], ignorecase=True)), 1)
+
+    def testMain(self):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(self.patterns) + '\n')
+            out = StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(main([path]), 0)
+        finally:
+            os.unlink(path)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "1: 'x[0-9]{2}' is subsumed by 3: 'x[0-9]+', which also matches 'x0'")
+        self.assertEqual(lines[-1], '3 of 7 rules redundant')
+
+if __name__ == '__main__':
+    unittest.main()
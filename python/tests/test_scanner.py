@@ -0,0 +1,86 @@
+#/usr/bin/python3
+
+# test_scanner.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from scanner import *
+
+rules = [('IF', 'if'),
+         ('ID', '[a-z][a-z0-9]*'),
+         ('NUM', '[0-9]+'),
+         ('RELOP', '<|<=|=|>|>='),
+         (None, PTCharSet.from_set(' \t'))]
+
+def types(toks):
+    return [(t.type, t.value) for t in toks]
+
+class TestScanner(unittest.TestCase):
+
+    def testPriority(self):
+        sc = Scanner(rules)
+        self.assertEqual(types(sc.tokenize('if ifx')),
+                         [('IF', 'if'), ('ID', 'ifx')])
+
+    def testLongestMatch(self):
+        sc = Scanner(rules)
+        self.assertEqual(types(sc.tokenize('a<=10>b')),
+                         [('ID', 'a'), ('RELOP', '<='), ('NUM', '10'),
+                          ('RELOP', '>'), ('ID', 'b')])
+
+    def testPositions(self):
+        sc = Scanner(rules)
+        self.assertEqual([t.pos for t in sc.tokenize('x1  = 42')], [0, 4, 6])
+
+    def testBacksUpToLastAccept(self):
+        sc = Scanner([('A', 'a'), ('B', 'b'), ('ABC', 'abc')])
+        self.assertEqual(types(sc.tokenize('ababc')),
+                         [('A', 'a'), ('B', 'b'), ('ABC', 'abc')])
+        sc = Scanner([('A', 'a'), ('ABC', 'abc')])
+        self.assertRaises(LexError, list, sc.tokenize('ab'))
+
+    def testLexError(self):
+        sc = Scanner(rules)
+        with self.assertRaises(LexError) as cm:
+            list(sc.tokenize('ab ?'))
+        self.assertEqual(cm.exception.pos, 3)
+
+    def testEmptyMatch(self):
+        sc = Scanner([('AS', 'a*')])
+        self.assertRaises(LexError, list, sc.tokenize('b'))
+
+    def testCategories(self):
+        sc = Scanner([('W', '[:L:]+'), ('N', '[0-9]+'), ('X', 'x[:Nd:]'),
+                      (None, PTCharSet.from_set(' '))])
+        self.assertEqual(types(sc.tokenize('abc12')), [('W', 'abc'), ('N', '12')])
+        # x has an edge of its own and still reaches the [:L:] rule
+        self.assertEqual(types(sc.tokenize('héllo x٣ xy 7')),
+                         [('W', 'héllo'), ('X', 'x٣'), ('W', 'xy'), ('N', '7')])
+        with self.assertRaises(LexError):
+            list(sc.tokenize('ab!'))
+        self.assertEqual(types(sc.tokens(['hé', 'llo 4', '2'])), [('W', 'héllo'), ('N', '42')])
+
+    def testStreaming(self):
+        sc = Scanner(rules)
+        text = 'if abc<=123 xyz>=9 if0'
+        for size in [1, 2, 3, 7, 100]:
+            chunks = [text[i:i+size] for i in range(0, len(text), size)]
+            self.assertEqual(list(sc.tokens(chunks)), list(sc.tokenize(text)))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#/usr/bin/python3
+
+# test_sparse.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import random
+import tracemalloc
+import unittest
+
+from regex import *
+from sparse import *
+from benchmarks.corpus import corpus, random_lines
+
+class TestSparse(unittest.TestCase):
+
+    def testSparseSet(self):
+        ss = SparseSet(10)
+        for i in [3, 7, 3, 0]:
+            ss.add(i)
+        self.assertEqual(list(ss), [3, 7, 0])
+        self.assertIn(7, ss)
+        self.assertNotIn(5, ss)
+        ss.clear()
+        self.assertEqual(len(ss), 0)
+        self.assertNotIn(3, ss)
+        ss.add(5)
+        self.assertEqual(list(ss), [5])
+
+    def testSameAnswers(self):
+        lines = random_lines(200, 'abcd0123-xy', 0, 12)
+        for rx, inputs in corpus:
+            nf = Nfa(rx)
+            for sp in [nf.sparse(), nf.sparse(optimize=False)]:
+                for ins in inputs + lines:
+                    self.assertEqual(sp.matches(ins), nf.matches(ins), (rx, ins))
+
+    def testFlags(self):
+        self.assertTrue(Nfa('ab+', ignorecase=True).sparse().matches('aBB'))
+        self.assertTrue(Nfa('[:L:]+', ).sparse(optimize=False).matches('héllo'))
+        self.assertFalse(Nfa('[:L:]+').sparse().matches('h1'))
+        self.assertFalse(Nfa('ab').sparse().matches('ax'))
+        self.assertTrue(Nfa('(ab)*').sparse().matches(''))
+
+    def testNoAllocation(self):
+        # Peak traced memory while matching doesn't grow with the input
+        sp = Nfa('(a|b)*a(a|b){40}').sparse(optimize=False)
+        rnd = random.Random(1)
+        peaks = []
+        for n in [100, 10000]:
+            text = ''.join(rnd.choice('ab') for i in range(n))
+            sp.matches(text)
+            tracemalloc.start()
+            try:
+                sp.matches(text)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        self.assertEqual(peaks[0], peaks[1])
+        self.assertLess(peaks[1], 1024)
+
+if __name__ == '__main__':
+    unittest.main()
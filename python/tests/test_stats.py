@@ -0,0 +1,85 @@
+#/usr/bin/python3
+
+# test_stats.py
+
+# Copyright (c) 2010, Jeremiah LaRocco jeremiah.larocco@gmail.com
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import unittest
+
+from regex import *
+from pattern_set import *
+
+class TestStats(unittest.TestCase):
+
+    def tearDown(self):
+        disable_stats()
+
+    def testDisabledByDefault(self):
+        self.assertIsNone(get_stats())
+        self.assertTrue(Dfa('ab*').matches('abbb'))
+        self.assertIsNone(get_stats())
+
+    def testParseCounters(self):
+        stats = enable_stats()
+        parse_regex('(ab)|c*')
+        self.assertEqual(stats.counters['tokens'], 7)
+        self.assertEqual(stats.counters['parse_nodes'], 6)
+        self.assertIn('parse', stats.timers)
+
+    def testPipeline(self):
+        stats = enable_stats()
+        df = Dfa('a|b')
+        self.assertTrue(df.matches('a'))
+        self.assertFalse(df.matches('ba'))
+        for stage in ['parse', 'thompson', 'subset', 'match']:
+            self.assertIn(stage, stats.timers)
+        self.assertEqual(stats.counters['nfa_states'], 6)
+        self.assertEqual(stats.counters['nfa_edges'], 6)
+        self.assertEqual(stats.counters['dfa_states'], 4)
+        self.assertEqual(stats.counters['match_calls'], 2)
+        self.assertEqual(stats.counters['chars'], 3)
+        self.assertGreater(stats.counters['e_closure'], 0)
+
+    def testNfaMatch(self):
+        nf = Nfa('a*')
+        stats = enable_stats()
+        self.assertTrue(nf.matches('aaa'))
+        self.assertEqual(stats.counters['chars'], 3)
+
+    def testCacheHits(self):
+        ps = PatternSet(['a+', 'b+'])
+        stats = enable_stats()
+        ps.matches('aaaaa')
+        misses = stats.counters['cache_misses']
+        self.assertEqual(stats.counters['cache_hits'] + misses, 5)
+        ps.matches('aaaaa')
+        self.assertEqual(stats.counters['cache_misses'], misses)
+        self.assertEqual(stats.counters['cache_hits'], 10 - misses)
+
+    def testCallback(self):
+        seen = []
+        enable_stats(lambda stage, secs, stats: seen.append(stage))
+        Nfa('abc').to_dfa()
+        self.assertEqual(seen, ['parse', 'thompson', 'subset'])
+
+    def testDisableReturnsStats(self):
+        stats = enable_stats()
+        Nfa('a')
+        self.assertIs(disable_stats(), stats)
+        self.assertIsNone(get_stats())
+        self.assertIn('nfa_states', str(stats))
+
+if __name__=='__main__':
+    unittest.main()